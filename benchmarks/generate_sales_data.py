@@ -0,0 +1,133 @@
+# benchmarks/generate_sales_data.py
+"""
+Seeded generator of realistic, dirty pipe-delimited sales files
+
+Mirrors the quirks of data/sales_data.txt: thousands separators in
+prices, commas inside product names, invalid Transaction/Customer IDs,
+zero quantities, missing fields and blank lines.
+
+Usage:
+    python benchmarks/generate_sales_data.py --rows 1000000 --output data/bench_1m.txt
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+BASE_NAMES = [
+    "Laptop", "Mouse", "Keyboard", "Monitor", "Webcam", "Headphones",
+    "USB Cable", "External Hard Drive", "Wireless Mouse", "Laptop Charger"
+]
+VARIANTS = ["Premium", "Wireless", "Mechanical", "LED", "HD", "1TB", "Gaming", "65W"]
+REGIONS = ["North", "South", "East", "West", "Central", "Northeast", "Northwest", "Southeast"]
+
+DEFAULTS = {
+    "products": 50,
+    "customers": 5000,
+    "regions": 4,
+    "days": 31,
+    "start_date": "2024-12-01",
+    "comma_price_rate": 0.3,
+    "comma_name_rate": 0.3,
+    "invalid_id_rate": 0.03,
+    "missing_customer_rate": 0.02,
+    "zero_quantity_rate": 0.03,
+    "malformed_rate": 0.005,
+    "blank_rate": 0.002
+}
+
+
+def _catalog(rng, products):
+    catalog = []
+    for i in range(products):
+        name = BASE_NAMES[i % len(BASE_NAMES)]
+        if i >= len(BASE_NAMES):
+            name = f"{name} {i // len(BASE_NAMES) + 1}"
+        price = round(rng.lognormvariate(7.5, 1.2))
+        catalog.append((f"P{101 + i}", name, max(price, 50)))
+    return catalog
+
+
+def iter_sales_lines(rows, seed=42, **options):
+    """
+    Yields the header and `rows` data lines (without newlines)
+
+    Options override DEFAULTS (cardinalities and dirty-data rates).
+    """
+    opts = dict(DEFAULTS, **options)
+    rng = random.Random(seed)
+
+    catalog = _catalog(rng, opts["products"])
+    regions = REGIONS[:opts["regions"]]
+    start = date.fromisoformat(opts["start_date"])
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(opts["days"])]
+    customers = opts["customers"]
+
+    yield HEADER
+
+    for i in range(rows):
+        r = rng.random
+
+        if r() < opts["blank_rate"]:
+            yield ""
+            continue
+
+        pid, name, base_price = catalog[rng.randrange(len(catalog))]
+
+        if r() < opts["comma_name_rate"]:
+            name = f"{name},{rng.choice(VARIANTS)}"
+
+        quantity = 0 if r() < opts["zero_quantity_rate"] else rng.randint(1, 10)
+
+        price = max(1, int(base_price * rng.uniform(0.8, 1.2)))
+        price_text = f"{price:,}" if r() < opts["comma_price_rate"] else str(price)
+
+        tid = f"T{i + 1:07d}"
+        if r() < opts["invalid_id_rate"]:
+            tid = f"X{rng.randint(1, 999)}"
+
+        cid = f"C{rng.randint(1, customers):06d}"
+        if r() < opts["missing_customer_rate"]:
+            cid = ""
+
+        fields = [
+            tid, rng.choice(dates), pid, name,
+            str(quantity), price_text, cid, rng.choice(regions)
+        ]
+
+        if r() < opts["malformed_rate"]:
+            del fields[rng.randrange(len(fields))]
+
+        yield "|".join(fields)
+
+
+def write_sales_file(path, rows, seed=42, **options):
+    """
+    Streams a synthetic sales file to `path`
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for line in iter_sales_lines(rows, seed, **options):
+            file.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="data/synthetic_sales_data.txt")
+    for key in ("products", "customers", "regions", "days"):
+        parser.add_argument(f"--{key}", type=int, default=DEFAULTS[key])
+    args = parser.parse_args()
+
+    write_sales_file(
+        args.output, args.rows, args.seed,
+        products=args.products, customers=args.customers,
+        regions=args.regions, days=args.days
+    )
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/load_test.py
+"""
+Load test client for the query service (main.py --serve)
+
+Runs a fixed mix of filtered queries from several threads over keep-alive
+connections and reports latency percentiles and throughput. With --data
+it starts its own service on that file (offline catalog) in a
+subprocess, so the client and server don't share a GIL.
+
+Usage:
+    python benchmarks/load_test.py --data data/sales_data.txt
+    python benchmarks/load_test.py --url http://127.0.0.1:8766 --threads 8 --requests 20000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VIEWS = ["summary", "regions", "products", "customers", "daily"]
+REGIONS = ["North", "South", "East", "West"]
+
+
+def query_mix(count, seed=42):
+    """
+    Returns `count` distinct query paths: every view unfiltered and under
+    region / amount / date range filters
+    """
+    rng = random.Random(seed)
+    paths = [f"/{view}" for view in VIEWS]
+
+    while len(paths) < count:
+        params = {}
+        if rng.random() < 0.6:
+            params["region"] = rng.choice(REGIONS)
+        if rng.random() < 0.4:
+            low = rng.choice([0, 1000, 5000, 10000])
+            params["min_amount"] = low
+            params["max_amount"] = low + rng.choice([5000, 20000, 100000])
+        if rng.random() < 0.4:
+            first = rng.randint(1, 28)
+            params["start"] = f"2024-12-{first:02d}"
+            params["end"] = f"2024-12-{rng.randint(first, 31):02d}"
+        if rng.random() < 0.3:
+            params["n"] = rng.choice([3, 5, 10])
+        path = f"/{rng.choice(VIEWS)}?{urlencode(params)}"
+        if path not in paths:
+            paths.append(path)
+
+    return paths
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_load(host, port, paths, threads, requests, seed=0):
+    """
+    Sends `requests` GETs spread over `threads` keep-alive connections
+
+    Returns: dict with latencies (seconds, sorted), errors, cache hits and
+    elapsed wall time
+    """
+    per_thread = [requests // threads + (i < requests % threads) for i in range(threads)]
+    results = [None] * threads
+
+    def worker(i):
+        rng = random.Random(seed + i)
+        conn = http.client.HTTPConnection(host, port)
+        latencies = []
+        errors = hits = 0
+        for _ in range(per_thread[i]):
+            path = rng.choice(paths)
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status != 200:
+                errors += 1
+            elif response.getheader("X-Cache") == "hit":
+                hits += 1
+        conn.close()
+        results[i] = latencies, errors, hits
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        "latencies": latencies,
+        "errors": sum(result[1] for result in results),
+        "hits": sum(result[2] for result in results),
+        "elapsed": elapsed
+    }
+
+
+def summarize(result):
+    latencies = result["latencies"]
+    ms = {
+        f"p{int(q * 100)}": round(percentile(latencies, q) * 1000, 3)
+        for q in (0.5, 0.9, 0.95, 0.99)
+    } if latencies else {}
+    if latencies:
+        ms["max"] = round(latencies[-1] * 1000, 3)
+
+    return {
+        "requests": len(latencies) + result["errors"],
+        "errors": result["errors"],
+        "cache_hit_rate": round(result["hits"] / len(latencies) * 100, 2) if latencies else 0,
+        "throughput_rps": round(len(latencies) / result["elapsed"], 1) if result["elapsed"] else 0,
+        "latency_ms": ms
+    }
+
+
+def start_service(data_file, port):
+    """
+    Starts main.py --serve on `data_file` and waits until it answers
+    """
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--serve", "--offline", "--input", os.path.abspath(data_file),
+         "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("query service exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/stats")
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("query service did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the sales query service")
+    parser.add_argument("--url", default="http://127.0.0.1:8766", help="running service")
+    parser.add_argument("--data", help="start a service on this sales file instead")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200, help="distinct queries in the mix")
+    parser.add_argument("--warmup", action="store_true",
+                        help="send every query once before measuring")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    process = start_service(args.data, port) if args.data else None
+
+    try:
+        paths = query_mix(args.queries)
+        if args.warmup:
+            conn = http.client.HTTPConnection(host, port)
+            for path in paths:
+                conn.request("GET", path)
+                conn.getresponse().read()
+            conn.close()
+
+        summary = summarize(run_load(host, port, paths, args.threads, args.requests))
+        summary["threads"] = args.threads
+        summary["distinct_queries"] = len(paths)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/parser_benchmark.py
+"""
+Before/after benchmark of the line parser
+
+Compares the original per-line parser (one dict literal per row, kept
+below as `baseline_parse`) with RecordParser on a generated file: best
+wall time of --repeat runs, and traced memory per parsed row that the
+returned rows hold.
+
+Usage:
+    python benchmarks/parser_benchmark.py --rows 300000
+
+Recorded on one (noisy) core, Python 3.11, 299,341 lines, best of 5:
+
+    parser                        wall s      rows/s   bytes/row
+    baseline                      0.80-0.96   ~350,000         644
+    RecordParser.parse (before)   1.50        ~200,000         243
+    RecordParser.parse            0.90-1.00   ~320,000         243
+    RecordParser.iter_parse       0.73-0.85   ~375,000           -
+
+RecordParser is a memory change: its rows take 2.6x less memory (rows
+share one key table and repeated field values are stored once). Parsing
+into a list stays about 10% slower than the baseline dict literals, and
+streaming with iter_parse is on par.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_sales_data import write_sales_file
+from utils.file_handler import iter_sales_data
+from utils.schema_parser import RecordParser
+
+
+def baseline_parse(raw_lines):
+    """
+    The parser before RecordParser, for comparison
+    """
+    transactions = []
+
+    for line in raw_lines:
+        try:
+            parts = line.split("|")
+
+            if len(parts) != 8:
+                continue
+
+            transaction = {
+                "TransactionID": parts[0].strip(),
+                "Date": parts[1].strip(),
+                "ProductID": parts[2].strip(),
+                "ProductName": parts[3].replace(",", "").strip(),
+                "Quantity": int(parts[4].replace(",", "").strip()),
+                "UnitPrice": float(parts[5].replace(",", "").strip()),
+                "CustomerID": parts[6].strip(),
+                "Region": parts[7].strip()
+            }
+
+            transactions.append(transaction)
+
+        except ValueError:
+            continue
+
+    return transactions
+
+
+def _count(rows):
+    count = 0
+    for _ in rows:
+        count += 1
+    return count
+
+
+PARSERS = [
+    ("baseline", baseline_parse, True),
+    ("RecordParser.parse", lambda lines: RecordParser().parse(lines), True),
+    # Streaming: rows are dropped as they are counted, nothing is kept
+    ("RecordParser.iter_parse", lambda lines: _count(RecordParser().iter_parse(lines)), False),
+]
+
+
+def _bytes_per_row(parse, lines):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        rows = parse(lines)
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return held / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the line parser")
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is kept)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales_bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"sales_{args.rows}_{args.seed}.txt")
+    if not os.path.exists(path):
+        print(f"Generating {args.rows:,} rows -> {path}")
+        write_sales_file(path, args.rows, args.seed)
+    lines = list(iter_sales_data(path))
+
+    # Runs are interleaved so drift on a busy machine hits every parser
+    best = {name: None for name, _, _ in PARSERS}
+    for _ in range(args.repeat):
+        for name, parse, _ in PARSERS:
+            gc.collect()
+            wall = time.perf_counter()
+            parse(lines)
+            wall = time.perf_counter() - wall
+            if best[name] is None or wall < best[name]:
+                best[name] = wall
+
+    print(f"\n{len(lines):,} lines")
+    print(f"{'parser':<26}{'wall s':>8}{'rows/s':>11}{'bytes/row':>12}")
+    for name, parse, keeps_rows in PARSERS:
+        memory = f"{_bytes_per_row(parse, lines):,.0f}" if keeps_rows else "-"
+        print(f"{name:<26}{best[name]:>8.3f}{len(lines) / best[name]:>11,.0f}{memory:>12}")
+
+
+if __name__ == "__main__":
+    main()
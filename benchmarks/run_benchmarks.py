@@ -0,0 +1,289 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark harness for the sales pipeline
+
+Generates seeded synthetic files (see generate_sales_data.py), then times
+each pipeline stage (wall and CPU time, best of --repeat) and measures its
+peak traced memory in a separate tracemalloc pass. Results are written as
+JSON so runs can be compared across commits with --compare.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10000 1000000
+    python benchmarks/run_benchmarks.py --sizes 10000 --compare old.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_sales_data import DEFAULTS, write_sales_file
+from utils.file_handler import read_sales_data, parse_transactions, iter_sales_data, iter_transactions
+from utils.data_handler import validate_and_filter, iter_valid_transactions, FilterIndex
+from utils.api_handler import (
+    create_product_mapping,
+    enrich_sales_data,
+    save_enriched_data,
+    iter_enriched_data,
+    iter_save_enriched_data
+)
+from utils.data_processor import (
+    aggregate_transactions,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+from utils.report_generator import generate_sales_report
+
+# The columnar stages run only where numpy is installed
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+def _quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def _mapping(products):
+    # Synthetic catalog matching roughly half of the generated ProductIDs
+    api_products = [
+        {"id": 101 + i, "title": f"Product {i}", "category": "electronics",
+         "brand": "Brand", "rating": 4.5}
+        for i in range(max(1, products // 2))
+    ]
+    return create_product_mapping(api_products)
+
+
+def _stream_pipeline(ctx):
+    enriched = iter_save_enriched_data(
+        iter_enriched_data(
+            iter_valid_transactions(iter_transactions(iter_sales_data(ctx["path"]))),
+            ctx["mapping"]
+        ),
+        ctx["enriched_file"],
+        verbose=False
+    )
+    return aggregate_transactions(enriched)
+
+
+def _columnar(ctx):
+    from utils.columnar import filter_columns
+    columns, _ = filter_columns(parse_transactions(ctx["lines"], columnar=True))
+    return columns
+
+
+def _columnar_aggregate(ctx):
+    from utils.columnar import aggregate_columns
+    return aggregate_columns(ctx["columns"])
+
+
+# (name, function(ctx), context key for the result, context key of the input rows)
+STAGES = [
+    ("read", lambda c: read_sales_data(c["path"]), "lines", None),
+    ("parse", lambda c: parse_transactions(c["lines"]), "transactions", "lines"),
+    ("validate_filter", lambda c: _quiet(validate_and_filter, c["transactions"])[0], "valid", "transactions"),
+    ("filter_index", lambda c: FilterIndex(c["valid"]), "filter_index", "valid"),
+    ("filter_index_query", lambda c: c["filter_index"].query("North", 1000, 50000)[0], None, "valid"),
+    ("enrich", lambda c: enrich_sales_data(c["valid"], c["mapping"]), "enriched", "valid"),
+    ("save_enriched", lambda c: _quiet(save_enriched_data, c["enriched"], c["enriched_file"]), None, "enriched"),
+    ("aggregate", lambda c: aggregate_transactions(c["valid"]), "aggregates", "valid"),
+    ("calculate_total_revenue", lambda c: calculate_total_revenue(c["valid"]), None, "valid"),
+    ("region_wise_sales", lambda c: region_wise_sales(c["valid"]), None, "valid"),
+    ("top_selling_products", lambda c: top_selling_products(c["valid"]), None, "valid"),
+    ("customer_analysis", lambda c: customer_analysis(c["valid"]), None, "valid"),
+    ("daily_sales_trend", lambda c: daily_sales_trend(c["valid"]), None, "valid"),
+    ("find_peak_sales_day", lambda c: find_peak_sales_day(c["valid"]), None, "valid"),
+    ("low_performing_products", lambda c: low_performing_products(c["valid"]), None, "valid"),
+    ("generate_sales_report", lambda c: _quiet(generate_sales_report, c["valid"], c["enriched"], c["report_file"]), None, "valid"),
+    ("streaming_pipeline", _stream_pipeline, None, "lines"),
+]
+
+COLUMNAR_STAGES = [
+    ("columnar_parse_filter", _columnar, "columns", "lines"),
+    ("columnar_aggregate", _columnar_aggregate, None, "columns"),
+]
+
+
+def _size(value):
+    # Row counts only make sense for row collections, not aggregate dicts
+    if value is None or isinstance(value, (dict, str)):
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _run_stages(ctx, stages, repeat, trace):
+    results = {}
+
+    for name, func, out_key, in_key in stages:
+        best_wall = best_cpu = None
+        peak = None
+
+        for _ in range(1 if trace else repeat):
+            if trace:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            value = func(ctx)
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1] - before
+
+            if best_wall is None or wall < best_wall:
+                best_wall, best_cpu = wall, cpu
+
+        if out_key:
+            ctx[out_key] = value
+
+        rows_in = _size(ctx.get(in_key)) if in_key else None
+        rows_out = _size(value)
+        rows = rows_in or rows_out
+        results[name] = {
+            "wall_s": round(best_wall, 6),
+            "cpu_s": round(best_cpu, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "rows_per_s": round(rows / best_wall) if rows and best_wall else None,
+            "peak_traced_bytes": peak
+        }
+
+    return results
+
+
+def benchmark_size(rows, seed, data_dir, repeat, options):
+    path = os.path.join(data_dir, f"sales_{rows}_{seed}.txt")
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} rows -> {path}")
+        write_sales_file(path, rows, seed, **options)
+
+    stages = STAGES + (COLUMNAR_STAGES if HAS_NUMPY else [])
+
+    def fresh_context():
+        return {
+            "path": path,
+            "mapping": _mapping(options.get("products", DEFAULTS["products"])),
+            "enriched_file": os.path.join(data_dir, "enriched.txt"),
+            "report_file": os.path.join(data_dir, "report", "sales_report.txt"),
+        }
+
+    print(f"Timing {rows:,} rows...")
+    timings = _run_stages(fresh_context(), stages, repeat, trace=False)
+
+    print(f"Tracing memory for {rows:,} rows...")
+    tracemalloc.start()
+    try:
+        memory = _run_stages(fresh_context(), stages, 1, trace=True)
+    finally:
+        tracemalloc.stop()
+
+    for name, stats in timings.items():
+        stats["peak_traced_bytes"] = memory[name]["peak_traced_bytes"]
+
+    return {
+        "rows": rows,
+        "file_bytes": os.path.getsize(path),
+        "stages": timings
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {}
+    if baseline:
+        for run in baseline.get("runs", []):
+            previous[run["rows"]] = run["stages"]
+
+    for run in results["runs"]:
+        print(f"\n{run['rows']:,} rows ({run['file_bytes'] / 1e6:.1f} MB)")
+        print(f"{'Stage':<26}{'Wall s':>10}{'Rows/s':>14}{'Peak MB':>10}{'vs base':>10}")
+        for name, s in run["stages"].items():
+            rate = f"{s['rows_per_s']:,}" if s["rows_per_s"] else "-"
+            peak = f"{s['peak_traced_bytes'] / 1e6:.1f}" if s["peak_traced_bytes"] is not None else "-"
+            ratio = "-"
+            old = previous.get(run["rows"], {}).get(name)
+            if old and old["wall_s"]:
+                ratio = f"{s['wall_s'] / old['wall_s']:.2f}x"
+            print(f"{name:<26}{s['wall_s']:>10.4f}{rate:>14}{peak:>10}{ratio:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                        help="row counts to benchmark (e.g. 10000 1000000 10000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is kept)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales_bench"))
+    parser.add_argument("--output", default="output/benchmark_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    for key in ("products", "customers", "regions", "days"):
+        parser.add_argument(f"--{key}", type=int, default=DEFAULTS[key])
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(args.data_dir, "report"), exist_ok=True)
+    options = {k: getattr(args, k) for k in ("products", "customers", "regions", "days")}
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": HAS_NUMPY,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "options": options
+        },
+        "runs": [
+            benchmark_size(rows, args.seed, args.data_dir, args.repeat, options)
+            for rows in args.sizes
+        ]
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    print_results(results, baseline)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,127 +1,494 @@
 # main.py
 
-from utils.file_handler import read_sales_data, parse_transactions
-from utils.data_handler import validate_and_filter
+import argparse
+import cProfile
+import os
+from itertools import chain, islice
+
+from utils.file_handler import iter_sales_data, iter_transactions, load_transactions
+from utils.data_handler import FilterOptions, iter_valid_transactions
 from utils.api_handler import (
-    fetch_all_products,
+    PRODUCTS_URL,
+    CatalogFetch,
+    EnrichmentIndex,
     create_product_mapping,
-    enrich_sales_data,
-    save_enriched_data,
+    iter_enriched_data,
+    iter_save_enriched_data,
 )
+from utils.data_processor import aggregate_transactions, default_accumulators
+from utils.schema_parser import RecordParser
+from utils.incremental import incremental_aggregate
+from utils.batch import check_scenario_names, load_batch_config, parse_scenario, run_batch
+from utils.parallel import parallel_scan, parallel_aggregate
 from utils.report_generator import generate_sales_report
+from utils.instrumentation import PipelineProfiler
+from utils.sqlite_store import SalesStore
+from utils.query_service import SERVICE_HOST, SERVICE_PORT, QueryService, make_server
+from utils.watcher import POLL_INTERVAL, SalesWatcher
+from utils.output_writer import COMPRESSION_SUFFIXES
+from utils.exporters import (
+    EXPORT_FORMATS,
+    export_aggregate_tables,
+    export_path,
+    iter_export_enriched,
+)
+
+
+DATA_FILE = "data/sales_data.txt"
+ENRICHED_FILE = "data/enriched_sales_data.txt"
+REPORT_FILE = "output/sales_report.txt"
+PROFILE_FILE = "output/run_profile.json"
+BATCH_OUTPUT_DIR = "output/reports"
+EXPORT_DIR = "output/export"
+# Validated rows held while the catalog downloads are capped at this many
+# batches (of 1024); beyond that the pass waits for the catalog
+READ_AHEAD_BATCHES = 32
+COMPRESSED_SUFFIXES = {name: suffix for suffix, name in COMPRESSION_SUFFIXES.items()}
+
+
+def _counted(items, counts, key):
+    """
+    Passes items through while counting them into counts[key]
+    """
+    counts[key] = 0
+    for item in items:
+        counts[key] += 1
+        yield item
+
+
+def _read_ahead(items, ready, batch_size=1024, max_batches=READ_AHEAD_BATCHES):
+    """
+    Pulls items into a buffer until ready() is true or max_batches batches
+    are buffered, then returns an iterator over the buffered items followed
+    by the rest
+    """
+    items = iter(items)
+    buffer = []
+    for _ in range(max_batches):
+        if ready():
+            break
+        batch = list(islice(items, batch_size))
+        if not batch:
+            break
+        buffer.extend(batch)
+    return chain(buffer, items)
+
+
+def main(workers=1, api_url=PRODUCTS_URL, offline=False, incremental=False,
+         profile=False, trace_memory=False, cprofile_file=None, parse_cache=True,
+         compression=None, export_format=None, approximate=False, sqlite_file=None,
+         percentiles=False):
+    """
+    Runs the pipeline; workers > 1 parses and aggregates the file in
+    parallel chunks (see utils/parallel.py). offline=True enriches from the
+    cached product catalog without touching the network. incremental=True
+    only processes lines appended since the last checkpoint
+    (see utils/incremental.py).
+
+    profile=True writes per-stage timings, row counts and memory to
+    PROFILE_FILE (trace_memory adds tracemalloc peaks); cprofile_file dumps
+    cProfile stats of the main processing pass.
+
+    The serial path parses the file once into a binary sidecar and replays
+    it after the filters are chosen; parse_cache=True keeps the sidecar to
+    skip parsing on re-runs (see utils/parse_cache.py).
 
+    compression ("gzip" or "zstd") writes the enriched file compressed, as
+    ENRICHED_FILE + ".gz"/".zst".
+
+    export_format ("csv", "arrow" or "parquet") also writes typed tables to
+    EXPORT_DIR: the aggregate tables in every mode, and the enriched rows
+    from the serial pass (see utils/exporters.py).
+
+    approximate=True counts unique customers/products with fixed-size
+    HyperLogLog sketches instead of sets (see utils/sketches.py).
+    percentiles=True adds order value p50/p95/p99 per region and per date
+    to the report.
+
+    sqlite_file loads the enriched rows of the serial pass into a SQLite
+    database for later queries (see utils/sqlite_store.py).
+
+    The product catalog is fetched in a background thread from the start;
+    the serial pass parses and validates ahead until it arrives and only
+    waits for it before enrichment.
+    """
+    profiler = PipelineProfiler(enabled=profile, trace_memory=trace_memory)
+    parsed = None
+    enriched_file = ENRICHED_FILE + COMPRESSED_SUFFIXES.get(compression, "")
 
-def main():
     try:
+        catalog = CatalogFetch(api_url, offline=offline)
+
         print("=" * 40)
         print("SALES ANALYTICS SYSTEM")
         print("=" * 40)
 
-        # --------------------------------------------------
-        # [1/10] READ SALES DATA
-        # --------------------------------------------------
-        print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
+        if incremental:
+            # Only the tail appended since the last run is processed, over
+            # the whole dataset (no interactive filters)
+            print("\n[1/6] Incremental mode: processing new lines only")
+            print("\n[2/6] Filters are not available in incremental mode")
+            region = None
+            min_amount = None
+            max_amount = None
+        else:
+            # --------------------------------------------------
+            # [1/6] READ & PARSE SALES DATA
+            # --------------------------------------------------
+            print("\n[1/6] Reading and parsing sales data...")
+            if workers > 1:
+                with profiler.stage("parallel_scan"):
+                    scan = parallel_scan(DATA_FILE, workers)
+                counts = {"read": scan["read"], "parsed": scan["parsed"]}
+                rejections = scan["rejections"]
+                regions = scan["regions"]
+                min_seen = scan["min_amount"]
+                max_seen = scan["max_amount"]
+            else:
+                # The file is read and parsed once, into a binary sidecar
+                # (kept for later runs unless parse_cache=False) that the
+                # processing pass replays; the filter options are collected
+                # while parsing
+                with profiler.stage("load_parsed") as stage:
+                    parsed = load_transactions(DATA_FILE, persist=parse_cache)
+                    if parsed is not None:
+                        stage.rows_out = parsed.parsed
 
-        # --------------------------------------------------
-        # [2/10] PARSE & CLEAN DATA
-        # --------------------------------------------------
-        print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(transactions)} records")
+                if parsed is not None:
+                    counts = {"read": parsed.read, "parsed": parsed.parsed}
+                    rejections = parsed.rejections
+                    options = parsed.filter_options
+                else:
+                    # The rows don't fit the sidecar columns: keep them in
+                    # memory instead
+                    counts = {}
+                    options = FilterOptions()
+                    parser = RecordParser()
+                    lines = profiler.wrap(
+                        "read", _counted(iter_sales_data(DATA_FILE), counts, "read")
+                    )
+                    transactions = profiler.wrap(
+                        "parse",
+                        _counted(iter_transactions(lines, parser), counts, "parsed"),
+                        upstream="read",
+                    )
+                    parsed = []
+                    for t in transactions:
+                        options.add(t)
+                        parsed.append(t)
+                    rejections = parser.rejections
 
-        # --------------------------------------------------
-        # [3/10] FILTER OPTIONS
-        # --------------------------------------------------
-        regions = sorted({t["Region"] for t in transactions if t.get("Region")})
-        amounts = [
-            t["Quantity"] * t["UnitPrice"]
-            for t in transactions
-            if t.get("Quantity") and t.get("UnitPrice")
-        ]
+                regions = options.regions
+                min_seen = options.min_amount
+                max_seen = options.max_amount
 
-        print("\n[3/10] Filter Options Available:")
-        print(f"Regions: {', '.join(regions)}")
-        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
+            print(f"✓ Successfully read {counts['read']} transactions")
+            print(f"✓ Parsed {counts['parsed']} records")
+            if rejections:
+                details = ", ".join(f"{k}: {v}" for k, v in sorted(rejections.items()))
+                print(f"  Rejected {sum(rejections.values())} lines ({details})")
 
-        apply_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
+            # --------------------------------------------------
+            # [2/6] FILTER OPTIONS
+            # --------------------------------------------------
+            print("\n[2/6] Filter Options Available:")
+            print(f"Regions: {', '.join(sorted(regions))}")
+            print(f"Amount Range: ₹{min_seen:,.0f} - ₹{max_seen:,.0f}")
 
-        region = None
-        min_amount = None
-        max_amount = None
+            apply_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
 
-        if apply_filter == "y":
-            region = input("Enter region (or press Enter to skip): ").strip() or None
+            region = None
+            min_amount = None
+            max_amount = None
 
-            min_amt = input("Enter minimum amount (or press Enter to skip): ").strip()
-            max_amt = input("Enter maximum amount (or press Enter to skip): ").strip()
+            if apply_filter == "y":
+                region = input("Enter region (or press Enter to skip): ").strip() or None
 
-            min_amount = float(min_amt) if min_amt else None
-            max_amount = float(max_amt) if max_amt else None
+                min_amt = input("Enter minimum amount (or press Enter to skip): ").strip()
+                max_amt = input("Enter maximum amount (or press Enter to skip): ").strip()
+
+                min_amount = float(min_amt) if min_amt else None
+                max_amount = float(max_amt) if max_amt else None
 
         # --------------------------------------------------
-        # [4/10] VALIDATION & FILTERING
+        # [3/6] FETCH PRODUCTS FROM API
         # --------------------------------------------------
-        print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            transactions,
-            region=region,
-            min_amount=min_amount,
-            max_amount=max_amount,
-        )
+        print("\n[3/6] Fetching product data from API...")
+        cprofiler = cProfile.Profile() if cprofile_file else None
+        if cprofiler:
+            cprofiler.enable()
 
-        print(
-            f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}"
-        )
+        if not incremental and workers <= 1:
+            stats = {}
+            transactions = profiler.wrap("replay", parsed)
+            valid_transactions = profiler.wrap(
+                "validate_filter",
+                iter_valid_transactions(
+                    transactions,
+                    region=region,
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                    stats=stats,
+                ),
+                upstream="replay",
+            )
+            # Enrichment is the first step that needs the catalog: keep
+            # parsing and validating ahead while it is still downloading
+            valid_transactions = _read_ahead(valid_transactions, catalog.done)
 
-        # --------------------------------------------------
-        # [5/10] FETCH PRODUCTS FROM API
-        # --------------------------------------------------
-        print("\n[5/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
+        with profiler.stage("api_fetch") as stage:
+            # Only the part of the fetch not hidden behind local work is timed
+            api_products = catalog.result()
+            product_mapping = create_product_mapping(api_products)
+            stage.rows_out = len(product_mapping)
         print(f"✓ Fetched {len(product_mapping)} products")
 
         # --------------------------------------------------
-        # [6/10] ENRICH SALES DATA
+        # [4/6] VALIDATE, ENRICH, SAVE & AGGREGATE (ONE PASS)
         # --------------------------------------------------
-        print("\n[6/10] Enriching sales data...")
-        enriched_transactions = enrich_sales_data(
-            valid_transactions, product_mapping
-        )
+        print("\n[4/6] Validating, enriching and saving transactions...")
+        if incremental:
+            with profiler.stage("incremental_aggregate") as stage:
+                aggregates, stats, new_lines = incremental_aggregate(
+                    DATA_FILE,
+                    product_mapping,
+                    enriched_file=enriched_file,
+                    approximate=approximate,
+                    percentiles=percentiles,
+                )
+                stage.rows_in = new_lines
+            print(f"✓ Read {new_lines} new lines | Duplicates skipped: {stats['duplicates']}")
+        elif workers > 1:
+            with profiler.stage("parallel_aggregate") as stage:
+                aggregates, stats = parallel_aggregate(
+                    DATA_FILE,
+                    workers,
+                    region=region,
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                    product_mapping=product_mapping,
+                    enriched_file=enriched_file,
+                    approximate=approximate,
+                    percentiles=percentiles,
+                )
+                stage.rows_out = stats["final_count"]
+        else:
+            enrichment_index = EnrichmentIndex(product_mapping)
+            enriched_transactions = profiler.wrap(
+                "enrich",
+                iter_enriched_data(valid_transactions, enrichment_index),
+                upstream="validate_filter",
+            )
+            saved_transactions = profiler.wrap(
+                "save",
+                iter_save_enriched_data(enriched_transactions, enriched_file),
+                upstream="enrich",
+            )
+            last_stage = "save"
+            if export_format:
+                saved_transactions = profiler.wrap(
+                    "export",
+                    iter_export_enriched(
+                        saved_transactions,
+                        export_path(EXPORT_DIR, "enriched_sales_data", export_format),
+                        export_format,
+                    ),
+                    upstream="save",
+                )
+                last_stage = "export"
+            store = None
+            if sqlite_file:
+                store = SalesStore(sqlite_file)
+                saved_transactions = profiler.wrap(
+                    "sqlite_load", store.iter_load(saved_transactions), upstream=last_stage
+                )
+                last_stage = "sqlite_load"
+            with profiler.stage("aggregate", upstream=last_stage):
+                aggregates = aggregate_transactions(
+                    saved_transactions, default_accumulators(approximate, percentiles)
+                )
+            if store is not None:
+                store.close()
+                print(f"✓ Loaded {aggregates['revenue'].count} transactions into: {sqlite_file}")
+            aggregates["enrichment"] = enrichment_index
 
-        enriched_count = sum(
-            1 for t in enriched_transactions if t.get("API_Match") is True
-        )
-        total_count = len(enriched_transactions)
+        if cprofiler:
+            cprofiler.disable()
+            os.makedirs(os.path.dirname(cprofile_file) or ".", exist_ok=True)
+            cprofiler.dump_stats(cprofile_file)
+
+        print(f"✓ Valid: {stats['final_count']} | Invalid: {stats['invalid']}")
 
-        rate = (enriched_count / total_count * 100) if total_count else 0
-        print(f"✓ Enriched {enriched_count}/{total_count} transactions ({rate:.1f}%)")
+        enrichment = aggregates["enrichment"]
+        rate = (enrichment.matched / enrichment.total * 100) if enrichment.total else 0
+        print(f"✓ Enriched {enrichment.matched}/{enrichment.total} transactions ({rate:.1f}%)")
+        print(f"✓ Saved to: {enriched_file}")
 
         # --------------------------------------------------
-        # [7/10] SAVE ENRICHED DATA
+        # [5/6] GENERATE REPORT
         # --------------------------------------------------
-        print("\n[7/10] Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        print("\n[5/6] Generating report...")
+        with profiler.stage("report"):
+            generate_sales_report(
+                None,
+                None,
+                output_file=REPORT_FILE,
+                aggregates=aggregates,
+            )
+        print(f"✓ Report saved to: {REPORT_FILE}")
+
+        if export_format:
+            with profiler.stage("export_tables"):
+                export_aggregate_tables(aggregates, EXPORT_DIR, export_format)
+            if incremental or workers > 1:
+                print("  (enriched rows are only exported by the serial pass)")
+            print(f"✓ Exported {export_format} tables to: {EXPORT_DIR}")
+
+        if sqlite_file and (incremental or workers > 1):
+            print("  (the SQLite store is only loaded by the serial pass)")
+
+        if profile:
+            profiler.write(
+                PROFILE_FILE,
+                workers=workers,
+                incremental=incremental,
+                offline=offline,
+            )
+            print(f"✓ Run profile saved to: {PROFILE_FILE}")
+        if cprofile_file:
+            print(f"✓ cProfile stats saved to: {cprofile_file}")
 
         # --------------------------------------------------
-        # [8/10] GENERATE REPORT
+        # [6/6] DONE
         # --------------------------------------------------
-        print("\n[8/10] Generating report...")
-        generate_sales_report(
-            valid_transactions,
-            enriched_transactions,
-            output_file="output/sales_report.txt",
+        print("\n[6/6] Process Complete!")
+        print("=" * 40)
+
+    except Exception as e:
+        print("\n❌ ERROR OCCURRED")
+        print(str(e))
+
+
+def batch_main(input_file=DATA_FILE, output_dir=BATCH_OUTPUT_DIR, scenarios=(),
+               per_region=False, enriched_file=None, api_url=PRODUCTS_URL,
+               offline=False, approximate=False, percentiles=False):
+    """
+    Non-interactive mode: parses and enriches the input once and writes one
+    report per filter scenario (see utils/batch.py)
+    """
+    try:
+        print("=" * 40)
+        print("SALES ANALYTICS SYSTEM (BATCH)")
+        print("=" * 40)
+
+        print("\n[1/3] Fetching product data from API in the background...")
+        catalog = CatalogFetch(api_url, offline=offline)
+
+        print(f"\n[2/3] Processing {input_file}...")
+        results = run_batch(
+            input_file,
+            scenarios,
+            output_dir,
+            catalog,
+            enriched_file=enriched_file,
+            per_region=per_region,
+            approximate=approximate,
+            percentiles=percentiles,
         )
-        print("✓ Report saved to: output/sales_report.txt")
 
-        # --------------------------------------------------
-        # [9/10] DONE
-        # --------------------------------------------------
-        print("\n[9/10] Process Complete!")
+        print(f"\n[3/3] Wrote {len(results)} reports to {output_dir}")
         print("=" * 40)
+        return results
+
+    except Exception as e:
+        print("\n❌ ERROR OCCURRED")
+        print(str(e))
+
+
+def sqlite_report_main(sqlite_file, output_file=REPORT_FILE):
+    """
+    Writes the report from a SQLite store loaded by an earlier --sqlite run,
+    without reading the sales file
+    """
+    try:
+        if not os.path.exists(sqlite_file):
+            print(f"Error: SQLite store '{sqlite_file}' not found.")
+            return
+
+        with SalesStore(sqlite_file) as store:
+            aggregates = store.aggregates()
+        generate_sales_report(None, None, output_file=output_file, aggregates=aggregates)
+
+    except Exception as e:
+        print("\n❌ ERROR OCCURRED")
+        print(str(e))
+
+
+def serve_main(input_file=DATA_FILE, host=SERVICE_HOST, port=SERVICE_PORT,
+               api_url=PRODUCTS_URL, offline=False):
+    """
+    Serves JSON queries over the input kept in memory until interrupted
+    (see utils/query_service.py)
+    """
+    try:
+        print("=" * 40)
+        print("SALES ANALYTICS SYSTEM (QUERY SERVICE)")
+        print("=" * 40)
+
+        catalog = CatalogFetch(api_url, offline=offline)
+        product_mapping = create_product_mapping(catalog.result())
+        print(f"✓ Fetched {len(product_mapping)} products")
+
+        service = QueryService(input_file, product_mapping)
+        stats = service.snapshot.stats
+        print(f"✓ Loaded {input_file}: {stats['final_count']} valid | {stats['invalid']} invalid")
+
+        server = make_server(service, host, port)
+        service.start()
+        print(f"✓ Serving on http://{host}:{server.server_port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping...")
+        finally:
+            server.server_close()
+            service.stop()
+
+    except Exception as e:
+        print("\n❌ ERROR OCCURRED")
+        print(str(e))
+
+
+def watch_main(input_file=DATA_FILE, api_url=PRODUCTS_URL, offline=False,
+               approximate=False, percentiles=False, compression=None,
+               interval=POLL_INTERVAL):
+    """
+    Long-running mode: keeps the catalog and aggregate state in memory and
+    rewrites the report whenever the input changes (see utils/watcher.py)
+    """
+    try:
+        print("=" * 40)
+        print("SALES ANALYTICS SYSTEM (WATCH)")
+        print("=" * 40)
+
+        catalog = CatalogFetch(api_url, offline=offline)
+        product_mapping = create_product_mapping(catalog.result())
+        print(f"✓ Fetched {len(product_mapping)} products")
+
+        watcher = SalesWatcher(
+            input_file,
+            product_mapping,
+            REPORT_FILE,
+            enriched_file=ENRICHED_FILE + COMPRESSED_SUFFIXES.get(compression, ""),
+            approximate=approximate,
+            percentiles=percentiles,
+            interval=interval,
+        )
+        print(f"✓ Watching {input_file}; report: {REPORT_FILE} (Ctrl+C to stop)")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("\nStopping...")
 
     except Exception as e:
         print("\n❌ ERROR OCCURRED")
@@ -129,4 +496,159 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="number of worker processes for parsing/aggregation (default: 1)",
+    )
+    parser.add_argument(
+        "--api-url", default=PRODUCTS_URL,
+        help="product catalog endpoint (e.g. a local stand-in server)",
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="use the cached product catalog only, no network access",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only process lines appended since the last run (checkpointed)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help=f"write per-stage timings and memory to {PROFILE_FILE}",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="with --profile, also record tracemalloc peaks (slower)",
+    )
+    parser.add_argument(
+        "--cprofile", metavar="FILE",
+        help="dump cProfile stats of the main processing pass to FILE",
+    )
+    parser.add_argument(
+        "--compress", choices=sorted(COMPRESSED_SUFFIXES),
+        help="write the enriched data compressed (zstd needs the zstandard package)",
+    )
+    parser.add_argument(
+        "--export", choices=sorted(EXPORT_FORMATS),
+        help=f"also export typed tables to {EXPORT_DIR} (arrow/parquet need pyarrow)",
+    )
+    parser.add_argument(
+        "--approximate", action="store_true",
+        help="count unique customers/products with HyperLogLog sketches (about ±2%%)",
+    )
+    parser.add_argument(
+        "--percentiles", action="store_true",
+        help="add order value percentiles per region and per date to the report",
+    )
+    parser.add_argument(
+        "--sqlite", metavar="FILE",
+        help="also load the enriched transactions into this SQLite database",
+    )
+    parser.add_argument(
+        "--report-from-sqlite", metavar="FILE",
+        help="only write the report, from a SQLite database loaded with --sqlite",
+    )
+    parser.add_argument(
+        "--no-parse-cache", action="store_true",
+        help="always re-parse the text file instead of using the binary cache",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="keep running and rewrite the report whenever the input file changes",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=POLL_INTERVAL,
+        help=f"seconds between input file checks in --watch mode (default: {POLL_INTERVAL})",
+    )
+    service = parser.add_argument_group("query service (JSON over HTTP)")
+    service.add_argument(
+        "--serve", action="store_true",
+        help="serve /summary, /regions, /products, /customers and /daily queries",
+    )
+    service.add_argument("--host", default=SERVICE_HOST, help=f"bind address (default: {SERVICE_HOST})")
+    service.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port (default: {SERVICE_PORT})")
+    batch = parser.add_argument_group("batch mode (no prompts, one report per scenario)")
+    batch.add_argument(
+        "--batch", action="store_true",
+        help="run the filter scenarios below instead of prompting",
+    )
+    batch.add_argument(
+        "--config", metavar="FILE",
+        help="JSON file with input, output_dir, per_region and scenarios",
+    )
+    batch.add_argument(
+        "--scenario", action="append", default=[], metavar="SPEC",
+        help='filter scenario "[name:]region=North,min=1000,max=5000" (repeatable)',
+    )
+    batch.add_argument(
+        "--per-region", action="store_true",
+        help="add one scenario per region found in the data",
+    )
+    batch.add_argument("--input", help=f"sales file (default: {DATA_FILE})")
+    batch.add_argument("--output-dir", help=f"report directory (default: {BATCH_OUTPUT_DIR})")
+    batch.add_argument("--enriched-file", help="also write the enriched data here")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch_main(
+            input_file=args.input or DATA_FILE,
+            api_url=args.api_url,
+            offline=args.offline,
+            approximate=args.approximate,
+            percentiles=args.percentiles,
+            compression=args.compress,
+            interval=args.interval,
+        )
+        raise SystemExit
+
+    if args.serve:
+        serve_main(
+            input_file=args.input or DATA_FILE,
+            host=args.host,
+            port=args.port,
+            api_url=args.api_url,
+            offline=args.offline,
+        )
+        raise SystemExit
+
+    if args.report_from_sqlite:
+        sqlite_report_main(args.report_from_sqlite)
+        raise SystemExit
+
+    if args.batch or args.config or args.scenario or args.per_region:
+        try:
+            config = load_batch_config(args.config) if args.config else {}
+            scenarios = config.get("scenarios", []) + [parse_scenario(s) for s in args.scenario]
+            check_scenario_names(scenarios)
+        except ValueError as e:
+            parser.error(str(e))
+
+        batch_main(
+            input_file=args.input or config.get("input", DATA_FILE),
+            output_dir=args.output_dir or config.get("output_dir", BATCH_OUTPUT_DIR),
+            scenarios=scenarios,
+            per_region=args.per_region or config.get("per_region", False),
+            enriched_file=args.enriched_file or config.get("enriched_file"),
+            api_url=args.api_url,
+            offline=args.offline,
+            approximate=args.approximate,
+            percentiles=args.percentiles,
+        )
+        raise SystemExit
+
+    main(
+        workers=args.workers,
+        api_url=args.api_url,
+        offline=args.offline,
+        incremental=args.incremental,
+        profile=args.profile,
+        trace_memory=args.trace_memory,
+        cprofile_file=args.cprofile,
+        parse_cache=not args.no_parse_cache,
+        compression=args.compress,
+        export_format=args.export,
+        approximate=args.approximate,
+        sqlite_file=args.sqlite,
+        percentiles=args.percentiles,
+    )
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate_sales_data import write_sales_file  # noqa: E402
+from utils.api_handler import EnrichmentIndex, iter_enriched_data  # noqa: E402
+from utils.data_handler import iter_valid_transactions  # noqa: E402
+from utils.data_processor import aggregate_transactions, default_accumulators  # noqa: E402
+from utils.file_handler import iter_sales_data, iter_transactions  # noqa: E402
+from utils.report_generator import generate_sales_report  # noqa: E402
+
+# ProductIDs of the generated data are P101 and up; leave some unmatched
+PRODUCT_MAPPING = {
+    pid: {"title": f"Product {pid}", "category": "misc", "brand": "Acme", "rating": 4.0}
+    for pid in range(101, 131)
+}
+
+
+class StubCatalog:
+    """
+    DummyJSON-style /products endpoint on localhost
+
+    Pages are served with skip/limit, a total and an ETag per page; a
+    matching If-None-Match gets 304. `requests` records (skip,
+    If-None-Match) for every GET; `max_limit` caps the page size like
+    DummyJSON does, and report_total=False sends a null total.
+    """
+
+    def __init__(self, count, max_limit=None):
+        self.max_limit = max_limit
+        self.report_total = True
+        self.products = []
+        self.requests = []
+        self.resize(count)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/products"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def resize(self, count):
+        self.products = [
+            {"id": i, "title": f"Product {i}", "category": "misc", "brand": "Acme", "rating": 4.0}
+            for i in range(1, count + 1)
+        ]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        catalog = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlsplit(self.path).query)
+                skip = int(query["skip"][0])
+                limit = int(query["limit"][0])
+                if catalog.max_limit is not None:
+                    limit = min(limit, catalog.max_limit)
+                page = catalog.products[skip:skip + limit]
+                etag = '"%s"' % hashlib.sha1(json.dumps(page).encode()).hexdigest()
+                catalog.requests.append((skip, self.headers.get("If-None-Match")))
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = json.dumps({
+                    "products": page,
+                    "total": len(catalog.products) if catalog.report_total else None,
+                    "skip": skip,
+                    "limit": limit
+                }).encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def catalog():
+    stub = StubCatalog(250)
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def sales_file(tmp_path):
+    path = tmp_path / "sales_data.txt"
+    write_sales_file(str(path), 3000, seed=7)
+    return str(path)
+
+
+@pytest.fixture
+def product_mapping():
+    return PRODUCT_MAPPING
+
+
+@pytest.fixture
+def serial_aggregate():
+    """
+    Runs the serial streaming pass over a file: (aggregates, stats)
+    """
+    def aggregate(filename):
+        stats = {}
+        index = EnrichmentIndex(PRODUCT_MAPPING)
+        transactions = iter_valid_transactions(
+            iter_transactions(iter_sales_data(filename)), stats=stats
+        )
+        aggregates = aggregate_transactions(
+            iter_enriched_data(transactions, index), default_accumulators()
+        )
+        aggregates["enrichment"] = index
+        return aggregates, stats
+
+    return aggregate
+
+
+@pytest.fixture
+def report_lines(tmp_path):
+    """
+    Writes the report of some aggregates: its lines but the timestamp
+    """
+    def lines(aggregates, name="report"):
+        path = tmp_path / f"{name}.txt"
+        generate_sales_report(None, None, output_file=str(path), aggregates=aggregates, verbose=False)
+        return [line for line in path.read_text(encoding="utf-8").splitlines() if "Generated:" not in line]
+
+    return lines
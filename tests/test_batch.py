@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from utils.batch import load_batch_config, parse_scenario, run_batch
+
+
+def _config(tmp_path, scenarios):
+    path = tmp_path / "batch.json"
+    path.write_text(json.dumps({"scenarios": scenarios}), encoding="utf-8")
+    return str(path)
+
+
+def test_config_scenarios_are_parsed(tmp_path):
+    config = load_batch_config(_config(tmp_path, [
+        {"name": "north", "region": "North", "min_amount": 1000},
+        {"region": "South", "max": "5000"},
+    ]))
+
+    assert config["scenarios"] == [
+        {"name": "north", "region": "North", "min_amount": 1000.0, "max_amount": None},
+        {"name": "South_-5000", "region": "South", "min_amount": None, "max_amount": 5000.0},
+    ]
+
+
+def test_unknown_config_key_names_the_scenario_and_key(tmp_path):
+    path = _config(tmp_path, [{"name": "north", "region": "North"}, {"name": "big", "minimum": 10}])
+
+    with pytest.raises(ValueError, match="Scenario 'big': unknown option 'minimum'"):
+        load_batch_config(path)
+
+
+def test_bad_amount_names_the_scenario(tmp_path):
+    with pytest.raises(ValueError, match="Scenario 'big': min_amount must be a number"):
+        load_batch_config(_config(tmp_path, [{"name": "big", "min_amount": "lots"}]))
+
+
+def test_duplicate_scenario_names_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate scenario name 'north'"):
+        load_batch_config(_config(tmp_path, [{"name": "north"}, {"name": "north", "region": "North"}]))
+
+
+def test_per_region_scenario_clashing_with_a_named_one_is_rejected(sales_file, tmp_path, product_mapping):
+    with pytest.raises(ValueError, match="Duplicate scenario name 'North'"):
+        run_batch(sales_file, [parse_scenario("North:min=1000")], str(tmp_path), product_mapping,
+                  per_region=True)
+
+
+def test_one_report_per_scenario(sales_file, tmp_path, product_mapping):
+    scenarios = [parse_scenario("all:"), parse_scenario("north:region=North,min=1000")]
+
+    results = run_batch(sales_file, scenarios, str(tmp_path / "reports"), product_mapping)
+
+    assert [scenario["name"] for scenario, _, _ in results] == ["all", "north"]
+    assert results[0][2] > results[1][2] > 0
+    for _, report_file, _ in results:
+        with open(report_file, encoding="utf-8") as file:
+            assert "SALES ANALYTICS REPORT" in file.read().upper()
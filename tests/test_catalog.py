@@ -0,0 +1,140 @@
+import json
+
+import pytest
+
+from utils import api_handler
+from utils.api_handler import fetch_all_products, fetch_catalog_pages
+
+from conftest import StubCatalog
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Failed requests are retried without sleeping
+    monkeypatch.setattr(api_handler, "FETCH_BACKOFF", 0)
+
+
+def _fetch(catalog, cache_file, log, **options):
+    return fetch_all_products(catalog.url, cache_file=str(cache_file), log=log.append, **options)
+
+
+def test_pages_through_the_whole_catalog(catalog):
+    products, pages, downloaded = fetch_catalog_pages(catalog.url, page_size=100)
+
+    assert [p["id"] for p in products] == list(range(1, 251))
+    assert [(page["skip"], page["count"]) for page in pages] == [(0, 100), (100, 100), (200, 50)]
+    assert downloaded == 3
+    assert sorted(skip for skip, _ in catalog.requests) == [0, 100, 200]
+
+
+def test_page_size_larger_than_catalog(catalog):
+    products, pages, _ = fetch_catalog_pages(catalog.url, page_size=1000)
+
+    assert len(products) == 250
+    assert len(pages) == 1
+
+
+@pytest.fixture
+def capped_catalog():
+    stub = StubCatalog(250, max_limit=30)
+    yield stub
+    stub.stop()
+
+
+def test_server_capped_page_size_leaves_no_gaps(capped_catalog, tmp_path):
+    products, pages, _ = fetch_catalog_pages(capped_catalog.url, page_size=100)
+
+    assert [p["id"] for p in products] == list(range(1, 251))
+    assert [page["skip"] for page in pages] == list(range(0, 250, 30))
+
+    # Revalidating the cached pages keeps the catalog whole
+    log = []
+    first = _fetch(capped_catalog, tmp_path / "catalog.json", log)
+    second = _fetch(capped_catalog, tmp_path / "catalog.json", log, ttl=0)
+    assert first == second == products
+
+
+def test_pages_through_a_catalog_without_total(catalog):
+    catalog.report_total = False
+
+    products, pages, _ = fetch_catalog_pages(catalog.url, page_size=100)
+
+    assert [p["id"] for p in products] == list(range(1, 251))
+    assert [page["skip"] for page in pages] == [0, 100, 200]
+
+
+def test_fresh_cache_is_used_without_network(catalog, tmp_path):
+    cache_file = tmp_path / "catalog.json"
+    log = []
+
+    first = _fetch(catalog, cache_file, log)
+    requests_made = len(catalog.requests)
+    second = _fetch(catalog, cache_file, log)
+
+    assert second == first
+    assert len(catalog.requests) == requests_made
+    assert log[-1].startswith("API Cache: Loaded 250 products")
+
+
+def test_expired_cache_is_revalidated_per_page(catalog, tmp_path):
+    cache_file = tmp_path / "catalog.json"
+    log = []
+
+    first = _fetch(catalog, cache_file, log)
+    catalog.requests.clear()
+    second = _fetch(catalog, cache_file, log, ttl=0)
+
+    assert second == first
+    assert log[-1] == "API Success: Catalog unchanged (250 products)"
+    # Every cached page is asked for with its ETag; the unconditional
+    # request past the last page finds no new products
+    conditional = sorted(skip for skip, etag in catalog.requests if etag)
+    assert conditional == [0, 100, 200]
+
+
+@pytest.mark.parametrize("new_count", [400, 120])
+def test_expired_cache_picks_up_a_resized_catalog(catalog, tmp_path, new_count):
+    cache_file = tmp_path / "catalog.json"
+    log = []
+
+    _fetch(catalog, cache_file, log)
+    catalog.resize(new_count)
+    products = _fetch(catalog, cache_file, log, ttl=0)
+
+    assert [p["id"] for p in products] == list(range(1, new_count + 1))
+    with open(cache_file, encoding="utf-8") as file:
+        assert len(json.load(file)["products"]) == new_count
+
+
+def test_stale_cache_is_served_when_the_api_is_down(catalog, tmp_path):
+    cache_file = tmp_path / "catalog.json"
+    log = []
+
+    first = _fetch(catalog, cache_file, log)
+    catalog.stop()
+    products = _fetch(catalog, cache_file, log, ttl=0)
+
+    assert products == first
+    assert log[-1] == "API Cache: Using stale catalog (250 products)"
+
+
+def test_api_down_without_cache_returns_empty(catalog, tmp_path):
+    catalog.stop()
+    log = []
+
+    assert _fetch(catalog, tmp_path / "catalog.json", log) == []
+    assert log[-1].startswith("API Failure:")
+
+
+def test_offline_reads_only_the_cache(catalog, tmp_path):
+    cache_file = tmp_path / "catalog.json"
+    log = []
+
+    assert _fetch(catalog, cache_file, log, offline=True) == []
+    assert catalog.requests == []
+
+    first = _fetch(catalog, cache_file, log)
+    catalog.requests.clear()
+
+    assert _fetch(catalog, cache_file, log, ttl=0, offline=True) == first
+    assert catalog.requests == []
@@ -0,0 +1,53 @@
+import pytest
+
+from utils import data_processor
+from utils.data_handler import validate_and_filter
+from utils.data_processor import aggregate_transactions, default_accumulators
+from utils.file_handler import iter_sales_data, parse_transactions
+
+pytest.importorskip("numpy")
+
+from utils.columnar import aggregate_columns, filter_columns  # noqa: E402
+
+SUMMARY_KEYS = ("total_input", "invalid", "filtered_by_region", "filtered_by_amount", "final_count")
+FILTERS = [(None, None, None), ("North", None, None), (None, 1000, 20000), ("East", 2000, None)]
+VIEWS = [
+    data_processor.calculate_total_revenue,
+    data_processor.region_wise_sales,
+    data_processor.top_selling_products,
+    data_processor.customer_analysis,
+    data_processor.daily_sales_trend,
+    data_processor.low_performing_products,
+    data_processor.order_value_percentiles,
+]
+
+
+@pytest.fixture
+def lines(sales_file):
+    return list(iter_sales_data(sales_file))
+
+
+@pytest.mark.parametrize("region, min_amount, max_amount", FILTERS)
+def test_filter_columns_matches_validate_and_filter(lines, region, min_amount, max_amount):
+    valid, _, summary = validate_and_filter(parse_transactions(lines), region, min_amount, max_amount)
+    columns, column_summary = filter_columns(
+        parse_transactions(lines, columnar=True), region, min_amount, max_amount
+    )
+
+    assert list(columns.iter_records()) == valid
+    for key in SUMMARY_KEYS:
+        assert column_summary[key] == summary[key]
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+@pytest.mark.parametrize("region, min_amount, max_amount", FILTERS)
+def test_aggregate_columns_matches_aggregate_transactions(lines, approximate,
+                                                          region, min_amount, max_amount):
+    valid, _, _ = validate_and_filter(parse_transactions(lines), region, min_amount, max_amount)
+    columns, _ = filter_columns(parse_transactions(lines, columnar=True), region, min_amount, max_amount)
+
+    expected = aggregate_transactions(valid, default_accumulators(approximate, percentiles=True))
+    aggregates = aggregate_columns(columns, approximate, percentiles=True)
+
+    for view in VIEWS:
+        assert view(None, aggregates=aggregates) == view(None, aggregates=expected), view.__name__
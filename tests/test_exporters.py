@@ -0,0 +1,94 @@
+import csv
+import os
+
+import pytest
+
+from utils.api_handler import EnrichmentIndex, iter_enriched_data
+from utils.exporters import (
+    ENRICHED_COLUMNS,
+    aggregate_tables,
+    enriched_row,
+    export_aggregate_tables,
+    export_enriched,
+    export_path,
+    open_exporter,
+)
+
+BASE = {"TransactionID": "T1", "Date": "2024-12-01", "ProductID": "P101",
+        "ProductName": "Widget", "Quantity": 2, "UnitPrice": 2.5,
+        "CustomerID": "C1", "Region": "North"}
+
+
+@pytest.fixture
+def enriched(product_mapping):
+    rows = [BASE, dict(BASE, TransactionID="T2", ProductID="P999", Quantity=1)]
+    return list(iter_enriched_data(rows, EnrichmentIndex(product_mapping)))
+
+
+def test_csv_export_of_enriched_rows(enriched, tmp_path):
+    path = str(tmp_path / "enriched.csv")
+    export_enriched(enriched, path, "csv")
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+
+    assert rows[0] == [name for name, _ in ENRICHED_COLUMNS]
+    assert rows[1] == ["T1", "2024-12-01", "P101", "Widget", "2", "2.5", "C1", "North",
+                       "misc", "Acme", "4.0", "True"]
+    # Unmatched products leave the API fields empty
+    assert rows[2][8:] == ["", "", "", "False"]
+
+
+def test_failed_export_keeps_no_file(tmp_path):
+    path = str(tmp_path / "enriched.csv")
+    with pytest.raises(RuntimeError):
+        with open_exporter("csv", path, ENRICHED_COLUMNS) as exporter:
+            exporter.write_rows([enriched_row(BASE)])
+            raise RuntimeError("boom")
+
+    assert not os.path.exists(path)
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        open_exporter("xlsx", str(tmp_path / "x.xlsx"), ENRICHED_COLUMNS)
+
+
+def test_aggregate_tables_export_as_csv(serial_aggregate, sales_file, tmp_path):
+    aggregates, _ = serial_aggregate(sales_file)
+    tables = aggregate_tables(aggregates)
+
+    files = export_aggregate_tables(aggregates, str(tmp_path), "csv")
+
+    assert files == [export_path(str(tmp_path), name, "csv") for name in tables]
+    for filename, (columns, rows) in zip(files, tables.values()):
+        with open(filename, newline="") as f:
+            written = list(csv.reader(f))
+        assert written[0] == [name for name, _ in columns]
+        assert len(written) == len(rows) + 1
+
+    region_rows = tables["region"][1]
+    assert sum(row[2] for row in region_rows) == sum(
+        data["transaction_count"] for data in aggregates["region"].regions.values()
+    )
+    assert sum(row[3] for row in region_rows) == pytest.approx(100)
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_typed_export_round_trips(enriched, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    path = export_path(str(tmp_path), "enriched", fmt)
+    export_enriched(enriched, path, fmt)
+
+    if fmt == "arrow":
+        with pa.OSFile(path, "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+    else:
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = pq.read_table(path)
+
+    assert table.schema.names == [name for name, _ in ENRICHED_COLUMNS]
+    assert table.column("Quantity").type == pa.int64()
+    assert table.column("API_Match").to_pylist() == [True, False]
+    assert table.to_pylist()[0] == dict(zip(table.schema.names, enriched_row(enriched[0])))
+    assert not os.path.exists(path + ".tmp")
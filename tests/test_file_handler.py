@@ -0,0 +1,66 @@
+import codecs
+
+from utils import file_handler
+from utils.file_handler import iter_sales_data, iter_sales_data_range, sniff_format
+
+HEADER = b"TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def _line(i, name):
+    return b"T%03d|2024-12-01|P101|%s|1|10.0|C1|North\n" % (i, name)
+
+
+def test_sniff_format():
+    assert sniff_format(codecs.BOM_UTF8 + HEADER) == ("utf-8-sig", "\n")
+    assert sniff_format("café\r".encode("cp1252")) == ("cp1252", "\r")
+    assert sniff_format("café\n".encode("utf-8")) == ("utf-8", "\n")
+
+
+def test_bad_bytes_fall_back_one_span_at_a_time(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(file_handler, "READ_BLOCK", 64)
+    monkeypatch.setattr(file_handler, "SNIFF_SIZE", 64)
+    plain = HEADER + b"".join(_line(i, b"Mouse") for i in range(3))
+    bad = _line(3, "Caf\xe9".encode("latin-1"))
+    # Valid utf-8 after the bad byte, split across a block boundary
+    good = b"".join(_line(i, "Café".encode("utf-8")) for i in range(4, 10))
+    path = tmp_path / "sales.txt"
+    path.write_bytes(plain + bad + good)
+
+    stats = {}
+    lines = list(iter_sales_data(str(path), stats))
+
+    assert len(lines) == 10
+    assert "|Café|" in lines[3]
+    assert all("|Café|" in line for line in lines[4:])
+    assert stats["encoding"] == "utf-8"
+    assert stats["replaced_bytes"] == 1
+    assert stats["fallback_at"] == len(plain) + bad.index(b"\xe9")
+    assert stats["bytes"] == path.stat().st_size
+    assert "1 bytes that are not valid utf-8" in capsys.readouterr().out
+
+
+def test_bom_and_clean_files_report_no_fallback(tmp_path, capsys):
+    path = tmp_path / "sales.txt"
+    path.write_bytes(codecs.BOM_UTF8 + HEADER + _line(1, "Café".encode("utf-8")) + b"\n  \n")
+
+    stats = {}
+    lines = list(iter_sales_data(str(path), stats))
+
+    assert lines == ["T001|2024-12-01|P101|Café|1|10.0|C1|North"]
+    assert stats["replaced_bytes"] == 0
+    assert "fallback_at" not in stats
+    assert "Warning" not in capsys.readouterr().out
+
+
+def test_ranges_split_the_file_into_its_lines(tmp_path):
+    body = b"".join(_line(i, "Caf\xe9".encode("cp1252")) for i in range(20))
+    path = tmp_path / "sales.txt"
+    path.write_bytes(HEADER + body)
+    middle = len(HEADER) + 7 * len(_line(0, b"Caf\xe9"))
+    end = path.stat().st_size
+
+    first = list(iter_sales_data_range(str(path), len(HEADER), middle))
+    second = list(iter_sales_data_range(str(path), middle, end))
+
+    assert first + second == list(iter_sales_data(str(path)))
+    assert len(first) == 7 and all("Café" in line for line in first + second)
@@ -0,0 +1,65 @@
+import pytest
+
+from utils.data_handler import FilterIndex, iter_valid_transactions, validate_and_filter
+from utils.file_handler import iter_sales_data, iter_transactions
+
+SUMMARY_KEYS = ["total_input", "invalid", "filtered_by_region", "filtered_by_amount", "final_count"]
+
+
+def _transactions(filename):
+    return list(iter_transactions(iter_sales_data(filename)))
+
+
+def _scan(transactions, region, min_amount, max_amount):
+    stats = {}
+    rows = list(iter_valid_transactions(
+        transactions, region=region, min_amount=min_amount, max_amount=max_amount, stats=stats
+    ))
+    return rows, stats
+
+
+@pytest.mark.parametrize("region", [None, "North", "East", "Nowhere"])
+@pytest.mark.parametrize("min_amount, max_amount", [
+    (None, None), (1000, None), (None, 5000), (2000, 20000), (5000, 5000), (20000, 2000)
+])
+def test_filter_index_matches_scanning_filter(sales_file, region, min_amount, max_amount):
+    transactions = _transactions(sales_file)
+    index = FilterIndex(iter_valid_transactions(transactions))
+
+    rows, counts = index.query(region, min_amount, max_amount)
+    expected, stats = _scan(transactions, region, min_amount, max_amount)
+
+    assert rows == expected
+    for key in ("filtered_by_region", "filtered_by_amount", "final_count"):
+        assert counts[key] == stats[key]
+
+
+def test_filter_index_keeps_nan_amounts_like_the_scan():
+    transactions = [
+        {"TransactionID": f"T{i}", "Date": "2024-12-01", "ProductID": "P101",
+         "ProductName": "Mouse", "Quantity": 1, "UnitPrice": price,
+         "CustomerID": "C1", "Region": "North"}
+        for i, price in enumerate([10.0, float("nan"), 500.0, 50.0])
+    ]
+    index = FilterIndex(iter_valid_transactions(transactions))
+
+    for bounds in [(20, None), (None, 100), (20, 100)]:
+        rows, _ = index.query(None, *bounds)
+        expected, _ = _scan(transactions, None, *bounds)
+        assert [tx["TransactionID"] for tx in rows] == [tx["TransactionID"] for tx in expected]
+
+
+def test_summary_holds_the_index_only_when_asked(sales_file):
+    transactions = _transactions(sales_file)
+
+    _, _, summary = validate_and_filter(transactions, "North")
+    assert list(summary) == SUMMARY_KEYS
+
+    valid, _, summary = validate_and_filter(transactions, "North", index=True)
+    index = summary.pop("index")
+    assert list(summary) == SUMMARY_KEYS
+
+    # Reusing the index gives the same result without validating again
+    again, _, reused = validate_and_filter(transactions, "North", index=index)
+    assert again == valid
+    assert reused == summary
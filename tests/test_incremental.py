@@ -0,0 +1,61 @@
+from utils.incremental import RecentIds, incremental_aggregate
+
+
+def test_serial_and_incremental_reports_match(sales_file, tmp_path, product_mapping,
+                                              serial_aggregate, report_lines):
+    serial, serial_stats = serial_aggregate(sales_file)
+    incremental, incremental_stats, _ = incremental_aggregate(
+        sales_file, product_mapping, checkpoint_file=str(tmp_path / "checkpoint.pkl")
+    )
+
+    assert report_lines(incremental, "incremental") == report_lines(serial, "serial")
+    for key in ("total_input", "invalid", "final_count"):
+        assert incremental_stats[key] == serial_stats[key]
+    assert incremental_stats["duplicates"] == 0
+
+
+def test_incremental_run_on_appended_lines_matches_a_full_run(sales_file, tmp_path, product_mapping,
+                                                              serial_aggregate, report_lines):
+    with open(sales_file, encoding="utf-8") as file:
+        lines = file.readlines()
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+
+    with open(sales_file, "w", encoding="utf-8") as file:
+        file.writelines(lines[:1200])
+    incremental_aggregate(sales_file, product_mapping, checkpoint_file=checkpoint)
+
+    with open(sales_file, "a", encoding="utf-8") as file:
+        file.writelines(lines[1200:])
+    incremental, stats, new_lines = incremental_aggregate(
+        sales_file, product_mapping, checkpoint_file=checkpoint
+    )
+
+    assert new_lines == sum(1 for line in lines[1200:] if line.strip())
+    assert report_lines(incremental, "incremental") == report_lines(
+        serial_aggregate(sales_file)[0], "serial"
+    )
+
+
+def test_redelivered_transactions_are_skipped(sales_file, tmp_path, product_mapping):
+    with open(sales_file, encoding="utf-8") as file:
+        lines = file.readlines()
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+
+    _, first, _ = incremental_aggregate(sales_file, product_mapping, checkpoint_file=checkpoint)
+    final_count = first["final_count"]
+    with open(sales_file, "a", encoding="utf-8") as file:
+        file.writelines(lines[1:101])
+    _, stats, _ = incremental_aggregate(sales_file, product_mapping, checkpoint_file=checkpoint)
+
+    assert stats["final_count"] == final_count
+    assert stats["duplicates"] > 0
+
+
+def test_recent_ids_keep_a_bounded_window():
+    ids = RecentIds(size=3)
+    for tid in ["T1", "T2", "T3", "T2", "T4"]:
+        ids.add(tid)
+
+    assert len(ids) == 3
+    assert "T1" not in ids
+    assert all(tid in ids for tid in ["T2", "T3", "T4"])
@@ -0,0 +1,22 @@
+import pytest
+
+from utils.instrumentation import PipelineProfiler, current_rss_kb
+
+
+@pytest.mark.skipif(current_rss_kb() is None, reason="needs /proc/self/statm")
+def test_stages_report_their_own_rss_change():
+    profiler = PipelineProfiler()
+
+    with profiler.stage("allocate"):
+        block = bytearray(64 << 20)
+        block[::4096] = b"x" * len(block[::4096])  # touch every page
+    with profiler.stage("idle"):
+        pass
+    rows = list(profiler.wrap("stream", range(10)))
+
+    stages = {stage["stage"]: stage for stage in profiler.profile()["stages"]}
+    assert stages["allocate"]["rss_delta_kb"] >= 60 << 10
+    assert stages["idle"]["rss_delta_kb"] < 1 << 10
+    assert stages["stream"]["rows_out"] == len(rows)
+    assert profiler.profile()["process_peak_rss_kb"] > 0
+    del block
@@ -0,0 +1,24 @@
+from utils.api_handler import EnrichmentIndex, format_enriched_line, iter_enriched_data
+from utils.output_writer import compile_line_format
+
+
+def test_enriched_line_writes_only_none_values_as_empty(product_mapping):
+    base = {"TransactionID": "T1", "Date": "2024-12-01", "ProductID": "P101",
+            "ProductName": "None", "Quantity": 1, "UnitPrice": 2.0,
+            "CustomerID": "C1", "Region": "North"}
+    rows = [base, dict(base, ProductID="P999", CustomerID=None)]
+
+    lines = [format_enriched_line(tx) for tx in iter_enriched_data(rows, EnrichmentIndex(product_mapping))]
+
+    assert lines == [
+        "T1|2024-12-01|P101|None|1|2.0|C1|North|misc|Acme|4.0|True\n",
+        "T1|2024-12-01|P999|None|1|2.0||North||||False\n",
+    ]
+
+
+def test_line_format_matches_str_of_each_value():
+    record = {"id": "T1", "qty": 3, "price": 2.5, "note": None, "ok": True}
+
+    assert compile_line_format(record)(record) == "T1|3|2.5|None|True\n"
+    assert compile_line_format(["qty"], delimiter=",")(record) == "3\n"
+    assert compile_line_format(["id", "qty"], delimiter="%", suffix=True)(record, "x%y") == "T1%3%x%y\n"
@@ -0,0 +1,28 @@
+from utils.data_handler import iter_valid_transactions
+from utils.file_handler import iter_sales_data, iter_transactions
+from utils.parallel import parallel_aggregate
+
+
+def test_parallel_report_matches_serial(sales_file, product_mapping, serial_aggregate, report_lines):
+    serial, serial_stats = serial_aggregate(sales_file)
+    parallel, parallel_stats = parallel_aggregate(sales_file, 3, product_mapping=product_mapping)
+
+    assert report_lines(parallel, "parallel") == report_lines(serial, "serial")
+    for key in ("total_input", "invalid", "final_count"):
+        assert parallel_stats[key] == serial_stats[key]
+
+
+def test_parallel_filters_match_serial(sales_file, product_mapping):
+    stats = {}
+    expected = list(iter_valid_transactions(
+        iter_transactions(iter_sales_data(sales_file)),
+        region="North", min_amount=1000, max_amount=20000, stats=stats
+    ))
+    aggregates, parallel_stats = parallel_aggregate(
+        sales_file, 2, region="North", min_amount=1000, max_amount=20000,
+        product_mapping=product_mapping
+    )
+
+    assert aggregates["revenue"].count == len(expected)
+    for key in ("invalid", "filtered_by_region", "filtered_by_amount", "final_count"):
+        assert parallel_stats[key] == stats[key]
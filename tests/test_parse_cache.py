@@ -0,0 +1,98 @@
+import json
+import os
+import struct
+
+from utils import parse_cache
+from utils.data_handler import FilterOptions
+from utils.file_handler import iter_sales_data
+from utils.parse_cache import CACHE_MAGIC, cache_file_for, cached_transactions, load_parse_cache
+from utils.schema_parser import RecordParser
+
+
+def _parse(filename):
+    parser = RecordParser()
+    return parser.parse(iter_sales_data(filename)), parser.rejections
+
+
+def _hash_calls(monkeypatch):
+    calls = []
+    file_hash = parse_cache._file_hash
+
+    def counted(filename):
+        calls.append(filename)
+        return file_hash(filename)
+
+    monkeypatch.setattr(parse_cache, "_file_hash", counted)
+    return calls
+
+
+def test_sidecar_replays_the_parsed_rows(sales_file):
+    rows, rejections = _parse(sales_file)
+    options = FilterOptions()
+    for tx in rows:
+        options.add(tx)
+
+    built = cached_transactions(sales_file)
+    loaded = load_parse_cache(sales_file)
+
+    for parsed in (built, loaded):
+        assert list(parsed) == rows
+        assert parsed.rejections == rejections
+        assert parsed.filter_options.as_dict() == options.as_dict()
+
+
+def test_touched_file_is_hashed_once(sales_file, monkeypatch):
+    cached_transactions(sales_file)
+    stat = os.stat(sales_file)
+    os.utime(sales_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    calls = _hash_calls(monkeypatch)
+
+    assert load_parse_cache(sales_file) is not None
+    assert load_parse_cache(sales_file) is not None
+    assert len(calls) == 1
+
+
+def test_changed_file_is_not_served_from_the_sidecar(sales_file):
+    cached_transactions(sales_file)
+    with open(sales_file, "a", encoding="utf-8") as file:
+        file.write("T9999999|2024-12-01|P101|Mouse|1|10|C1|North\n")
+
+    assert load_parse_cache(sales_file) is None
+    assert len(cached_transactions(sales_file)) == len(_parse(sales_file)[0])
+
+
+def _rewrite_header(cache_file, edit):
+    with open(cache_file, "rb") as file:
+        data = file.read()
+    start = len(CACHE_MAGIC) + 4
+    (header_len,) = struct.unpack("<I", data[len(CACHE_MAGIC):start])
+    header = json.loads(data[start:start + header_len])
+    edit(header)
+    text = json.dumps(header).encode("utf-8").ljust(header_len)
+    with open(cache_file, "wb") as file:
+        file.write(data[:start] + text[:header_len] + data[start + header_len:])
+
+
+def test_sidecar_with_missing_header_keys_is_rebuilt(sales_file):
+    cached_transactions(sales_file)
+    _rewrite_header(cache_file_for(sales_file), lambda header: header.pop("byteorder"))
+
+    assert load_parse_cache(sales_file) is None
+    assert list(cached_transactions(sales_file)) == _parse(sales_file)[0]
+
+
+def test_truncated_sidecar_is_rebuilt(sales_file):
+    cached_transactions(sales_file)
+    cache_file = cache_file_for(sales_file)
+    with open(cache_file, "r+b") as file:
+        file.truncate(os.path.getsize(cache_file) // 2)
+
+    assert load_parse_cache(sales_file) is None
+    assert list(cached_transactions(sales_file)) == _parse(sales_file)[0]
+
+
+def test_unpersisted_sidecar_is_not_kept(sales_file, tmp_path):
+    parsed = cached_transactions(sales_file, persist=False)
+
+    assert list(parsed) == _parse(sales_file)[0]
+    assert os.listdir(tmp_path) == [os.path.basename(sales_file)]
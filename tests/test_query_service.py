@@ -0,0 +1,63 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from utils import query_service
+from utils.query_service import QueryService, make_server
+
+
+@pytest.fixture
+def server(sales_file, product_mapping):
+    service = QueryService(sales_file, product_mapping)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, response.headers.get("X-Cache"), json.load(response)
+    except HTTPError as e:
+        with e:
+            return e.code, None, json.load(e)
+
+
+def test_views_are_served_and_cached(server):
+    status, cache, body = _get(f"{server}/regions?region=North")
+    assert (status, cache) == (200, "miss")
+    assert list(body["result"]) == ["North"]
+    assert body["filters"] == {"region": "North"}
+
+    assert _get(f"{server}/regions?region=North")[:2] == (200, "hit")
+    status, _, stats = _get(f"{server}/stats?ignored=1")
+    assert status == 200 and stats["response_cache"]["hits"] == 1
+
+
+@pytest.mark.parametrize("path", ["/nope", "/", "/regions/North"])
+def test_unknown_routes_are_404(server, path):
+    status, _, body = _get(server + path)
+    assert status == 404 and "Unknown view" in body["error"]
+
+
+@pytest.mark.parametrize("query", ["n=0", "n=x", "min_amount=lots", "colour=red"])
+def test_bad_parameters_are_400(server, query):
+    assert _get(f"{server}/products?{query}")[0] == 400
+
+
+def test_failing_views_are_500(server, monkeypatch, capsys):
+    def broken(aggregates, n):
+        return aggregates["no such accumulator"]
+
+    monkeypatch.setitem(query_service.VIEWS, "regions", broken)
+
+    status, _, body = _get(f"{server}/regions")
+    assert (status, body) == (500, {"error": "Internal server error"})
+    assert "GET /regions failed: KeyError" in capsys.readouterr().out
+    # The server keeps answering
+    assert _get(f"{server}/daily")[0] == 200
@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+
+from utils.data_handler import iter_valid_transactions
+from utils.data_processor import (
+    DailyAccumulator,
+    aggregate_transactions,
+    date_rollups,
+    find_peak_sales_day,
+    monthly_sales_trend,
+    revenue_between,
+    weekly_sales_trend,
+)
+from utils.file_handler import iter_sales_data, iter_transactions
+
+
+def _tx(day, amount, customer="C1"):
+    return {"Date": day, "Quantity": 1, "UnitPrice": amount, "CustomerID": customer}
+
+
+# 2024-12-01 is a Sunday: it closes ISO week 48, the 2nd opens week 49
+ROWS = [
+    _tx("2024-11-30", 10.0),
+    _tx("2024-12-01", 20.0, "C2"),
+    _tx("2024-12-02", 50.0),
+    _tx("2024-12-02", 5.0, "C3"),
+    _tx("2024-12-09", 55.0),
+    _tx("not a date", 99.0),
+]
+
+
+@pytest.fixture
+def aggregates():
+    return aggregate_transactions(ROWS, [DailyAccumulator()])
+
+
+def test_weeks_and_months_sum_their_days(aggregates):
+    weekly = weekly_sales_trend(None, aggregates=aggregates)
+    monthly = monthly_sales_trend(None, aggregates=aggregates)
+
+    assert list(weekly) == ["2024-W48", "2024-W49", "2024-W50"]
+    assert weekly["2024-W48"] == {
+        "start": "2024-11-30", "revenue": 30.0, "transaction_count": 2,
+        "days": 2, "unique_customers": 2
+    }
+    assert weekly["2024-W49"]["revenue"] == 55.0
+    assert list(monthly) == ["2024-11", "2024-12"]
+    assert monthly["2024-12"]["days"] == 3
+    assert monthly["2024-12"]["unique_customers"] == 3
+    assert date_rollups(None, aggregates).unparsed == ["not a date"]
+
+
+def test_range_totals_have_inclusive_bounds_of_any_type(aggregates):
+    rollups = date_rollups(None, aggregates)
+
+    assert rollups.revenue_between("2024-12-01", "2024-12-02") == 75.0
+    assert rollups.revenue_between(date(2024, 12, 2)) == 110.0
+    assert rollups.transactions_between(end=date(2024, 12, 1).toordinal()) == 2
+    assert rollups.revenue_between("2025-01-01") == 0.0
+    assert revenue_between(None, "2024-12-03", "2024-12-08", aggregates=aggregates) == 0.0
+    with pytest.raises(ValueError, match="Invalid date"):
+        rollups.revenue_between("12/01/2024")
+
+
+def test_peak_day_in_a_window(aggregates):
+    assert find_peak_sales_day(None, aggregates=aggregates) == ("not a date", 99.0, 1)
+    assert find_peak_sales_day(None, aggregates=aggregates, end="2024-12-08") == ("2024-12-02", 55.0, 2)
+    # Ties go to the earliest day
+    assert find_peak_sales_day(None, aggregates=aggregates, start="2024-12-02") == ("2024-12-02", 55.0, 2)
+    assert find_peak_sales_day(None, aggregates=aggregates, start="2024-12-03", end="2024-12-08") is None
+
+
+def test_rollups_are_rebuilt_only_after_new_rows(aggregates):
+    daily = aggregates["daily"]
+    rollups = daily.rollups()
+
+    assert daily.rollups() is rollups
+    daily.add(_tx("2024-12-02", 1.0), 1.0)
+    assert daily.rollups() is not rollups
+    assert daily.rollups().revenue_between("2024-12-02", "2024-12-02") == 56.0
+
+
+def test_rollups_match_the_daily_trend(sales_file):
+    rows = iter_valid_transactions(iter_transactions(iter_sales_data(sales_file)))
+    aggregates = aggregate_transactions(rows, [DailyAccumulator()])
+    daily = aggregates["daily"].daily
+    rollups = date_rollups(None, aggregates)
+
+    for period in (weekly_sales_trend, monthly_sales_trend):
+        trend = period(None, aggregates=aggregates)
+        assert sum(p["transaction_count"] for p in trend.values()) == rollups.transactions_between()
+        assert sum(p["days"] for p in trend.values()) == len(rollups)
+
+    assert rollups.revenue_between() == pytest.approx(
+        sum(data["revenue"] for day, data in daily.items() if day not in rollups.unparsed)
+    )
@@ -0,0 +1,36 @@
+from utils.schema_parser import RecordParser
+
+LINES = [
+    "T1|2024-12-01|P101|Wireless Mouse|2|1,250.5|C1|North",
+    "T2| 2024-12-01 |P101 |Wireless,Mouse|1,000|10|C1| North",
+    "T3|2024-12-02|P102|Keyboard|two|10|C2|South",
+    "T4|2024-12-02|P102|Keyboard|1|10|C2",
+]
+
+
+def test_parses_converts_and_counts_rejections():
+    parser = RecordParser(batch_size=2)
+    rows = parser.parse(LINES)
+
+    assert rows == [
+        {"TransactionID": "T1", "Date": "2024-12-01", "ProductID": "P101",
+         "ProductName": "Wireless Mouse", "Quantity": 2, "UnitPrice": 1250.5,
+         "CustomerID": "C1", "Region": "North"},
+        {"TransactionID": "T2", "Date": "2024-12-01", "ProductID": "P101",
+         "ProductName": "WirelessMouse", "Quantity": 1000, "UnitPrice": 10.0,
+         "CustomerID": "C1", "Region": "North"},
+    ]
+    assert parser.summary() == {
+        "parsed": 2,
+        "rejected": 2,
+        "rejections": {"invalid_quantity": 1, "wrong_field_count": 1}
+    }
+
+
+def test_repeated_values_are_shared_between_rows():
+    first, second = RecordParser().parse(LINES[:2])
+
+    # Differently padded spellings of one value map to one string
+    for field in ("Date", "ProductID", "CustomerID", "Region"):
+        assert first[field] is second[field]
+    assert list(first) == list(second)
@@ -0,0 +1,125 @@
+import math
+import random
+import sys
+import tracemalloc
+
+import pytest
+
+from utils.data_handler import iter_valid_transactions
+from utils.data_processor import (
+    CustomerAccumulator,
+    aggregate_transactions,
+    default_accumulators,
+    order_value_percentiles,
+)
+from utils.file_handler import iter_sales_data, iter_transactions
+from utils.sketches import QUANTILE_ACCURACY, HLL_PRECISION, HyperLogLog, QuantileSketch
+
+# Distinct values kept exactly before a sketch switches to registers
+EXACT_LIMIT = (1 << HLL_PRECISION) >> 6
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(7, 1.5) for _ in range(50000)]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.01, 0.25, 0.5, 0.95, 0.99, 1.0):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=QUANTILE_ACCURACY)
+
+
+def test_quantile_sketches_merge_like_one_sketch():
+    values = [i * 1.5 for i in range(-10, 2000)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 3 else right).add(value)
+
+    left.merge(right)
+
+    assert (left.bins, left.zero_count, left.count) == (whole.bins, whole.zero_count, whole.count)
+
+
+def test_non_finite_order_values_are_skipped():
+    sketch = QuantileSketch()
+    for value in (10.0, math.inf, math.nan, -math.inf, 0.0):
+        sketch.add(value)
+
+    assert (sketch.count, sketch.zero_count) == (3, 2)
+    assert sketch.quantile(1.0) == pytest.approx(10.0, rel=QUANTILE_ACCURACY)
+
+    rows = [
+        {"Region": "North", "Date": "2024-12-01", "Quantity": 1, "UnitPrice": math.inf},
+        {"Region": "North", "Date": "2024-12-01", "Quantity": 2, "UnitPrice": 50.0},
+        {"Region": "South", "Date": "2024-12-02", "Quantity": 1, "UnitPrice": math.nan},
+    ]
+    aggregates = aggregate_transactions(rows, default_accumulators(percentiles=True)[-1:])
+    percentiles = order_value_percentiles(None, aggregates=aggregates)
+
+    assert list(percentiles["regions"]) == ["North"]
+    assert percentiles["regions"]["North"][0.5] == pytest.approx(100, rel=QUANTILE_ACCURACY)
+    assert list(percentiles["daily"]) == ["2024-12-01"]
+
+
+def test_small_sets_are_counted_exactly_in_sorted_hashes():
+    sketch = HyperLogLog()
+    for i in range(EXACT_LIMIT):
+        sketch.add(f"C{i}")
+        sketch.add(f"C{i}")
+
+    assert sketch.exact and len(sketch) == EXACT_LIMIT
+    assert list(sketch.hashes) == sorted(sketch.hashes)
+    assert sys.getsizeof(sketch.hashes) < sys.getsizeof({f"C{i}" for i in range(EXACT_LIMIT)})
+
+    sketch.add("one more")
+    assert not sketch.exact
+    assert len(sketch) == pytest.approx(EXACT_LIMIT + 1, rel=0.05)
+
+
+@pytest.mark.parametrize("n", [1000, 20000, 200000])
+def test_distinct_counts_are_within_the_error_bound(n):
+    sketch = HyperLogLog()
+    for i in range(n):
+        sketch.add(f"C{i:07d}")
+
+    # Three standard errors
+    assert abs(len(sketch) - n) <= 3 * 1.04 / math.sqrt(1 << HLL_PRECISION) * n
+
+
+def test_merged_sketches_match_a_single_pass():
+    whole, left, right = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(EXACT_LIMIT + 20):
+        value = f"P{i}"
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+
+    left |= right
+
+    assert left.registers == whole.registers
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(precision=10))
+
+
+def test_approximate_customers_take_less_memory_than_sets(sales_file):
+    rows = list(iter_valid_transactions(iter_transactions(iter_sales_data(sales_file))))
+
+    def aggregate(approximate):
+        tracemalloc.start()
+        try:
+            customers = aggregate_transactions(rows, [CustomerAccumulator(approximate)])
+            return customers["customer"].customers, tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    exact, exact_memory = aggregate(False)
+    approximate, approximate_memory = aggregate(True)
+
+    assert approximate_memory < exact_memory
+    # Customers buy fewer distinct products than the exact limit
+    assert {cid: len(data["products"]) for cid, data in approximate.items()} == {
+        cid: len(data["products"]) for cid, data in exact.items()
+    }
@@ -0,0 +1,75 @@
+import pytest
+
+from utils import data_processor
+from utils.api_handler import EnrichmentIndex, iter_enriched_data
+from utils.data_handler import iter_valid_transactions
+from utils.data_processor import aggregate_transactions, default_accumulators
+from utils.file_handler import iter_sales_data, iter_transactions
+from utils.sqlite_store import SalesStore
+
+VIEWS = [
+    data_processor.region_wise_sales,
+    data_processor.top_selling_products,
+    data_processor.customer_analysis,
+    data_processor.daily_sales_trend,
+]
+# (region, start, end); date bounds are inclusive
+FILTERS = [(None, None, None), ("North", None, None), (None, "2024-12-05", "2024-12-20"),
+           ("East", "2024-12-10", None)]
+
+
+@pytest.fixture
+def enriched(sales_file, product_mapping):
+    rows = iter_valid_transactions(iter_transactions(iter_sales_data(sales_file)))
+    return list(iter_enriched_data(rows, EnrichmentIndex(product_mapping)))
+
+
+@pytest.fixture
+def store(enriched, tmp_path):
+    with SalesStore(str(tmp_path / "sales.db")) as store:
+        assert store.load(enriched) == len(enriched)
+        yield store
+
+
+def _matching(enriched, region, start, end):
+    return [
+        tx for tx in enriched
+        if (region is None or tx["Region"] == region)
+        and (start is None or tx["Date"] >= start)
+        and (end is None or tx["Date"] <= end)
+    ]
+
+
+@pytest.mark.parametrize("region, start, end", FILTERS)
+def test_queries_match_the_in_memory_views(store, enriched, region, start, end):
+    rows = _matching(enriched, region, start, end)
+    aggregates = aggregate_transactions(rows, default_accumulators())
+
+    assert store.count(region, start, end) == len(rows)
+    for view in VIEWS:
+        expected = view(None, aggregates=aggregates)
+        if view is data_processor.top_selling_products:
+            actual = store.top_selling_products(5, region, start, end)
+        else:
+            actual = getattr(store, view.__name__)(region, start, end)
+        assert actual == expected, view.__name__
+        if region is start is end is None:
+            assert view(None, store=store) == expected
+
+
+def test_report_from_the_store_matches_the_streaming_report(store, sales_file,
+                                                            serial_aggregate, report_lines):
+    aggregates, _ = serial_aggregate(sales_file)
+
+    assert report_lines(store.aggregates(), "sqlite") == report_lines(aggregates, "serial")
+
+
+def test_failed_load_keeps_the_previous_rows(store, enriched):
+    def failing(rows):
+        yield from rows
+        raise RuntimeError("input broke")
+
+    with pytest.raises(RuntimeError):
+        store.load(failing(enriched[:10]))
+
+    assert store.count() == len(enriched)
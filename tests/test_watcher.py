@@ -0,0 +1,75 @@
+import pytest
+
+from utils import incremental, watcher
+from utils.incremental import incremental_aggregate
+from utils.watcher import SalesWatcher
+
+
+@pytest.fixture
+def halves(sales_file):
+    with open(sales_file, encoding="utf-8") as file:
+        lines = file.readlines()
+    with open(sales_file, "w", encoding="utf-8") as file:
+        file.writelines(lines[:1500])
+    return lines[1500:]
+
+
+def _append(filename, lines):
+    with open(filename, "a", encoding="utf-8") as file:
+        file.writelines(lines)
+
+
+def _enriched_ids(filename):
+    with open(filename, encoding="utf-8") as file:
+        return [line.split("|", 1)[0] for line in file.readlines()[1:]]
+
+
+def test_failed_update_is_retried_without_duplicate_rows(sales_file, halves, tmp_path,
+                                                         product_mapping, monkeypatch, capsys):
+    enriched = str(tmp_path / "enriched.txt")
+    sales_watcher = SalesWatcher(
+        sales_file, product_mapping, str(tmp_path / "report.txt"),
+        checkpoint_file=str(tmp_path / "checkpoint.pkl"), enriched_file=enriched
+    )
+    sales_watcher._try_update(0)
+    first_rows = len(_enriched_ids(enriched))
+
+    # The rows are appended, then writing the report fails
+    report = watcher.generate_sales_report
+    monkeypatch.setattr(watcher, "generate_sales_report", lambda *a, **k: 1 / 0)
+    _append(sales_file, halves)
+    sales_watcher._try_update(0)
+
+    assert "failed: division by zero" in capsys.readouterr().out
+    assert len(_enriched_ids(enriched)) == first_rows
+
+    monkeypatch.setattr(watcher, "generate_sales_report", report)
+    sales_watcher._try_update(0)
+
+    ids = _enriched_ids(enriched)
+    assert len(ids) == sales_watcher.state["stats"]["final_count"] > first_rows
+    assert sales_watcher.state["stats"]["duplicates"] == 0
+    assert sales_watcher.updates == 2
+
+
+def test_failed_incremental_run_leaves_no_partial_rows(sales_file, halves, tmp_path,
+                                                       product_mapping, monkeypatch):
+    enriched = str(tmp_path / "enriched.txt")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+    incremental_aggregate(sales_file, product_mapping, checkpoint, enriched_file=enriched)
+    first_rows = _enriched_ids(enriched)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    save = incremental.save_checkpoint
+    monkeypatch.setattr(incremental, "save_checkpoint", fail)
+    _append(sales_file, halves)
+    with pytest.raises(OSError):
+        incremental_aggregate(sales_file, product_mapping, checkpoint, enriched_file=enriched)
+
+    assert _enriched_ids(enriched) == first_rows
+
+    monkeypatch.setattr(incremental, "save_checkpoint", save)
+    _, stats, _ = incremental_aggregate(sales_file, product_mapping, checkpoint, enriched_file=enriched)
+    assert len(_enriched_ids(enriched)) == stats["final_count"]
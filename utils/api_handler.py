@@ -1,30 +1,316 @@
+import json
+import math
+import os
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.output_writer import WRITE_BATCH, compile_line_format, open_output
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+CATALOG_CACHE_FILE = "data/product_catalog_cache.json"
+CATALOG_TTL = 24 * 60 * 60  # seconds
+
+PAGE_SIZE = 100
+FETCH_WORKERS = 8
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.5  # seconds, doubled on every retry
+FETCH_DEADLINE = 30  # seconds for the whole catalog
+REQUEST_TIMEOUT = 10  # seconds per request
+
+_session = None
+
+
+def get_session():
+    """
+    Returns the shared, connection-pooled HTTP session
+    """
+    global _session
+
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=FETCH_WORKERS, pool_maxsize=FETCH_WORKERS
+        )
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+
+    return _session
+
+
+def _get_page(session, url, skip, limit, deadline, headers=None):
+    """
+    GETs one catalog page, retrying connection errors, timeouts, 429 and 5xx
+    with exponential backoff until FETCH_RETRIES or the deadline runs out
+    """
+    params = {"limit": limit, "skip": skip}
+
+    for attempt in range(FETCH_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Catalog fetch deadline exceeded")
+
+        try:
+            response = session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=min(REQUEST_TIMEOUT, remaining)
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+            if attempt == FETCH_RETRIES:
+                raise
+
+            delay = FETCH_BACKOFF * (2 ** attempt)
+            time.sleep(max(0, min(delay, deadline - time.monotonic())))
+
+
+def _validators(page):
+    # Conditional request headers for a cached page
+    headers = {}
+    if page is not None:
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+    return headers
+
+
+def fetch_catalog_pages(url=PRODUCTS_URL, cache=None, page_size=PAGE_SIZE,
+                        workers=FETCH_WORKERS, deadline=FETCH_DEADLINE):
+    """
+    Fetches the full catalog page by page (skip/limit)
+
+    The first page tells us the catalog total and the page size the server
+    actually serves; the remaining pages are fetched concurrently over the
+    shared session. With the `cache` of a
+    previous fetch every cached page is revalidated with its own
+    ETag/Last-Modified and reused on 304 Not Modified. When the first page
+    is unchanged the page after the cached ones is requested
+    unconditionally, so its total shows whether the catalog grew.
+
+    Returns: (list of products, list of page dicts with skip, count, etag
+    and last_modified, number of pages downloaded rather than reused)
+    """
+    session = get_session()
+    deadline = time.monotonic() + deadline
+    cached_pages = {}
+    cached_products = {}
+    if cache is not None:
+        position = 0
+        for page in cache.get("pages", []):
+            cached_pages[page["skip"]] = page
+            cached_products[page["skip"]] = cache["products"][position:position + page["count"]]
+            position += page["count"]
+
+    def fetch(skip, conditional=True):
+        cached = cached_pages.get(skip) if conditional else None
+        response = _get_page(session, url, skip, page_size, deadline, _validators(cached))
+
+        if response.status_code == 304:
+            if cached is None:
+                raise requests.HTTPError("304 Not Modified without a cached page")
+            return cached, cached_products[skip], None
+
+        response.raise_for_status()
+        data = response.json()
+        products = data.get("products", [])
+        page = {
+            "skip": skip,
+            "count": len(products),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        return page, products, data.get("total", skip + len(products))
+
+    results = {0: fetch(0)}
+    total = results[0][2]
+    if total is None and cached_pages:
+        last = max(cached_pages)
+        probe = last + cached_pages[last]["count"]
+        results[probe] = fetch(probe, conditional=False)
+        total = results[probe][2]
+    if total is None:
+        # No total to go by: page on until a page comes back empty
+        total = math.inf
+
+    # Step by the size of the first page: the server may cap `limit`
+    step = results[0][0]["count"]
+    skips = [
+        skip for skip in (range(step, total, step) if step and total != math.inf else [])
+        if skip not in results
+    ]
+
+    if skips:
+        with ThreadPoolExecutor(max_workers=min(workers, len(skips))) as pool:
+            for skip, result in zip(skips, pool.map(fetch, skips)):
+                results[skip] = result
+
+    # Pages are chained by their actual sizes; a short page leaves a gap
+    # that is fetched from the running offset
+    products = []
+    pages = []
+    downloaded = 0
+    skip = 0
+    while skip < total:
+        if skip not in results:
+            results[skip] = fetch(skip)
+        page, page_products, page_total = results[skip]
+        if not page_products:
+            break
+        products.extend(page_products)
+        pages.append(page)
+        downloaded += page_total is not None
+        skip += len(page_products)
+
+    return products, pages, downloaded
+
+
+def load_catalog_cache(cache_file=CATALOG_CACHE_FILE, log=print):
+    """
+    Loads the on-disk product catalog cache
+
+    Returns: dict with url, products, pages (see fetch_catalog_pages) and
+    fetched_at, or None
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log(f"Cache Warning: ignoring unreadable cache {cache_file}: {e}")
+        return None
+
+    if not isinstance(cache, dict) or not isinstance(cache.get("products"), list):
+        return None
+
+    return cache
+
+
+def save_catalog_cache(cache, cache_file=CATALOG_CACHE_FILE, log=print):
+    """
+    Writes the product catalog cache atomically (temp file + rename)
+    """
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_file = cache_file + ".tmp"
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        log(f"Cache Warning: could not write {cache_file}: {e}")
+
+
 def fetch_product_data():
     """
     Placeholder for external API integration.
     """
     return {}
-import requests
 
-def fetch_all_products():
+
+def fetch_all_products(url=PRODUCTS_URL, cache_file=CATALOG_CACHE_FILE,
+                       ttl=CATALOG_TTL, offline=False, log=print):
     """
     Fetches all products from DummyJSON API
+
+    The catalog is cached on disk. A fresh cache (younger than `ttl` seconds)
+    is used without any network call; an expired one is revalidated page by
+    page with ETag/Last-Modified. If the API is unreachable the cached catalog is
+    served stale. With offline=True only the cache is used.
+
+    The catalog is paged through with skip/limit (see fetch_catalog_pages).
+
+    Pass cache_file=None to disable caching, or a different url to point
+    at a local stand-in server. Status messages go to `log`.
     """
-    url = "https://dummyjson.com/products?limit=100"
+    cache = load_catalog_cache(cache_file, log) if cache_file else None
+
+    # A cache written for another endpoint is only good enough offline
+    if cache is not None and not offline and cache.get("url", url) != url:
+        cache = None
+
+    if cache is not None:
+        age = time.time() - cache.get("fetched_at", 0)
+        if offline or age < ttl:
+            products = cache["products"]
+            log(f"API Cache: Loaded {len(products)} products ({age:.0f}s old)")
+            return products
+
+    if offline:
+        log("API Cache: No cached catalog available offline")
+        return []
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        products, pages, downloaded = fetch_catalog_pages(url, cache=cache)
 
-        data = response.json()
-        products = data.get("products", [])
+        if downloaded:
+            log(f"API Success: Fetched {len(products)} products")
+        else:
+            log(f"API Success: Catalog unchanged ({len(products)} products)")
+
+        if cache_file:
+            save_catalog_cache({
+                "url": url,
+                "products": products,
+                "pages": pages,
+                "fetched_at": time.time()
+            }, cache_file, log)
 
-        print(f"API Success: Fetched {len(products)} products")
         return products
 
     except Exception as e:
-        print(f"API Failure: {e}")
+        log(f"API Failure: {e}")
+
+        if cache is not None:
+            log(f"API Cache: Using stale catalog ({len(cache['products'])} products)")
+            return cache["products"]
+
         return []
 
+class CatalogFetch:
+    """
+    Runs fetch_all_products in a background thread
+
+    Start it before local work that doesn't need the catalog; result()
+    waits for it. Status messages are held back and printed by result(), so
+    they don't interleave with the caller's output. Failures behave exactly
+    as in fetch_all_products (stale cache or an empty catalog).
+    """
+
+    def __init__(self, url=PRODUCTS_URL, **options):
+        self.messages = []
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-fetch")
+        self._future = executor.submit(
+            fetch_all_products, url, log=self.messages.append, **options
+        )
+        executor.shutdown(wait=False)
+
+    def done(self):
+        return self._future.done()
+
+    def result(self):
+        """
+        Returns: list of products (blocks until the fetch completes)
+        """
+        try:
+            return self._future.result()
+        finally:
+            for message in self.messages:
+                print(message)
+            self.messages.clear()
+
+
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to product info
@@ -43,58 +329,239 @@ def create_product_mapping(api_products):
 
     return product_mapping
 
-def enrich_sales_data(transactions, product_mapping):
-    enriched = []
+ENRICHED_HEADERS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region",
+    "API_Category", "API_Brand", "API_Rating", "API_Match"
+]
+BASE_HEADERS = ENRICHED_HEADERS[:8]
+API_HEADERS = ENRICHED_HEADERS[8:]
 
-    for t in transactions:
-        record = t.copy()
-        product_id = t.get("ProductID", "")
 
-        # ✅ Extract numeric ID (P101 → 101)
-        try:
-            numeric_id = int("".join(filter(str.isdigit, product_id)))
-        except Exception:
-            numeric_id = None
+ENRICHED_HEADER_LINE = "|".join(ENRICHED_HEADERS) + "\n"
+
+
+def _format_field(value):
+    return "" if value is None else str(value)
+
+
+# Base columns of a parsed record followed by the entry's pre-formatted
+# API columns, built in one f-string
+_format_enriched_line = compile_line_format(BASE_HEADERS, suffix=True)
+
 
-        api_product = product_mapping.get(numeric_id)
+def format_enriched_line(tx):
+    """
+    Returns the pipe-delimited output line for an enriched transaction
+    """
+    if isinstance(tx, EnrichedTransaction):
+        # Missing/None values are written as empty fields on the slow path;
+        # the entry's suffix already has them empty
+        if None not in tx.tx.values():
+            try:
+                return _format_enriched_line(tx.tx, tx.entry.suffix)
+            except KeyError:
+                pass
+
+    return "|".join(_format_field(tx.get(h)) for h in ENRICHED_HEADERS) + "\n"
 
-        if api_product:
-            record["API_Category"] = api_product.get("category")
-            record["API_Brand"] = api_product.get("brand")
-            record["API_Rating"] = api_product.get("rating")
-            record["API_Match"] = True
+
+class EnrichmentEntry:
+    """
+    Enrichment for one distinct ProductID, shared by all of its rows
+    """
+    __slots__ = ("fields", "matched", "suffix")
+
+    def __init__(self, api_product):
+        self.matched = bool(api_product)
+
+        if self.matched:
+            self.fields = {
+                "API_Category": api_product.get("category"),
+                "API_Brand": api_product.get("brand"),
+                "API_Rating": api_product.get("rating"),
+                "API_Match": True
+            }
         else:
-            record["API_Category"] = None
-            record["API_Brand"] = None
-            record["API_Rating"] = None
-            record["API_Match"] = False
+            self.fields = {
+                "API_Category": None,
+                "API_Brand": None,
+                "API_Rating": None,
+                "API_Match": False
+            }
 
-        enriched.append(record)
+        # Pre-formatted API columns for save_enriched_data
+        self.suffix = "|".join(_format_field(self.fields[h]) for h in API_HEADERS)
 
-    return enriched
 
+class EnrichedTransaction(Mapping):
+    """
+    Read-only view of a transaction plus its shared enrichment entry
 
-def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt"):
+    Behaves like the enriched dict it replaces without copying the record.
     """
-    Saves enriched transactions back to file
+    __slots__ = ("tx", "entry")
+
+    def __init__(self, tx, entry):
+        self.tx = tx
+        self.entry = entry
+
+    def __getitem__(self, key):
+        fields = self.entry.fields
+        if key in fields:
+            return fields[key]
+        return self.tx[key]
+
+    def __iter__(self):
+        yield from self.tx
+        yield from self.entry.fields
+
+    def __len__(self):
+        return len(self.tx) + len(self.entry.fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        return dict(self)
+
+
+class EnrichmentIndex:
     """
+    Memoized ProductID -> enrichment lookup
 
-    headers = [
-        "TransactionID", "Date", "ProductID", "ProductName",
-        "Quantity", "UnitPrice", "CustomerID", "Region",
-        "API_Category", "API_Brand", "API_Rating", "API_Match"
-    ]
+    Each distinct ProductID is parsed and matched once (misses included),
+    and per-ID row counts are kept as rows are enriched. It exposes the same
+    total/matched/failed_counts/merge interface as EnrichmentAccumulator, so
+    it can stand in as the "enrichment" aggregate.
+    """
+    name = "enrichment"
+
+    def __init__(self, product_mapping):
+        self.product_mapping = product_mapping
+        self.entries = {}
+        self.counts = {}
+
+    def __getstate__(self):
+        # The catalog is not shipped back from worker processes
+        state = self.__dict__.copy()
+        state["product_mapping"] = None
+        return state
+
+    def lookup(self, product_id):
+        entry = self.entries.get(product_id)
+
+        if entry is None:
+            # ✅ Extract numeric ID (P101 → 101)
+            try:
+                numeric_id = int("".join(filter(str.isdigit, product_id)))
+            except Exception:
+                numeric_id = None
+
+            entry = EnrichmentEntry(self.product_mapping.get(numeric_id))
+            self.entries[product_id] = entry
+
+        return entry
+
+    def enrich(self, tx):
+        product_id = tx.get("ProductID", "")
+        self.counts[product_id] = self.counts.get(product_id, 0) + 1
+        return EnrichedTransaction(tx, self.lookup(product_id))
+
+    def add(self, tx, amount):
+        """
+        Counts a row without building its enriched view, so the index can
+        be plugged into aggregate_transactions as an accumulator
+        """
+        product_id = tx.get("ProductID", "")
+        self.lookup(product_id)
+        self.counts[product_id] = self.counts.get(product_id, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def matched(self):
+        return sum(
+            count for pid, count in self.counts.items()
+            if self.entries[pid].matched
+        )
+
+    @property
+    def failed_counts(self):
+        return {
+            pid: count for pid, count in self.counts.items()
+            if not self.entries[pid].matched
+        }
+
+    def merge(self, other):
+        for pid, entry in other.entries.items():
+            self.entries.setdefault(pid, entry)
+        for pid, count in other.counts.items():
+            self.counts[pid] = self.counts.get(pid, 0) + count
+
+
+def iter_enriched_data(transactions, product_mapping):
+    """
+    Streams transactions enriched with API product info
 
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write("|".join(headers) + "\n")
+    product_mapping may be a plain mapping or an EnrichmentIndex; records are
+    yielded as EnrichedTransaction views rather than copies.
+    """
+    if isinstance(product_mapping, EnrichmentIndex):
+        index = product_mapping
+    else:
+        index = EnrichmentIndex(product_mapping)
+
+    enrich = index.enrich
+    for t in transactions:
+        yield enrich(t)
+
+
+def enrich_sales_data(transactions, product_mapping):
+    return list(iter_enriched_data(transactions, product_mapping))
+
+
+def iter_save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt",
+                            header=True, verbose=True, append=False, compression=None):
+    """
+    Writes enriched transactions to file as they stream through
 
+    Yields each transaction unchanged so it can be aggregated in the same pass.
+    Lines are written in batches and the file only replaces `filename` once
+    complete (see utils/output_writer.py); compression ("gzip"/"zstd", or
+    from a .gz/.zst suffix) is optional. With append=True rows are added to
+    an existing file in place (the header is only written if it is empty).
+    """
+
+    write_header = header and not (
+        append and os.path.exists(filename) and os.path.getsize(filename) > 0
+    )
+
+    with open_output(filename, compression=compression, append=append) as file:
+        if write_header:
+            file.write(ENRICHED_HEADER_LINE)
+
+        batch = []
         for tx in enriched_transactions:
-            row = []
-            for h in headers:
-                value = tx.get(h)
-                row.append("" if value is None else str(value))
+            batch.append(format_enriched_line(tx))
+            if len(batch) >= WRITE_BATCH:
+                file.writelines(batch)
+                batch.clear()
+            yield tx
+
+        file.writelines(batch)
 
-            file.write("|".join(row) + "\n")
+    if verbose:
+        print(f"Enriched data saved to {filename}")
 
-    print(f"Enriched data saved to {filename}")
 
+def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt",
+                       compression=None):
+    """
+    Saves enriched transactions back to file
+    """
+
+    for _ in iter_save_enriched_data(enriched_transactions, filename, compression=compression):
+        pass
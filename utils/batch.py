@@ -0,0 +1,208 @@
+import json
+import os
+import re
+
+from utils.file_handler import iter_sales_data, iter_transactions, load_transactions
+from utils.data_handler import FilterIndex, iter_valid_transactions
+from utils.api_handler import (
+    CatalogFetch,
+    EnrichmentIndex,
+    create_product_mapping,
+    iter_enriched_data,
+    iter_save_enriched_data
+)
+from utils.data_processor import aggregate_transactions, default_accumulators
+from utils.report_generator import generate_sales_report
+
+# Keys accepted in --scenario specs ("name:region=North,min=1000")
+SCENARIO_KEYS = {
+    "region": "region",
+    "min": "min_amount",
+    "min_amount": "min_amount",
+    "max": "max_amount",
+    "max_amount": "max_amount"
+}
+
+
+def _amount(value, key, name):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Scenario '{name or '?'}': {key} must be a number, not {value!r}") from None
+
+
+def _scenario(name=None, region=None, min_amount=None, max_amount=None):
+    scenario = {
+        "region": region or None,
+        "min_amount": _amount(min_amount, "min_amount", name),
+        "max_amount": _amount(max_amount, "max_amount", name)
+    }
+
+    if not name:
+        parts = []
+        if scenario["region"]:
+            parts.append(scenario["region"])
+        if scenario["min_amount"] is not None or scenario["max_amount"] is not None:
+            low = "" if scenario["min_amount"] is None else f"{scenario['min_amount']:g}"
+            high = "" if scenario["max_amount"] is None else f"{scenario['max_amount']:g}"
+            parts.append(f"{low}-{high}")
+        name = "_".join(parts) or "all"
+
+    scenario["name"] = name
+    return scenario
+
+
+def parse_scenario(spec):
+    """
+    Parses a "[name:]key=value,..." scenario spec
+
+    Keys: region, min (min_amount), max (max_amount).
+    e.g. "north_big:region=North,min=10000" or "region=South"
+    """
+    name = None
+    if ":" in spec:
+        name, spec = spec.split(":", 1)
+
+    options = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, sep, value = item.partition("=")
+        key = key.strip().lower()
+        if not sep or key not in SCENARIO_KEYS:
+            raise ValueError(f"Invalid scenario option '{item}' (use region=, min=, max=)")
+        options[SCENARIO_KEYS[key]] = value.strip()
+
+    return _scenario(name.strip() if name else None, **options)
+
+
+def _config_scenario(position, item):
+    if not isinstance(item, dict):
+        raise ValueError(f"Scenario #{position}: expected an object, not {item!r}")
+
+    label = item.get("name") or f"#{position}"
+    options = {}
+    for key, value in item.items():
+        if key == "name":
+            options["name"] = value
+        elif key in SCENARIO_KEYS:
+            options[SCENARIO_KEYS[key]] = value
+        else:
+            raise ValueError(
+                f"Scenario '{label}': unknown option '{key}' "
+                f"(use name, region, min_amount, max_amount)"
+            )
+
+    return _scenario(**options)
+
+
+def check_scenario_names(scenarios, output_dir=""):
+    """
+    Raises ValueError if two scenarios would write the same report
+    """
+    seen = {}
+    for scenario in scenarios:
+        name = scenario["name"]
+        report_file = report_file_for(output_dir, name)
+        if report_file in seen:
+            other = seen[report_file]
+            clash = "" if other == name else f" (same report file as '{other}')"
+            raise ValueError(f"Duplicate scenario name '{name}'{clash}")
+        seen[report_file] = name
+
+
+def load_batch_config(config_file):
+    """
+    Reads a JSON batch config:
+
+        {"input": "data/sales_data.txt", "output_dir": "output/reports",
+         "per_region": false,
+         "scenarios": [{"name": "north", "region": "North", "min_amount": 1000}]}
+
+    Scenario keys are name, region, min_amount and max_amount (or min/max).
+
+    Returns: dict with the settings and parsed scenarios
+    Raises: ValueError naming the scenario with an unknown key or a bad
+    amount, or a duplicate name
+    """
+    with open(config_file, "r", encoding="utf-8") as file:
+        config = json.load(file)
+
+    config["scenarios"] = [
+        _config_scenario(position, item)
+        for position, item in enumerate(config.get("scenarios", []), 1)
+    ]
+    check_scenario_names(config["scenarios"])
+    return config
+
+
+def report_file_for(output_dir, name):
+    return os.path.join(output_dir, re.sub(r"[^\w.-]+", "_", name) + ".txt")
+
+
+def run_batch(input_file, scenarios, output_dir, product_mapping,
+              enriched_file=None, per_region=False, approximate=False,
+              percentiles=False):
+    """
+    Parses, validates and enriches `input_file` once, then writes one report
+    per filter scenario from the shared in-memory data
+
+    per_region=True adds one scenario per region found in the data (rows
+    with a blank region are only in unfiltered reports).
+    approximate=True counts distinct customers/products with HyperLogLog;
+    percentiles=True adds order value percentiles to the reports.
+    `product_mapping` may be a CatalogFetch still in progress; it is only
+    waited for once the file has been parsed and validated.
+
+    Returns: list of (scenario, report file, final row count)
+    Raises: ValueError if two scenarios have the same name
+    """
+    parsed = load_transactions(input_file)
+    if parsed is None:
+        parsed = iter_transactions(iter_sales_data(input_file))
+
+    stats = {}
+    index = FilterIndex(iter_valid_transactions(parsed, stats=stats))
+    print(f"✓ Valid: {stats['final_count']} | Invalid: {stats['invalid']}")
+
+    if isinstance(product_mapping, CatalogFetch):
+        product_mapping = create_product_mapping(product_mapping.result())
+        print(f"✓ Fetched {len(product_mapping)} products")
+
+    if enriched_file:
+        enriched = iter_save_enriched_data(
+            iter_enriched_data(index.transactions, product_mapping),
+            enriched_file,
+            verbose=False
+        )
+        for _ in enriched:
+            pass
+        print(f"✓ Saved enriched data to: {enriched_file}")
+
+    scenarios = list(scenarios)
+    if per_region:
+        scenarios.extend(_scenario(region=region) for region in index.regions if region)
+    if not scenarios:
+        scenarios.append(_scenario())
+    check_scenario_names(scenarios, output_dir)
+
+    results = []
+    for scenario in scenarios:
+        rows, counts = index.query(
+            scenario["region"], scenario["min_amount"], scenario["max_amount"]
+        )
+
+        # Match counts come from the enrichment index acting as an
+        # accumulator, so no enriched views are built per scenario
+        accumulators = (
+            default_accumulators(approximate, percentiles) + [EnrichmentIndex(product_mapping)]
+        )
+        aggregates = aggregate_transactions(rows, accumulators)
+
+        report_file = report_file_for(output_dir, scenario["name"])
+        generate_sales_report(None, None, output_file=report_file, aggregates=aggregates)
+
+        print(f"✓ {scenario['name']}: {counts['final_count']} transactions -> {report_file}")
+        results.append((scenario, report_file, counts["final_count"]))
+
+    return results
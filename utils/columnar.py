@@ -0,0 +1,444 @@
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from utils.data_processor import (
+    RevenueAccumulator,
+    RegionAccumulator,
+    ProductAccumulator,
+    CustomerAccumulator,
+    DailyAccumulator,
+    OrderValueAccumulator
+)
+from utils.schema_parser import RecordParser
+from utils.sketches import HLL_PRECISION, HyperLogLog, QuantileSketch, hash64
+
+CATEGORICAL_FIELDS = ["Date", "ProductID", "ProductName", "CustomerID", "Region"]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Columnar mode requires numpy (pip install numpy)")
+
+
+class Categorical:
+    """
+    Integer-coded column: codes index into a list of distinct values
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, mask):
+        return Categorical(self.codes[mask], self.categories)
+
+    def code_of(self, value):
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return -1
+
+
+class TransactionColumns:
+    """
+    Columnar transaction store backed by NumPy arrays
+    """
+
+    def __init__(self, transaction_ids, quantity, unit_price, columns):
+        self.transaction_ids = transaction_ids
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.amount = quantity * unit_price
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def take(self, mask):
+        """
+        Returns a new store holding only the rows selected by mask
+        """
+        return TransactionColumns(
+            self.transaction_ids[mask],
+            self.quantity[mask],
+            self.unit_price[mask],
+            {name: col.take(mask) for name, col in self.columns.items()}
+        )
+
+    def iter_records(self):
+        """
+        Yields rows as transaction dictionaries (same shape as the dict path)
+        """
+        decoded = {
+            name: [col.categories[c] for c in col.codes.tolist()]
+            for name, col in self.columns.items()
+        }
+        quantities = self.quantity.tolist()
+        prices = self.unit_price.tolist()
+
+        for i, tid in enumerate(self.transaction_ids.tolist()):
+            yield {
+                "TransactionID": tid,
+                "Date": decoded["Date"][i],
+                "ProductID": decoded["ProductID"][i],
+                "ProductName": decoded["ProductName"][i],
+                "Quantity": quantities[i],
+                "UnitPrice": prices[i],
+                "CustomerID": decoded["CustomerID"][i],
+                "Region": decoded["Region"][i]
+            }
+
+
+class _Codes(dict):
+    """
+    Category codes: looking up a missing value gives it the next code
+    """
+
+    def __missing__(self, value):
+        code = self[value] = len(self)
+        return code
+
+
+def build_columns(raw_lines, parser=None):
+    """
+    Parses raw lines straight into a TransactionColumns store
+
+    Lines go through the same RecordParser as the dict path, one column
+    batch at a time, so rejects are counted the same way. Pass a
+    RecordParser to read its rejection counters afterwards.
+    """
+    _require_numpy()
+
+    if parser is None:
+        parser = RecordParser(interned=())
+
+    fields = [name for name, _ in parser.schema]
+    positions = [fields.index(name) for name in CATEGORICAL_FIELDS]
+    ids_at = fields.index("TransactionID")
+    quantity_at = fields.index("Quantity")
+    price_at = fields.index("UnitPrice")
+
+    transaction_ids = []
+    quantities = []
+    prices = []
+    codes = {name: [] for name in CATEGORICAL_FIELDS}
+    index = {name: _Codes() for name in CATEGORICAL_FIELDS}
+
+    for batch in parser.iter_columns(raw_lines):
+        transaction_ids.extend(batch[ids_at])
+        quantities.extend(batch[quantity_at])
+        prices.extend(batch[price_at])
+        for name, position in zip(CATEGORICAL_FIELDS, positions):
+            codes[name].extend(map(index[name].__getitem__, batch[position]))
+
+    columns = {
+        name: Categorical(
+            np.array(codes[name], dtype=np.int32), list(index[name])
+        )
+        for name in CATEGORICAL_FIELDS
+    }
+
+    return TransactionColumns(
+        np.array(transaction_ids, dtype=str),
+        np.array(quantities, dtype=np.int64),
+        np.array(prices, dtype=np.float64),
+        columns
+    )
+
+
+def _prefix_mask(column, prefix):
+    ok = np.array([c.startswith(prefix) for c in column.categories], dtype=bool)
+    return ok[column.codes] if len(ok) else np.zeros(len(column), dtype=bool)
+
+
+def filter_columns(columns, region=None, min_amount=None, max_amount=None):
+    """
+    Vectorized equivalent of validate_and_filter for a columnar store
+
+    Returns: (filtered columns, summary dict)
+    """
+    valid = (
+        np.char.startswith(columns.transaction_ids, "T") &
+        _prefix_mask(columns["ProductID"], "P") &
+        _prefix_mask(columns["CustomerID"], "C") &
+        (columns.quantity > 0) &
+        (columns.unit_price > 0)
+    )
+    invalid_count = int(len(columns) - valid.sum())
+
+    keep = valid.copy()
+
+    filtered_by_region = 0
+    if region:
+        in_region = columns["Region"].codes == columns["Region"].code_of(region)
+        filtered_by_region = int((keep & ~in_region).sum())
+        keep &= in_region
+
+    filtered_by_amount = 0
+    if min_amount is not None or max_amount is not None:
+        amount_ok = np.ones(len(columns), dtype=bool)
+        if min_amount is not None:
+            amount_ok &= columns.amount >= min_amount
+        if max_amount is not None:
+            amount_ok &= columns.amount <= max_amount
+        filtered_by_amount = int((keep & ~amount_ok).sum())
+        keep &= amount_ok
+
+    summary = {
+        "total_input": len(columns),
+        "invalid": invalid_count,
+        "filtered_by_region": filtered_by_region,
+        "filtered_by_amount": filtered_by_amount,
+        "final_count": int(keep.sum())
+    }
+
+    return columns.take(keep), summary
+
+
+def _runs(values):
+    # Distinct values with the start and length of their run in the sorted
+    # values (sort + compare is much faster than np.unique here)
+    ordered = np.sort(values)
+    if not len(ordered):
+        return ordered, ordered.astype(np.intp), ordered.astype(np.intp)
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    return ordered[starts], starts, np.diff(np.append(starts, len(ordered)))
+
+
+def _groups_in_order(codes, size):
+    # Groups present in the rows, ordered by first occurrence so the
+    # resulting dicts have the same insertion order as the dict path
+    first = np.full(size, len(codes), dtype=np.intp)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    present = np.flatnonzero(first < len(codes))
+    return present[np.argsort(first[present], kind="stable")].tolist()
+
+
+def _group_sum(codes, weights, size):
+    # bincount accumulates in row order, matching the dict path bit for bit
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def _distinct_pairs(left, right, right_size):
+    # Distinct (left, right) code pairs, sorted by left code
+    pairs = _runs(left.astype(np.int64) * right_size + right)[0]
+    return pairs // right_size, pairs % right_size
+
+
+class DistinctValues:
+    """
+    Distinct values of one group, held as codes into a category list
+
+    len() is answered from the codes; the set of values is only built
+    when it is iterated, searched or changed, after which it behaves like
+    that set (|= merges into it, `set |= DistinctValues` works too).
+    """
+    __slots__ = ("codes", "categories", "_values")
+
+    def __init__(self, codes=None, categories=None):
+        self.codes = codes
+        self.categories = categories
+        self._values = set() if codes is None else None
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = set(map(self.categories.__getitem__, self.codes.tolist()))
+        return self._values
+
+    def __len__(self):
+        return len(self.codes) if self._values is None else len(self._values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def add(self, value):
+        self.values.add(value)
+
+    def __ior__(self, other):
+        self.values.update(other)
+        return self
+
+    def __ror__(self, other):
+        return other | self.values
+
+
+def _hll_sketches(groups, codes, categories, precision=HLL_PRECISION):
+    # HyperLogLog sketches in the state HyperLogLog.add() leaves them in:
+    # exact hashes up to m / 64 distinct values, registers past that
+    hashes = np.array([hash64(value) for value in categories], dtype=np.uint64)
+    bits = 64 - precision
+    values = hashes[codes]
+    index = (values >> np.uint64(bits)).astype(np.intp)
+    # frexp's exponent is the bit length (exact, the low bits fit in 53)
+    low = (values & np.uint64((1 << bits) - 1)).astype(np.float64)
+    rank = (bits + 1 - np.frexp(low)[1]).astype(np.uint8)
+
+    sketches = []
+    bounds = np.flatnonzero(np.diff(groups)) + 1
+    for start, end in zip([0] + bounds.tolist(), bounds.tolist() + [len(groups)]):
+        sketch = HyperLogLog(precision)
+        if end - start > (1 << precision) >> 6:
+            registers = np.zeros(1 << precision, dtype=np.uint8)
+            np.maximum.at(registers, index[start:end], rank[start:end])
+            sketch.registers = bytearray(registers.tobytes())
+            sketch.hashes = None
+        else:
+            sketch.hashes = array("Q", np.sort(values[start:end]).tobytes())
+        sketches.append(sketch)
+    return sketches
+
+
+def _distinct_per_group(left, right, right_categories, approximate):
+    # One DistinctValues (or HyperLogLog) per left code present, from the
+    # sorted distinct pairs instead of a set.add() per row
+    groups, codes = _distinct_pairs(left, right, len(right_categories))
+    if approximate:
+        sketches = _hll_sketches(groups, codes, right_categories)
+        return dict(zip(_runs(groups)[0].tolist(), sketches))
+
+    present, starts, counts = _runs(groups)
+    return {
+        group: DistinctValues(codes[start:start + count], right_categories)
+        for group, start, count in zip(present.tolist(), starts.tolist(), counts.tolist())
+    }
+
+
+def _sketch_keys(amount, log_gamma):
+    # QuantileSketch bucket keys, ceil(log(v) / log(gamma)); values that
+    # land next to a bucket edge are recomputed with math.log, so keys
+    # match QuantileSketch.add() exactly
+    scaled = np.log(amount) / log_gamma
+    keys = np.ceil(scaled)
+    edge = np.flatnonzero(np.abs(scaled - np.rint(scaled)) < 1e-6)
+    for i in edge.tolist():
+        keys[i] = math.ceil(math.log(float(amount[i])) / log_gamma)
+    return keys.astype(np.int64)
+
+
+def _order_values(region_col, date_col, amount):
+    # One QuantileSketch per (region, date), built from bucket counts
+    order_values = OrderValueAccumulator()
+    date_size = len(date_col.categories)
+    pair = region_col.codes.astype(np.int64) * date_size + date_col.codes
+    log_gamma = QuantileSketch().log_gamma
+
+    # NaN and infinite amounts are skipped, negative infinity counts as 0
+    positive = (amount > 0) & (amount < np.inf)
+    zero = amount <= 0
+    keys = _sketch_keys(amount[positive], log_gamma)
+    lowest = int(keys.min()) if len(keys) else 0
+    span = int(keys.max()) - lowest + 1 if len(keys) else 1
+    bins, _, bin_counts = _runs(pair[positive] * span + (keys - lowest))
+    pairs, _, zeros = _runs(pair[zero])
+    zero_counts = dict(zip(pairs.tolist(), zeros.tolist()))
+
+    # Buckets are sorted by pair, so each pair's buckets are one slice
+    bin_keys = (bins % span + lowest).tolist()
+    bin_counts = bin_counts.tolist()
+    codes, starts, lengths = _runs(bins // span)
+    bins_by_pair = {
+        code: dict(zip(bin_keys[start:start + length], bin_counts[start:start + length]))
+        for code, start, length in zip(codes.tolist(), starts.tolist(), lengths.tolist())
+    }
+
+    for code in _groups_in_order(pair, len(region_col.categories) * date_size):
+        key = region_col.categories[code // date_size], date_col.categories[code % date_size]
+        sketch = order_values.sketches[key] = QuantileSketch()
+        sketch.add_bins(bins_by_pair.get(code, {}), zero_counts.get(code, 0))
+
+    return order_values
+
+
+def aggregate_columns(columns, approximate=False, percentiles=False):
+    """
+    Computes the default accumulators with vectorized group-bys
+
+    Distinct products per customer and customers per date come from the
+    distinct code pairs; approximate=True gives HyperLogLog sketches and
+    percentiles=True the order value sketches, as default_accumulators
+    does.
+
+    Returns: dict of accumulator name -> accumulator, interchangeable with
+    aggregate_transactions() for all data_processor views.
+    """
+    _require_numpy()
+
+    amount = columns.amount
+    quantity = columns.quantity
+
+    revenue = RevenueAccumulator()
+    revenue.count = len(columns)
+    revenue.total = float(np.cumsum(amount)[-1]) if len(columns) else 0.0
+
+    region_col = columns["Region"]
+    size = len(region_col.categories)
+    sales = _group_sum(region_col.codes, amount, size)
+    counts = np.bincount(region_col.codes, minlength=size)
+    region = RegionAccumulator()
+    for code in _groups_in_order(region_col.codes, size):
+        region.regions[region_col.categories[code]] = {
+            "total_sales": float(sales[code]),
+            "transaction_count": int(counts[code])
+        }
+
+    name_col = columns["ProductName"]
+    size = len(name_col.categories)
+    qty = np.bincount(name_col.codes, weights=quantity, minlength=size)
+    rev = _group_sum(name_col.codes, amount, size)
+    product = ProductAccumulator()
+    for code in _groups_in_order(name_col.codes, size):
+        product.products[name_col.categories[code]] = {
+            "qty": int(qty[code]),
+            "revenue": float(rev[code])
+        }
+
+    cust_col = columns["CustomerID"]
+    size = len(cust_col.categories)
+    spent = _group_sum(cust_col.codes, amount, size)
+    counts = np.bincount(cust_col.codes, minlength=size)
+    products = _distinct_per_group(
+        cust_col.codes, name_col.codes, name_col.categories, approximate
+    )
+    customer = CustomerAccumulator(approximate)
+    for code in _groups_in_order(cust_col.codes, size):
+        customer.customers[cust_col.categories[code]] = {
+            "total_spent": float(spent[code]),
+            "purchase_count": int(counts[code]),
+            "products": products[code]
+        }
+
+    date_col = columns["Date"]
+    size = len(date_col.categories)
+    day_rev = _group_sum(date_col.codes, amount, size)
+    counts = np.bincount(date_col.codes, minlength=size)
+    customers = _distinct_per_group(
+        date_col.codes, cust_col.codes, cust_col.categories, approximate
+    )
+    daily = DailyAccumulator(approximate)
+    for code in _groups_in_order(date_col.codes, size):
+        daily.daily[date_col.categories[code]] = {
+            "revenue": float(day_rev[code]),
+            "transaction_count": int(counts[code]),
+            "customers": customers[code]
+        }
+
+    accumulators = [revenue, region, product, customer, daily]
+    if percentiles:
+        accumulators.append(_order_values(region_col, date_col, amount))
+
+    return {acc.name: acc for acc in accumulators}
@@ -1,55 +1,38 @@
-import csv
+from array import array
+from bisect import bisect_left, bisect_right
+
+from utils.file_handler import iter_sales_data
+from utils.schema_parser import RecordParser
+
 
 def clean_sales_data(file_path):
     total_records = 0
     invalid_records = 0
     valid_records = []
 
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-        reader = csv.reader(file, delimiter='|')
-        header = next(reader)  # skip header
-
-        for row in reader:
-            if not row or len(row) < 8:
-                continue
+    parser = RecordParser()
 
+    def counted(lines):
+        nonlocal total_records
+        for line in lines:
             total_records += 1
+            yield line
 
-            try:
-                transaction_id = row[0].strip()
-                date = row[1].strip()
-                product_id = row[2].strip()
-                product_name = row[3].replace(',', '').strip()
-                quantity = int(row[4].replace(',', '').strip())
-                unit_price = float(row[5].replace(',', '').strip())
-                customer_id = row[6].strip()
-                region = row[7].strip()
-
-                # Validation rules (as per assignment)
-                if (
-                    not transaction_id.startswith('T') or
-                    quantity <= 0 or
-                    unit_price <= 0 or
-                    not customer_id or
-                    not region
-                ):
-                    invalid_records += 1
-                    continue
-
-                valid_records.append({
-                    "TransactionID": transaction_id,
-                    "Date": date,
-                    "ProductID": product_id,
-                    "ProductName": product_name,
-                    "Quantity": quantity,
-                    "UnitPrice": unit_price,
-                    "CustomerID": customer_id,
-                    "Region": region
-                })
-
-            except Exception:
-                invalid_records += 1
-                continue
+    for tx in parser.iter_parse(counted(iter_sales_data(file_path))):
+        # Validation rules (as per assignment)
+        if (
+            not tx["TransactionID"].startswith('T') or
+            tx["Quantity"] <= 0 or
+            tx["UnitPrice"] <= 0 or
+            not tx["CustomerID"] or
+            not tx["Region"]
+        ):
+            invalid_records += 1
+            continue
+
+        valid_records.append(tx)
+
+    invalid_records += sum(parser.rejections.values())
 
     # REQUIRED VALIDATION OUTPUT
     print(f"Total records parsed: {total_records}")
@@ -58,73 +41,229 @@ def clean_sales_data(file_path):
 
     return valid_records
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def is_valid_transaction(tx):
     """
-    Validates transactions and applies optional filters
+    Checks a single transaction against the validation rules
     """
+    try:
+        return not (
+            not tx.get("TransactionID", "").startswith("T") or
+            not tx.get("ProductID", "").startswith("P") or
+            not tx.get("CustomerID", "").startswith("C") or
+            tx.get("Quantity", 0) <= 0 or
+            tx.get("UnitPrice", 0) <= 0
+        )
+    except Exception:
+        return False
 
-    total_input = len(transactions)
-    invalid_count = 0
-    valid_transactions = []
+def iter_valid_transactions(transactions, region=None, min_amount=None,
+                            max_amount=None, stats=None):
+    """
+    Streams transactions that pass validation and the optional filters
+
+    If `stats` is given it is filled with the same counters as the
+    summary returned by validate_and_filter.
+    """
+    if stats is None:
+        stats = {}
+    stats.update({
+        "total_input": 0,
+        "invalid": 0,
+        "filtered_by_region": 0,
+        "filtered_by_amount": 0,
+        "final_count": 0
+    })
+
+    check_amount = min_amount is not None or max_amount is not None
 
-    # ---------- VALIDATION ----------
     for tx in transactions:
-        try:
+        stats["total_input"] += 1
+
+        if not is_valid_transaction(tx):
+            stats["invalid"] += 1
+            continue
+
+        if region and tx["Region"] != region:
+            stats["filtered_by_region"] += 1
+            continue
+
+        if check_amount:
+            amount = tx["Quantity"] * tx["UnitPrice"]
             if (
-                not tx.get("TransactionID", "").startswith("T") or
-                not tx.get("ProductID", "").startswith("P") or
-                not tx.get("CustomerID", "").startswith("C") or
-                tx.get("Quantity", 0) <= 0 or
-                tx.get("UnitPrice", 0) <= 0
+                (min_amount is not None and amount < min_amount) or
+                (max_amount is not None and amount > max_amount)
             ):
-                invalid_count += 1
+                stats["filtered_by_amount"] += 1
                 continue
 
-            valid_transactions.append(tx)
+        stats["final_count"] += 1
+        yield tx
+
+class FilterOptions:
+    """
+    Regions and amount range of parsed transactions, collected while they
+    are parsed so the filter choices need no extra pass over the file
+    """
+
+    def __init__(self, regions=(), min_amount=None, max_amount=None):
+        self.regions = set(regions)
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def add(self, tx):
+        if tx.get("Region"):
+            self.regions.add(tx["Region"])
+        if tx.get("Quantity") and tx.get("UnitPrice"):
+            amount = tx["Quantity"] * tx["UnitPrice"]
+            if self.min_amount is None or amount < self.min_amount:
+                self.min_amount = amount
+            if self.max_amount is None or amount > self.max_amount:
+                self.max_amount = amount
+
+    def as_dict(self):
+        return {
+            "regions": sorted(self.regions),
+            "min_amount": self.min_amount,
+            "max_amount": self.max_amount
+        }
+
+class FilterIndex:
+    """
+    Region and amount index over validated transactions
+
+    Built once, it answers region + [min, max] amount queries without
+    rescanning: region -> row ids, and row ids sorted by amount for bisect
+    range lookups. Query results keep the original row order.
+    """
+
+    def __init__(self, transactions):
+        self.transactions = list(transactions)
+        self.amounts = [tx["Quantity"] * tx["UnitPrice"] for tx in self.transactions]
+
+        self.rows_by_region = {}
+        for row, tx in enumerate(self.transactions):
+            self.rows_by_region.setdefault(tx["Region"], array("L")).append(row)
+
+        # NaN amounts can't be ordered; they pass every range check, as in
+        # the scanning filter, so they are kept aside
+        amounts = self.amounts
+        ordered = [row for row, amount in enumerate(amounts) if amount == amount]
+        ordered.sort(key=amounts.__getitem__)
+        self.unordered_rows = [row for row, amount in enumerate(amounts) if amount != amount]
+        self.rows_by_amount = array("L", ordered)
+        self.sorted_amounts = [amounts[row] for row in ordered]
+
+    def __len__(self):
+        return len(self.transactions)
+
+    @property
+    def regions(self):
+        return sorted(self.rows_by_region)
+
+    @property
+    def min_amount(self):
+        return self.sorted_amounts[0] if self.sorted_amounts else None
+
+    @property
+    def max_amount(self):
+        return self.sorted_amounts[-1] if self.sorted_amounts else None
+
+    def amount_range(self, min_amount=None, max_amount=None):
+        """
+        Returns: (lo, hi) slice of rows_by_amount with min <= amount <= max
+        """
+        lo = 0 if min_amount is None else bisect_left(self.sorted_amounts, min_amount)
+        hi = len(self.sorted_amounts) if max_amount is None else bisect_right(self.sorted_amounts, max_amount)
+        return lo, max(lo, hi)
+
+    def select(self, region=None, min_amount=None, max_amount=None):
+        """
+        Returns the matching row ids in original order, plus the number of
+        rows left after the region filter
+        """
+        region_rows = self.rows_by_region.get(region, ()) if region else None
+        after_region = len(self) if region_rows is None else len(region_rows)
+
+        if min_amount is None and max_amount is None:
+            rows = range(len(self)) if region_rows is None else region_rows
+            return list(rows), after_region
+
+        lo, hi = self.amount_range(min_amount, max_amount)
+
+        if region_rows is not None and len(region_rows) < hi - lo:
+            # Fewer region rows than amount matches: check their amounts
+            amounts = self.amounts
+            rows = [
+                row for row in region_rows
+                if not (
+                    (min_amount is not None and amounts[row] < min_amount) or
+                    (max_amount is not None and amounts[row] > max_amount)
+                )
+            ]
+            return rows, after_region
 
-        except Exception:
-            invalid_count += 1
+        rows = list(self.rows_by_amount[lo:hi])
+        rows.extend(self.unordered_rows)
+        if region_rows is not None:
+            transactions = self.transactions
+            rows = [row for row in rows if transactions[row]["Region"] == region]
+        rows.sort()
+        return rows, after_region
+
+    def query(self, region=None, min_amount=None, max_amount=None):
+        """
+        Returns: (matching transactions, summary counts)
+        """
+        rows, after_region = self.select(region, min_amount, max_amount)
+        transactions = self.transactions
+
+        return [transactions[row] for row in rows], {
+            "filtered_by_region": len(self) - after_region,
+            "filtered_by_amount": after_region - len(rows),
+            "final_count": len(rows)
+        }
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        index=None):
+    """
+    Validates transactions and applies optional filters
+
+    index=True also returns the FilterIndex it builds, as summary["index"];
+    pass that index back to query other filters without validating again.
+    Otherwise the summary holds only the counts.
+    """
+
+    total_input = len(transactions)
+    keep_index = index is True
+
+    # ---------- VALIDATION ----------
+    if index is None or keep_index:
+        stats = {}
+        index = FilterIndex(iter_valid_transactions(transactions, stats=stats))
+        invalid_count = stats["invalid"]
+    else:
+        invalid_count = total_input - len(index)
 
     # ---------- DISPLAY FILTER OPTIONS ----------
-    regions = sorted(set(tx["Region"] for tx in valid_transactions))
-    amounts = [tx["Quantity"] * tx["UnitPrice"] for tx in valid_transactions]
+    print("\nAvailable Regions:", index.regions)
+    print(f"Transaction Amount Range: {index.min_amount} - {index.max_amount}")
 
-    print("\nAvailable Regions:", regions)
-    print(f"Transaction Amount Range: {min(amounts)} - {max(amounts)}")
+    # ---------- REGION + AMOUNT FILTERS ----------
+    valid_transactions, counts = index.query(region, min_amount, max_amount)
 
-    # ---------- REGION FILTER ----------
-    filtered_by_region = 0
     if region:
-        before = len(valid_transactions)
-        valid_transactions = [
-            tx for tx in valid_transactions if tx["Region"] == region
-        ]
-        filtered_by_region = before - len(valid_transactions)
-        print(f"Records after region filter ({region}): {len(valid_transactions)}")
-
-    # ---------- AMOUNT FILTER ----------
-    filtered_by_amount = 0
+        print(f"Records after region filter ({region}): {len(index) - counts['filtered_by_region']}")
     if min_amount is not None or max_amount is not None:
-        before = len(valid_transactions)
-
-        def amount_ok(tx):
-            amount = tx["Quantity"] * tx["UnitPrice"]
-            if min_amount is not None and amount < min_amount:
-                return False
-            if max_amount is not None and amount > max_amount:
-                return False
-            return True
-
-        valid_transactions = list(filter(amount_ok, valid_transactions))
-        filtered_by_amount = before - len(valid_transactions)
         print(f"Records after amount filter: {len(valid_transactions)}")
 
     summary = {
         "total_input": total_input,
         "invalid": invalid_count,
-        "filtered_by_region": filtered_by_region,
-        "filtered_by_amount": filtered_by_amount,
-        "final_count": len(valid_transactions)
+        "filtered_by_region": counts["filtered_by_region"],
+        "filtered_by_amount": counts["filtered_by_amount"],
+        "final_count": counts["final_count"]
     }
+    if keep_index:
+        summary["index"] = index
 
     return valid_transactions, invalid_count, summary
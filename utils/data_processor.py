@@ -1,31 +1,357 @@
-def calculate_total_revenue(transactions):
+import heapq
+from datetime import date
+
+from utils.rollups import DateRollups
+from utils.sketches import HyperLogLog, QuantileSketch
+
+
+class RevenueAccumulator:
     """
-    Calculates total revenue from all transactions
+    Accumulates overall revenue and transaction count
     """
-    total = 0.0
-    for tx in transactions:
-        total += tx["Quantity"] * tx["UnitPrice"]
-    return total
+    name = "revenue"
 
-def region_wise_sales(transactions):
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, tx, amount):
+        self.total += amount
+        self.count += 1
+
+    def merge(self, other):
+        self.total += other.total
+        self.count += other.count
+
+
+class RegionAccumulator:
     """
-    Analyzes sales by region
+    Accumulates sales and transaction count per region
     """
-    region_data = {}
-    grand_total = calculate_total_revenue(transactions)
+    name = "region"
 
-    for tx in transactions:
+    def __init__(self):
+        self.regions = {}
+
+    def add(self, tx, amount):
         region = tx["Region"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
+        data = self.regions.get(region)
 
-        if region not in region_data:
-            region_data[region] = {
+        if data is None:
+            data = self.regions[region] = {
                 "total_sales": 0.0,
                 "transaction_count": 0
             }
 
-        region_data[region]["total_sales"] += amount
-        region_data[region]["transaction_count"] += 1
+        data["total_sales"] += amount
+        data["transaction_count"] += 1
+
+    def merge(self, other):
+        for region, data in other.regions.items():
+            mine = self.regions.setdefault(
+                region, {"total_sales": 0.0, "transaction_count": 0}
+            )
+            mine["total_sales"] += data["total_sales"]
+            mine["transaction_count"] += data["transaction_count"]
+
+
+class ProductAccumulator:
+    """
+    Accumulates quantity and revenue per product name
+    """
+    name = "product"
+
+    def __init__(self):
+        self.products = {}
+
+    def add(self, tx, amount):
+        product = tx["ProductName"]
+        data = self.products.get(product)
+
+        if data is None:
+            data = self.products[product] = {"qty": 0, "revenue": 0.0}
+
+        data["qty"] += tx["Quantity"]
+        data["revenue"] += amount
+
+    def merge(self, other):
+        for product, data in other.products.items():
+            mine = self.products.setdefault(product, {"qty": 0, "revenue": 0.0})
+            mine["qty"] += data["qty"]
+            mine["revenue"] += data["revenue"]
+
+
+class CustomerAccumulator:
+    """
+    Accumulates spend, purchase count and products bought per customer
+
+    With approximate=True distinct products are counted with a fixed-size
+    HyperLogLog sketch per customer instead of a set of names.
+    """
+    name = "customer"
+
+    def __init__(self, approximate=False):
+        self.customers = {}
+        self.approximate = approximate
+        self.new_set = HyperLogLog if approximate else set
+
+    def add(self, tx, amount):
+        cid = tx["CustomerID"]
+        data = self.customers.get(cid)
+
+        if data is None:
+            data = self.customers[cid] = {
+                "total_spent": 0.0,
+                "purchase_count": 0,
+                "products": self.new_set()
+            }
+
+        data["total_spent"] += amount
+        data["purchase_count"] += 1
+        data["products"].add(tx["ProductName"])
+
+    def merge(self, other):
+        for cid, data in other.customers.items():
+            mine = self.customers.setdefault(
+                cid, {"total_spent": 0.0, "purchase_count": 0, "products": self.new_set()}
+            )
+            mine["total_spent"] += data["total_spent"]
+            mine["purchase_count"] += data["purchase_count"]
+            mine["products"] |= data["products"]
+
+
+class DailyAccumulator:
+    """
+    Accumulates revenue, transaction count and customers per date
+
+    With approximate=True unique customers are counted with a fixed-size
+    HyperLogLog sketch per date instead of a set of IDs.
+    """
+    name = "daily"
+
+    def __init__(self, approximate=False):
+        self.daily = {}
+        self.approximate = approximate
+        self.new_set = HyperLogLog if approximate else set
+        self._rollups = None
+
+    def add(self, tx, amount):
+        day = tx["Date"]
+        data = self.daily.get(day)
+
+        if data is None:
+            data = self.daily[day] = {
+                "revenue": 0.0,
+                "transaction_count": 0,
+                "customers": self.new_set()
+            }
+
+        data["revenue"] += amount
+        data["transaction_count"] += 1
+        data["customers"].add(tx["CustomerID"])
+
+    def merge(self, other):
+        for day, data in other.daily.items():
+            mine = self.daily.setdefault(
+                day, {"revenue": 0.0, "transaction_count": 0, "customers": self.new_set()}
+            )
+            mine["revenue"] += data["revenue"]
+            mine["transaction_count"] += data["transaction_count"]
+            mine["customers"] |= data["customers"]
+
+    def rollups(self):
+        """
+        Returns the day/week/month DateRollups of the current state, built
+        once and reused until more transactions are added
+        """
+        # Revenue only changes along with the transaction counts, so the
+        # number of days and transactions identify the state
+        version = len(self.daily), sum(d["transaction_count"] for d in self.daily.values())
+        if self._rollups is None or self._rollups[0] != version:
+            self._rollups = version, DateRollups(self.daily)
+        return self._rollups[1]
+
+
+class OrderValueAccumulator:
+    """
+    Order value (Quantity * UnitPrice) quantile sketches per region and per
+    date, mergeable across chunks and processes
+
+    One sketch is kept per (region, date) pair, so each row updates a single
+    sketch; `regions` and `daily` merge them on demand.
+    """
+    name = "order_values"
+
+    def __init__(self):
+        self.sketches = {}
+
+    def add(self, tx, amount):
+        key = tx["Region"], tx["Date"]
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch()
+        sketch.add(amount)
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            mine = self.sketches.get(key)
+            if mine is None:
+                self.sketches[key] = sketch
+            else:
+                mine.merge(sketch)
+
+    def _grouped(self, part):
+        groups = {}
+        for key, sketch in self.sketches.items():
+            group = groups.get(key[part])
+            if group is None:
+                group = groups[key[part]] = QuantileSketch()
+            group.merge(sketch)
+        return groups
+
+    @property
+    def regions(self):
+        return self._grouped(0)
+
+    @property
+    def daily(self):
+        return self._grouped(1)
+
+
+class EnrichmentAccumulator:
+    """
+    Accumulates API match counts and row counts per failed product ID
+    """
+    name = "enrichment"
+
+    def __init__(self):
+        self.total = 0
+        self.matched = 0
+        self.failed_counts = {}
+
+    def add(self, tx, amount):
+        self.total += 1
+        if tx.get("API_Match"):
+            self.matched += 1
+        else:
+            pid = tx["ProductID"]
+            self.failed_counts[pid] = self.failed_counts.get(pid, 0) + 1
+
+    def merge(self, other):
+        self.total += other.total
+        self.matched += other.matched
+        for pid, count in other.failed_counts.items():
+            self.failed_counts[pid] = self.failed_counts.get(pid, 0) + count
+
+
+def default_accumulators(approximate=False, percentiles=False):
+    """
+    Returns fresh instances of the accumulators used by the report
+
+    approximate=True counts distinct customers/products with HyperLogLog
+    sketches, so memory per group stays fixed. percentiles=True adds the
+    order value sketches (a sketch update per row, so off by default).
+    """
+    accumulators = [
+        RevenueAccumulator(),
+        RegionAccumulator(),
+        ProductAccumulator(),
+        CustomerAccumulator(approximate),
+        DailyAccumulator(approximate)
+    ]
+    if percentiles:
+        accumulators.append(OrderValueAccumulator())
+    return accumulators
+
+
+def aggregate_transactions(transactions, accumulators=None):
+    """
+    Computes all metrics in a single pass over the transactions
+
+    Any object with a `name`, `add(tx, amount)` and `merge(other)` can be
+    plugged in as an accumulator.
+
+    Returns: dict of accumulator name -> accumulator
+    """
+    if accumulators is None:
+        accumulators = default_accumulators()
+
+    adders = [acc.add for acc in accumulators]
+
+    for tx in transactions:
+        amount = tx["Quantity"] * tx["UnitPrice"]
+        for add in adders:
+            add(tx, amount)
+
+    return {acc.name: acc for acc in accumulators}
+
+
+def merge_aggregates(target, other):
+    """
+    Merges the accumulators of `other` into `target` (in place)
+    """
+    for name, acc in other.items():
+        if name in target:
+            target[name].merge(acc)
+        else:
+            target[name] = acc
+    return target
+
+
+# Accumulator attribute holding the per-group stats for each group name
+_GROUP_ATTRS = {
+    "region": "regions",
+    "product": "products",
+    "customer": "customers",
+    "daily": "daily"
+}
+
+
+def top_k(aggregates, group, metric, n=5, largest=True):
+    """
+    Returns the n groups with the largest (or smallest) metric
+
+    Uses a bounded heap over the aggregate state instead of sorting every
+    group; ties keep first-seen order, exactly like a stable sort.
+
+    Returns: list of (group key, stats dict)
+    """
+    data = getattr(aggregates[group], _GROUP_ATTRS[group])
+    select = heapq.nlargest if largest else heapq.nsmallest
+    return select(n, data.items(), key=lambda x: x[1][metric])
+
+
+def _aggregates_for(transactions, aggregates, *accumulator_types):
+    # Called without precomputed aggregates, a view builds only the
+    # accumulators it reads
+    if aggregates is None:
+        aggregates = aggregate_transactions(
+            transactions, [acc_type() for acc_type in accumulator_types]
+        )
+    return aggregates
+
+
+def calculate_total_revenue(transactions, aggregates=None):
+    """
+    Calculates total revenue from all transactions
+    """
+    aggregates = _aggregates_for(transactions, aggregates, RevenueAccumulator)
+    return aggregates["revenue"].total
+
+def region_wise_sales(transactions, aggregates=None, store=None):
+    """
+    Analyzes sales by region
+
+    With a SalesStore (utils/sqlite_store.py) as `store` this runs as a SQL
+    query instead, as do top_selling_products, customer_analysis and
+    daily_sales_trend.
+    """
+    if store is not None:
+        return store.region_wise_sales()
+
+    aggregates = _aggregates_for(transactions, aggregates, RevenueAccumulator, RegionAccumulator)
+    region_data = aggregates["region"].regions
+    grand_total = aggregates["revenue"].total
 
     # Add percentage & sort
     result = {}
@@ -42,55 +368,71 @@ def region_wise_sales(transactions):
 
     return result
 
-def top_selling_products(transactions, n=5):
+def top_selling_products(transactions, n=5, aggregates=None, store=None):
     """
     Finds top n products by total quantity sold
     """
-    product_stats = {}
-
-    for tx in transactions:
-        product = tx["ProductName"]
-        qty = tx["Quantity"]
-        revenue = qty * tx["UnitPrice"]
+    if store is not None:
+        return store.top_selling_products(n)
 
-        if product not in product_stats:
-            product_stats[product] = {"qty": 0, "revenue": 0.0}
+    aggregates = _aggregates_for(transactions, aggregates, ProductAccumulator)
 
-        product_stats[product]["qty"] += qty
-        product_stats[product]["revenue"] += revenue
+    return [
+        (name, data["qty"], round(data["revenue"], 2))
+        for name, data in top_k(aggregates, "product", "qty", n)
+    ]
 
-    sorted_products = sorted(
-        product_stats.items(),
-        key=lambda x: x[1]["qty"],
-        reverse=True
-    )
+def bottom_selling_products(transactions, n=5, aggregates=None):
+    """
+    Finds bottom n products by total quantity sold
+    """
+    aggregates = _aggregates_for(transactions, aggregates, ProductAccumulator)
 
     return [
         (name, data["qty"], round(data["revenue"], 2))
-        for name, data in sorted_products[:n]
+        for name, data in top_k(aggregates, "product", "qty", n, largest=False)
     ]
 
-def customer_analysis(transactions):
+def _customer_summary(data, include_products):
+    summary = {
+        "total_spent": round(data["total_spent"], 2),
+        "purchase_count": data["purchase_count"],
+        "avg_order_value": round(
+            data["total_spent"] / data["purchase_count"], 2
+        )
+    }
+    if include_products:
+        # Approximate (HyperLogLog) product counts can't list the products
+        products = data["products"]
+        summary["products_bought"] = None if isinstance(products, HyperLogLog) else sorted(products)
+        summary["unique_products"] = len(products)
+    return summary
+
+def top_customers(transactions, n=5, aggregates=None, include_products=False):
     """
-    Analyzes customer purchase patterns
+    Finds top n customers by total spent
+
+    Only the n selected customers are summarized; their sorted product
+    lists are built only when include_products=True.
+
+    Returns: list of (customer ID, stats dict)
     """
-    customers = {}
+    aggregates = _aggregates_for(transactions, aggregates, CustomerAccumulator)
 
-    for tx in transactions:
-        cid = tx["CustomerID"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-        product = tx["ProductName"]
+    return [
+        (cid, _customer_summary(data, include_products))
+        for cid, data in top_k(aggregates, "customer", "total_spent", n)
+    ]
 
-        if cid not in customers:
-            customers[cid] = {
-                "total_spent": 0.0,
-                "purchase_count": 0,
-                "products": set()
-            }
+def customer_analysis(transactions, aggregates=None, store=None):
+    """
+    Analyzes customer purchase patterns
+    """
+    if store is not None:
+        return store.customer_analysis()
 
-        customers[cid]["total_spent"] += amount
-        customers[cid]["purchase_count"] += 1
-        customers[cid]["products"].add(product)
+    aggregates = _aggregates_for(transactions, aggregates, CustomerAccumulator)
+    customers = aggregates["customer"].customers
 
     # Sort by total_spent descending
     sorted_customers = dict(
@@ -99,88 +441,99 @@ def customer_analysis(transactions):
 
     result = {}
     for cid, data in sorted_customers.items():
-        result[cid] = {
-            "total_spent": round(data["total_spent"], 2),
-            "purchase_count": data["purchase_count"],
-            "avg_order_value": round(
-                data["total_spent"] / data["purchase_count"], 2
-            ),
-            "products_bought": sorted(list(data["products"]))
-        }
+        result[cid] = _customer_summary(data, include_products=True)
 
     return result
 
-def daily_sales_trend(transactions):
+def daily_sales_trend(transactions, aggregates=None, store=None):
     """
     Analyzes sales trends by date
     """
-    daily = {}
-
-    for tx in transactions:
-        date = tx["Date"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
-
-        if date not in daily:
-            daily[date] = {
-                "revenue": 0.0,
-                "transaction_count": 0,
-                "customers": set()
-            }
+    if store is not None:
+        return store.daily_sales_trend()
 
-        daily[date]["revenue"] += amount
-        daily[date]["transaction_count"] += 1
-        daily[date]["customers"].add(tx["CustomerID"])
+    aggregates = _aggregates_for(transactions, aggregates, DailyAccumulator)
+    daily = aggregates["daily"].daily
 
     result = {}
-    for date in sorted(daily.keys()):
-        result[date] = {
-            "revenue": round(daily[date]["revenue"], 2),
-            "transaction_count": daily[date]["transaction_count"],
-            "unique_customers": len(daily[date]["customers"])
+    for day in sorted(daily.keys()):
+        result[day] = {
+            "revenue": round(daily[day]["revenue"], 2),
+            "transaction_count": daily[day]["transaction_count"],
+            "unique_customers": len(daily[day]["customers"])
         }
 
     return result
 
-def find_peak_sales_day(transactions):
+def date_rollups(transactions, aggregates=None):
     """
-    Identifies the date with highest revenue
+    Returns the day/week/month DateRollups (see utils/rollups.py)
     """
-    daily = {}
+    aggregates = _aggregates_for(transactions, aggregates, DailyAccumulator)
+    return aggregates["daily"].rollups()
+
+def _period_trend(periods):
+    return {
+        key: {
+            "start": date.fromordinal(period["start"]).isoformat(),
+            "revenue": round(period["revenue"], 2),
+            "transaction_count": period["transaction_count"],
+            "days": period["days"],
+            "unique_customers": len(period["customers"])
+        }
+        for key, period in periods.items()
+    }
 
-    for tx in transactions:
-        date = tx["Date"]
-        amount = tx["Quantity"] * tx["UnitPrice"]
+def weekly_sales_trend(transactions, aggregates=None):
+    """
+    Sales per ISO week ("2024-W48"), in date order
+    """
+    return _period_trend(date_rollups(transactions, aggregates).weekly)
+
+def monthly_sales_trend(transactions, aggregates=None):
+    """
+    Sales per month ("2024-12"), in date order
+    """
+    return _period_trend(date_rollups(transactions, aggregates).monthly)
+
+def revenue_between(transactions, start=None, end=None, aggregates=None):
+    """
+    Total revenue of the days from start to end (inclusive, YYYY-MM-DD)
+    """
+    rollups = date_rollups(transactions, aggregates)
+    return round(rollups.revenue_between(start, end), 2)
 
-        if date not in daily:
-            daily[date] = {"revenue": 0.0, "count": 0}
+def find_peak_sales_day(transactions, aggregates=None, start=None, end=None):
+    """
+    Identifies the date with highest revenue (None if there are no sales)
+
+    With start and/or end (inclusive, YYYY-MM-DD) only that window is
+    searched, using the date rollups.
+    """
+    aggregates = _aggregates_for(transactions, aggregates, DailyAccumulator)
+    if start is not None or end is not None:
+        peak = aggregates["daily"].rollups().peak_day(start, end)
+        return peak and (peak[0], round(peak[1], 2), peak[2])
 
-        daily[date]["revenue"] += amount
-        daily[date]["count"] += 1
+    daily = aggregates["daily"].daily
+
+    if not daily:
+        return None
 
     peak_date = max(daily.items(), key=lambda x: x[1]["revenue"])
 
     return (
         peak_date[0],
         round(peak_date[1]["revenue"], 2),
-        peak_date[1]["count"]
+        peak_date[1]["transaction_count"]
     )
 
-def low_performing_products(transactions, threshold=10):
+def low_performing_products(transactions, threshold=10, aggregates=None):
     """
     Identifies products with low sales
     """
-    products = {}
-
-    for tx in transactions:
-        name = tx["ProductName"]
-        qty = tx["Quantity"]
-        revenue = qty * tx["UnitPrice"]
-
-        if name not in products:
-            products[name] = {"qty": 0, "revenue": 0.0}
-
-        products[name]["qty"] += qty
-        products[name]["revenue"] += revenue
+    aggregates = _aggregates_for(transactions, aggregates, ProductAccumulator)
+    products = aggregates["product"].products
 
     low_products = [
         (name, data["qty"], round(data["revenue"], 2))
@@ -190,3 +543,25 @@ def low_performing_products(transactions, threshold=10):
 
     return sorted(low_products, key=lambda x: x[1])
 
+def order_value_percentiles(transactions, quantiles=(0.5, 0.95, 0.99), aggregates=None):
+    """
+    Order value (Quantity * UnitPrice) percentiles per region and per date,
+    each within 1% of the exact value
+
+    Returns: {"regions": {region: {q: value}}, "daily": {date: {q: value}}}
+    """
+    aggregates = _aggregates_for(transactions, aggregates, OrderValueAccumulator)
+    regions = aggregates["order_values"].regions
+    daily = aggregates["order_values"].daily
+
+    # Groups whose order values were all skipped (NaN) have empty sketches
+    return {
+        "regions": {
+            region: {q: round(sketch.quantile(q), 2) for q in quantiles}
+            for region, sketch in regions.items() if sketch.count
+        },
+        "daily": {
+            day: {q: round(daily[day].quantile(q), 2) for q in quantiles}
+            for day in sorted(daily) if daily[day].count
+        }
+    }
@@ -0,0 +1,320 @@
+import csv
+import os
+from contextlib import ExitStack
+from operator import itemgetter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+from utils.api_handler import API_HEADERS, BASE_HEADERS, ENRICHED_HEADERS, EnrichedTransaction
+from utils.output_writer import open_output
+
+# Rows are buffered and written in batches of this size; in Parquet each
+# batch becomes one row group
+ROW_GROUP_SIZE = 65536
+
+# Column types: "string", "int", "float", "bool"
+ENRICHED_COLUMNS = [
+    ("TransactionID", "string"),
+    ("Date", "string"),
+    ("ProductID", "string"),
+    ("ProductName", "string"),
+    ("Quantity", "int"),
+    ("UnitPrice", "float"),
+    ("CustomerID", "string"),
+    ("Region", "string"),
+    ("API_Category", "string"),
+    ("API_Brand", "string"),
+    ("API_Rating", "float"),
+    ("API_Match", "bool")
+]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Arrow/Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def _arrow_schema(columns):
+    types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_()
+    }
+    return pa.schema([(name, types[column_type]) for name, column_type in columns])
+
+
+def _record_batch(schema, columns):
+    arrays = [
+        pa.array(values, type=field.type)
+        for values, field in zip(columns, schema)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class Exporter:
+    """
+    Base class for table exporters
+
+    Subclasses implement write_columns(columns) for a batch given as one
+    list of values per column, plus close() and abort(). Used as a context
+    manager the output is only kept when the block completes (files are
+    written to a temp name and renamed).
+    """
+    suffix = ""
+
+    def __init__(self, filename, columns):
+        self.filename = filename
+        self.columns = columns
+
+    def write_rows(self, rows):
+        self.write_columns([list(values) for values in zip(*rows)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class CsvExporter(Exporter):
+    """
+    Standard CSV with a header row; None is written as an empty field
+    """
+    suffix = ".csv"
+
+    def __init__(self, filename, columns):
+        super().__init__(filename, columns)
+        self._stack = ExitStack()
+        self._file = self._stack.enter_context(open_output(filename, newline=""))
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def write_columns(self, columns):
+        self.write_rows(zip(*columns))
+
+    def close(self):
+        self._stack.close()
+
+    def abort(self):
+        error = RuntimeError("export aborted")
+        self._stack.__exit__(RuntimeError, error, None)
+
+
+class _ArrowFileExporter(Exporter):
+    def __init__(self, filename, columns):
+        _require_pyarrow()
+        super().__init__(filename, columns)
+        self.schema = _arrow_schema(columns)
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._tmp_file = filename + ".tmp"
+        self._writer = self._open(self._tmp_file)
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._tmp_file, self.filename)
+
+    def abort(self):
+        try:
+            self._writer.close()
+        finally:
+            os.remove(self._tmp_file)
+
+
+class ArrowExporter(_ArrowFileExporter):
+    """
+    Arrow IPC file (Feather v2), one record batch per write
+    """
+    suffix = ".arrow"
+
+    def _open(self, path):
+        self._sink = pa.OSFile(path, "wb")
+        return pa.ipc.new_file(self._sink, self.schema)
+
+    def write_columns(self, columns):
+        self._writer.write_batch(_record_batch(self.schema, columns))
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._tmp_file, self.filename)
+
+    def abort(self):
+        try:
+            self._writer.close()
+            self._sink.close()
+        finally:
+            os.remove(self._tmp_file)
+
+
+class ParquetExporter(_ArrowFileExporter):
+    """
+    Parquet (zstd-compressed), one row group per write
+    """
+    suffix = ".parquet"
+
+    def _open(self, path):
+        return pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write_columns(self, columns):
+        batch = _record_batch(self.schema, columns)
+        self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=batch.num_rows)
+
+
+# Format name -> exporter class; add entries to plug in other formats
+EXPORT_FORMATS = {
+    "csv": CsvExporter,
+    "arrow": ArrowExporter,
+    "parquet": ParquetExporter
+}
+
+
+def open_exporter(fmt, filename, columns):
+    """
+    Returns an exporter for `fmt` writing `filename`
+    """
+    try:
+        exporter_class = EXPORT_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format '{fmt}' (use {', '.join(EXPORT_FORMATS)})")
+    return exporter_class(filename, columns)
+
+
+def export_path(directory, name, fmt):
+    return os.path.join(directory, name + EXPORT_FORMATS[fmt].suffix)
+
+
+_base_values = itemgetter(*BASE_HEADERS)
+_api_values = itemgetter(*API_HEADERS)
+
+
+def enriched_row(tx):
+    """
+    Returns the ENRICHED_COLUMNS values of an enriched transaction as a tuple
+    """
+    if isinstance(tx, EnrichedTransaction):
+        try:
+            return _base_values(tx.tx) + _api_values(tx.entry.fields)
+        except KeyError:
+            pass
+    return tuple(tx.get(h) for h in ENRICHED_HEADERS)
+
+
+def enriched_columns(batch):
+    """
+    Returns the ENRICHED_COLUMNS of a batch of enriched transactions as one
+    list of values per column
+    """
+    try:
+        bases = [tx.tx for tx in batch]
+        fields = [tx.entry.fields for tx in batch]
+        return (
+            [[base[h] for base in bases] for h in BASE_HEADERS] +
+            [[f[h] for f in fields] for h in API_HEADERS]
+        )
+    except (AttributeError, KeyError):
+        # Plain dicts or records with missing fields
+        rows = [enriched_row(tx) for tx in batch]
+        return [[row[i] for row in rows] for i in range(len(ENRICHED_COLUMNS))]
+
+
+def iter_export_enriched(enriched_transactions, filename, fmt, batch_size=ROW_GROUP_SIZE):
+    """
+    Exports enriched transactions with typed columns as they stream through
+
+    Yields each transaction unchanged, like iter_save_enriched_data.
+    """
+    with open_exporter(fmt, filename, ENRICHED_COLUMNS) as exporter:
+        batch = []
+        for tx in enriched_transactions:
+            batch.append(tx)
+            if len(batch) >= batch_size:
+                exporter.write_columns(enriched_columns(batch))
+                batch = []
+            yield tx
+
+        if batch:
+            exporter.write_columns(enriched_columns(batch))
+
+
+def export_enriched(enriched_transactions, filename, fmt):
+    for _ in iter_export_enriched(enriched_transactions, filename, fmt):
+        pass
+
+
+def aggregate_tables(aggregates):
+    """
+    Returns the aggregate state as tables: name -> (columns, rows)
+
+    Values are unrounded; rows keep first-seen order (daily is by date).
+    """
+    grand_total = aggregates["revenue"].total
+    regions = aggregates["region"].regions
+    products = aggregates["product"].products
+    customers = aggregates["customer"].customers
+    daily = aggregates["daily"].daily
+
+    return {
+        "region": (
+            [("region", "string"), ("total_sales", "float"),
+             ("transaction_count", "int"), ("percentage", "float")],
+            [
+                (region, data["total_sales"], data["transaction_count"],
+                 data["total_sales"] / grand_total * 100 if grand_total else 0.0)
+                for region, data in regions.items()
+            ]
+        ),
+        "product": (
+            [("product", "string"), ("quantity", "int"), ("revenue", "float")],
+            [(name, data["qty"], data["revenue"]) for name, data in products.items()]
+        ),
+        "customer": (
+            [("customer_id", "string"), ("total_spent", "float"),
+             ("purchase_count", "int"), ("avg_order_value", "float"),
+             ("unique_products", "int")],
+            [
+                (cid, data["total_spent"], data["purchase_count"],
+                 data["total_spent"] / data["purchase_count"], len(data["products"]))
+                for cid, data in customers.items()
+            ]
+        ),
+        "daily": (
+            [("date", "string"), ("revenue", "float"),
+             ("transaction_count", "int"), ("unique_customers", "int")],
+            [
+                (date, daily[date]["revenue"], daily[date]["transaction_count"],
+                 len(daily[date]["customers"]))
+                for date in sorted(daily)
+            ]
+        )
+    }
+
+
+def export_aggregate_tables(aggregates, directory, fmt):
+    """
+    Writes the region/product/customer/daily tables to `directory`
+
+    Returns: list of written files
+    """
+    files = []
+    for name, (columns, rows) in aggregate_tables(aggregates).items():
+        filename = export_path(directory, name, fmt)
+        with open_exporter(fmt, filename, columns) as exporter:
+            if rows:
+                exporter.write_rows(rows)
+        files.append(filename)
+
+    return files
@@ -1,72 +1,295 @@
+import codecs
+import threading
+from itertools import chain, filterfalse
+
+from utils.schema_parser import RecordParser, SALES_SCHEMA
+from utils.output_writer import compile_line_format, open_output, write_lines
+
+
 def save_clean_data(data, output_file):
-    with open(output_file, 'w', encoding='utf-8') as file:
-        for record in data:
-            file.write(str(record) + "\n")
+    """
+    Writes cleaned records as a pipe-delimited sales file (header included),
+    so it can be read back with read_sales_data
+    """
+    fields = [name for name, _ in SALES_SCHEMA]
+    format_line = compile_line_format(fields)
 
-def read_sales_data(filename):
+    with open_output(output_file) as file:
+        file.write("|".join(fields) + "\n")
+        write_lines(file, map(format_line, data))
+
+
+# Raw bytes are read in blocks of this size and decoded incrementally
+READ_BLOCK = 1 << 20
+# Bytes sampled from the start of a file to pick its encoding
+SNIFF_SIZE = 1 << 16
+# Tried in order on the sample; bytes the sniffed encoding can't decode
+# later on are decoded with the next of them that accepts them. latin-1
+# accepts any bytes, so it comes last
+ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+
+def sniff_format(sample):
     """
-    Reads sales data from file handling encoding issues
+    Picks the encoding and line separator of a file from its first bytes
 
-    Returns: list of raw lines (strings)
+    Returns: (encoding, newline)
     """
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        for encoding in ENCODINGS:
+            try:
+                # The sample may end inside a multi-byte character
+                codecs.getincrementaldecoder(encoding)().decode(sample, False)
+                break
+            except UnicodeDecodeError:
+                continue
 
-    encodings = ["utf-8", "latin-1", "cp1252"]
+    # Lines are split on "\n"; a CR left by CRLF endings is dropped with the
+    # surrounding whitespace when fields are parsed
+    newline = "\r" if b"\r" in sample and b"\n" not in sample else "\n"
+    return encoding, newline
 
-    for encoding in encodings:
-        try:
-            with open(filename, "r", encoding=encoding, errors="ignore") as file:
-                lines = file.readlines()
 
-                # Remove header and empty lines
-                cleaned_lines = [
-                    line.strip()
-                    for line in lines[1:]
-                    if line.strip()
-                ]
+def _sniff_file(file):
+    position = file.tell()
+    file.seek(0)
+    sample = file.read(SNIFF_SIZE)
+    file.seek(position)
+    return sniff_format(sample)
+
+
+def _read_blocks(file, size=None):
+    # The rest of the file, or `size` bytes plus the rest of the line they
+    # end in
+    if size is None:
+        yield from iter(lambda: file.read(READ_BLOCK), b"")
+        return
+
+    block = b"\n"
+    while size > 0:
+        block = file.read(min(READ_BLOCK, size))
+        if not block:
+            return
+        size -= len(block)
+        yield block
 
-                return cleaned_lines
+    if not block.endswith(b"\n"):
+        yield file.readline()
 
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
 
+def _fallbacks(encoding):
+    if encoding == "utf-8-sig":
+        encoding = "utf-8"
+    return ENCODINGS[ENCODINGS.index(encoding) + 1:]
+
+
+def _decode_fallback(data, fallbacks):
+    for encoding in fallbacks:
+        try:
+            return data.decode(encoding)
         except UnicodeDecodeError:
             continue
 
-    print("Error: Unable to read file with supported encodings.")
-    return []
 
+def _skip_bom(texts):
+    for text in texts:
+        if text:
+            yield text.removeprefix("\ufeff")
+            break
+    yield from texts
+
+
+def _decode_blocks(blocks, encoding, stats):
+    # Decodes the blocks incrementally. Each run of bytes the encoding
+    # can't decode is decoded on its own with the next of ENCODINGS that
+    # accepts it, and decoding goes on with `encoding` after it (the
+    # sample only covers the start of the file)
+    if encoding == "utf-8-sig":
+        # Decoded as utf-8 so that error offsets count the BOM
+        return _skip_bom(_decode_spans(blocks, "utf-8", encoding, stats))
+    return _decode_spans(blocks, encoding, encoding, stats)
 
-def parse_transactions(raw_lines):
+
+def _decode_function(encoding):
+    # (data, errors, final) -> (text, bytes used). Only utf-8 of ENCODINGS
+    # has multi-byte characters that can be split across blocks
+    if encoding == "utf-8":
+        return codecs.utf_8_decode
+    decode = codecs.getdecoder(encoding)
+    return lambda data, errors, final: decode(data, errors)
+
+
+# What _fallback_error needs of the block being decoded, per thread:
+# (file offset of the block, fallback encodings, stats)
+_decoding = threading.local()
+
+
+def _fallback_error(error):
+    # Codec error handler: decodes the bytes with the next encoding that
+    # accepts them and counts them
+    start, fallbacks, stats = _decoding.block
+    raw = error.object[error.start:error.end]
+    stats.setdefault("fallback_at", start + error.start)
+    stats["replaced_bytes"] += len(raw)
+    return _decode_fallback(raw, fallbacks), error.end
+
+
+codecs.register_error("sales_fallback", _fallback_error)
+
+
+def _decode_spans(blocks, encoding, sniffed, stats):
+    decode = _decode_function(encoding)
+    fallbacks = _fallbacks(encoding)
+    pending = b""
+    total = 0
+    stats["replaced_bytes"] = 0
+
+    for block in chain(blocks, [None]):
+        final = block is None
+        block = block or b""
+        data = pending + block if pending else block
+        # File offset of data[0]
+        _decoding.block = (total - len(pending), fallbacks, stats)
+
+        text, used = decode(data, "sales_fallback", final)
+        yield text
+        pending = data[used:]
+        total += len(block)
+
+    stats.update({"encoding": sniffed, "bytes": total})
+
+
+def _iter_line_blocks(file, encoding, newline, stats, size=None):
+    # Yields the lines read from the current position as one list per block
+    pending = ""
+
+    for text in _decode_blocks(_read_blocks(file, size), encoding, stats):
+        lines = (pending + text).split(newline)
+        pending = lines.pop()
+        yield lines
+
+    yield [pending]
+
+
+def _non_blank(lines):
+    return filterfalse(str.isspace, filter(None, lines))
+
+
+def iter_sales_data(filename, stats=None):
     """
-    Parses raw lines into clean list of dictionaries
+    Streams sales data lines from file, skipping the header and blank lines
+
+    The encoding (utf-8, cp1252 or latin-1) is sniffed from the start of the
+    file, which is then read in large blocks and decoded incrementally.
+    Bytes further on that don't decode are decoded with the next encoding,
+    and the rest with the sniffed one again. If `stats` is given it
+    receives the encoding, the bytes read, the number of bytes decoded
+    with a fallback ("replaced_bytes") and the offset of the first one
+    ("fallback_at").
+
+    Yields: raw lines (strings); the parser strips surrounding whitespace
     """
 
-    transactions = []
+    try:
+        file = open(filename, "rb")
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
 
-    for line in raw_lines:
-        try:
-            parts = line.split("|")
+    if stats is None:
+        stats = {}
 
-            if len(parts) != 8:
-                continue
+    with file:
+        encoding, newline = _sniff_file(file)
+        header = True
 
-            transaction = {
-                "TransactionID": parts[0].strip(),
-                "Date": parts[1].strip(),
-                "ProductID": parts[2].strip(),
-                "ProductName": parts[3].replace(",", "").strip(),
-                "Quantity": int(parts[4].replace(",", "").strip()),
-                "UnitPrice": float(parts[5].replace(",", "").strip()),
-                "CustomerID": parts[6].strip(),
-                "Region": parts[7].strip()
-            }
+        for lines in _iter_line_blocks(file, encoding, newline, stats):
+            lines = _non_blank(lines)
+            if header:
+                header = next(lines, None) is None
+            yield from lines
 
-            transactions.append(transaction)
+    if stats.get("replaced_bytes"):
+        print(
+            f"Warning: '{filename}' has {stats['replaced_bytes']} bytes that are not valid "
+            f"{encoding} (first at byte {stats['fallback_at']}); decoded them as "
+            f"{' or '.join(_fallbacks(encoding))}"
+        )
 
-        except ValueError:
-            continue
-        except Exception:
-            continue
 
-    return transactions
+def iter_sales_data_range(filename, start, end, stats=None):
+    """
+    Streams the non-blank lines in a byte range of the file
+
+    `start` must be at a line boundary; lines starting before `end` are read.
+    The encoding is sniffed from the start of the file, as in iter_sales_data.
+    """
+
+    if stats is None:
+        stats = {}
+
+    with open(filename, "rb") as file:
+        encoding, newline = _sniff_file(file)
+        if encoding == "utf-8-sig" and start > 0:
+            encoding = "utf-8"  # the BOM is only at the start of the file
+        file.seek(start)
+
+        for lines in _iter_line_blocks(file, encoding, newline, stats, max(end - start, 0)):
+            yield from _non_blank(lines)
+
+
+def read_sales_data(filename):
+    """
+    Reads sales data from file handling encoding issues
+
+    Returns: list of raw lines (strings)
+    """
+
+    return list(iter_sales_data(filename))
+
+
+def load_transactions(filename, persist=True):
+    """
+    Parses a sales file once and reuses a binary sidecar cache on later
+    runs while the file is unchanged (see utils/parse_cache.py);
+    persist=False keeps the sidecar for this run only
+
+    Returns: iterable of transaction dicts with `read`, `parsed`,
+    `rejections` and `filter_options`, or None if the file can't be cached
+    """
+
+    from utils.parse_cache import cached_transactions
+    return cached_transactions(filename, persist=persist)
+
+
+def iter_transactions(raw_lines, parser=None):
+    """
+    Parses raw lines into transaction dictionaries one at a time
+
+    Pass a RecordParser to read its rejection counters afterwards.
+    """
+
+    if parser is None:
+        parser = RecordParser()
+
+    return parser.iter_parse(raw_lines)
+
+
+def parse_transactions(raw_lines, columnar=False, parser=None):
+    """
+    Parses raw lines into clean list of dictionaries
+
+    With columnar=True returns a NumPy-backed TransactionColumns store
+    instead (see utils/columnar.py).
+    """
+
+    if columnar:
+        from utils.columnar import build_columns
+        return build_columns(raw_lines, parser)
+
+    if parser is None:
+        parser = RecordParser()
+
+    return parser.parse(raw_lines)
@@ -0,0 +1,282 @@
+import hashlib
+import os
+import pickle
+from collections import deque
+
+from utils.file_handler import iter_sales_data_range, iter_transactions
+from utils.data_handler import iter_valid_transactions
+from utils.api_handler import (
+    EnrichmentIndex,
+    iter_enriched_data,
+    iter_save_enriched_data
+)
+from utils.data_processor import (
+    aggregate_transactions,
+    default_accumulators,
+    merge_aggregates
+)
+
+CHECKPOINT_FILE = "data/sales_checkpoint.pkl"
+CHECKPOINT_VERSION = 5
+FINGERPRINT_BYTES = 4096
+# Distinct TransactionIDs remembered for deduplication. The checkpoint
+# keeps only this many of the most recent ones (tens of MB), so it no
+# longer grows with the whole history; a re-delivery older than the window
+# is counted again.
+DEDUPE_WINDOW = 1_000_000
+
+
+class RecentIds:
+    """
+    The last `size` distinct TransactionIDs added; the oldest is evicted
+    first
+    """
+
+    def __init__(self, size=DEDUPE_WINDOW):
+        self.size = size
+        self.ids = set()
+        self.order = deque()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, tid):
+        return tid in self.ids
+
+    def add(self, tid):
+        if tid in self.ids:
+            return
+        self.ids.add(tid)
+        self.order.append(tid)
+        if len(self.order) > self.size:
+            self.ids.discard(self.order.popleft())
+
+
+def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """
+    Loads the incremental processing checkpoint (or None)
+    """
+    try:
+        with open(checkpoint_file, "rb") as file:
+            state = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Checkpoint Warning: ignoring unreadable {checkpoint_file}: {e}")
+        return None
+
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+        return None
+
+    return state
+
+
+def save_checkpoint(state, checkpoint_file=CHECKPOINT_FILE):
+    """
+    Writes the checkpoint atomically (temp file + rename)
+    """
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def _fingerprint(filename, offset):
+    # Hashes of the start of the file and of the bytes just before the
+    # checkpoint offset; if either changes the file was rewritten
+    with open(filename, "rb") as file:
+        head = file.read(min(offset, FINGERPRINT_BYTES))
+        file.seek(max(0, offset - FINGERPRINT_BYTES))
+        tail = file.read(offset - max(0, offset - FINGERPRINT_BYTES))
+
+    return hashlib.sha1(head).hexdigest(), hashlib.sha1(tail).hexdigest()
+
+
+def _data_start(filename):
+    with open(filename, "rb") as file:
+        file.readline()  # skip header
+        return file.tell()
+
+
+def complete_lines_end(filename, start):
+    """
+    Returns the offset just past the last newline at or after `start`, so a
+    line that is still being appended is left for the next run
+    """
+    with open(filename, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        pos = file.tell()
+
+        while pos > start:
+            block_start = max(start, pos - 65536)
+            file.seek(block_start)
+            block = file.read(pos - block_start)
+
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return block_start + newline + 1
+
+            pos = block_start
+
+    return start
+
+
+def _fresh_state(filename, product_mapping, approximate, percentiles):
+    aggregates = {acc.name: acc for acc in default_accumulators(approximate, percentiles)}
+    aggregates["enrichment"] = EnrichmentIndex(product_mapping)
+
+    return {
+        "version": CHECKPOINT_VERSION,
+        "source": os.path.abspath(filename),
+        "offset": _data_start(filename),
+        "fingerprint": None,
+        "approximate": approximate,
+        "percentiles": percentiles,
+        "aggregates": aggregates,
+        "seen_ids": RecentIds(),
+        "stats": {
+            "total_input": 0,
+            "invalid": 0,
+            "filtered_by_region": 0,
+            "filtered_by_amount": 0,
+            "final_count": 0,
+            "duplicates": 0
+        }
+    }
+
+
+def _is_continuation(state, filename, approximate, percentiles):
+    if state is None or state["source"] != os.path.abspath(filename):
+        return False
+    if state["approximate"] != approximate or state["percentiles"] != percentiles:
+        return False
+    if os.path.getsize(filename) < state["offset"]:
+        return False
+    return state["fingerprint"] == _fingerprint(filename, state["offset"])
+
+
+def apply_increment(state, filename, product_mapping, enriched_file=None,
+                    approximate=False, percentiles=False):
+    """
+    Processes the lines appended since `state` (from load_checkpoint or a
+    previous call) and merges them into it
+
+    A missing state, or one for a truncated/rewritten file or another mode,
+    is replaced by a fresh one and the file is processed from the start.
+    Long-running callers can keep the state in memory between calls.
+
+    Returns: (state, number of new lines read)
+    """
+    resumed = _is_continuation(state, filename, approximate, percentiles)
+
+    if not resumed:
+        state = _fresh_state(filename, product_mapping, approximate, percentiles)
+
+    start = state["offset"]
+    end = complete_lines_end(filename, start)
+
+    aggregates = state["aggregates"]
+    index = aggregates["enrichment"]
+    index.product_mapping = product_mapping
+
+    seen_ids = state["seen_ids"]
+    stats = state["stats"]
+    new_stats = {}
+    new_lines = 0
+    duplicates = 0
+
+    def counted(lines):
+        nonlocal new_lines
+        for line in lines:
+            new_lines += 1
+            yield line
+
+    # Runs after validation, so invalid rows neither register their ID
+    # nor count as duplicates
+    def deduplicated(transactions):
+        nonlocal duplicates
+        for tx in transactions:
+            tid = tx["TransactionID"]
+            if tid in seen_ids:
+                duplicates += 1
+                continue
+            seen_ids.add(tid)
+            yield tx
+
+    transactions = deduplicated(iter_valid_transactions(
+        iter_transactions(counted(iter_sales_data_range(filename, start, end))),
+        stats=new_stats
+    ))
+    enriched = iter_enriched_data(transactions, index)
+
+    if enriched_file:
+        enriched = iter_save_enriched_data(
+            enriched, enriched_file, verbose=False, append=resumed
+        )
+
+    delta = aggregate_transactions(enriched, default_accumulators(approximate, percentiles))
+    merge_aggregates(aggregates, delta)
+
+    # Duplicates passed validation, so they were counted as final rows
+    new_stats["final_count"] -= duplicates
+    new_stats["duplicates"] = duplicates
+    for key, value in new_stats.items():
+        stats[key] += value
+
+    state["offset"] = end
+    state["fingerprint"] = _fingerprint(filename, end)
+
+    return state, new_lines
+
+
+def enriched_file_size(enriched_file):
+    """
+    Returns the size of the enriched file before an update (None if there
+    is none), for truncate_enriched_file to undo a failed update
+    """
+    if enriched_file and os.path.exists(enriched_file):
+        return os.path.getsize(enriched_file)
+    return None
+
+
+def truncate_enriched_file(enriched_file, size):
+    """
+    Cuts off the rows a failed update appended, so retrying it from the
+    last checkpoint doesn't write them twice
+    """
+    if size is not None and os.path.exists(enriched_file) and os.path.getsize(enriched_file) > size:
+        os.truncate(enriched_file, size)
+
+
+def incremental_aggregate(filename, product_mapping,
+                          checkpoint_file=CHECKPOINT_FILE, enriched_file=None,
+                          approximate=False, percentiles=False):
+    """
+    Processes only the lines appended since the last checkpoint
+
+    The merged aggregate state, the byte offset reached and the last
+    DEDUPE_WINDOW TransactionIDs are kept in `checkpoint_file`.
+    Re-delivered transactions (same TransactionID) within that window are
+    skipped. If the file was truncated or rewritten
+    the state is rebuilt from scratch. New enriched rows are appended to
+    `enriched_file`. Switching `approximate` (HyperLogLog distinct counts)
+    or `percentiles` (order value sketches) also rebuilds the state.
+
+    Returns: (aggregates, cumulative stats, number of new lines read)
+    """
+    size = enriched_file_size(enriched_file)
+    try:
+        state, new_lines = apply_increment(
+            load_checkpoint(checkpoint_file),
+            filename,
+            product_mapping,
+            enriched_file=enriched_file,
+            approximate=approximate,
+            percentiles=percentiles
+        )
+        save_checkpoint(state, checkpoint_file)
+    except BaseException:
+        truncate_enriched_file(enriched_file, size)
+        raise
+
+    return state["aggregates"], state["stats"], new_lines
@@ -0,0 +1,211 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Streaming stages are timed per batch of pulled rows, so the timer cost is
+# amortized instead of paid on every row
+BATCH_SIZE = 1024
+
+
+def peak_rss_kb():
+    """
+    Returns the process peak resident set size in KB (None if unavailable)
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def current_rss_kb():
+    """
+    Returns the current resident set size in KB (None where /proc is not
+    available)
+    """
+    if resource is None:
+        return None
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() // 1024
+
+
+class StageStats:
+    """
+    Measurements for one pipeline stage
+    """
+
+    def __init__(self, name, upstream=None):
+        self.name = name
+        self.upstream = upstream
+        self.wall = 0.0
+        self.cpu = 0.0
+        # Upstream time spent while this stage was pulling from it
+        self.nested_wall = 0.0
+        self.nested_cpu = 0.0
+        self.rows_in = None
+        self.rows_out = None
+        self.rss_before_kb = None
+        self.rss_after_kb = None
+        self.traced_peak_bytes = None
+
+    def as_dict(self, exclusive_wall, exclusive_cpu):
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        return {
+            "stage": self.name,
+            "wall_s": round(exclusive_wall, 6),
+            "cpu_s": round(exclusive_cpu, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_per_s": round(rows / exclusive_wall) if rows and exclusive_wall > 0 else None,
+            "rss_kb": self.rss_after_kb,
+            "rss_delta_kb": (
+                self.rss_after_kb - self.rss_before_kb
+                if self.rss_after_kb is not None and self.rss_before_kb is not None else None
+            ),
+            "traced_peak_bytes": self.traced_peak_bytes
+        }
+
+
+class PipelineProfiler:
+    """
+    Records wall/CPU time, row counts and memory for each pipeline stage
+
+    Blocking stages use `stage(name)`; streaming stages are wrapped with
+    `wrap(name, items, upstream=...)`. A wrapped stage's time includes the
+    stages it pulls from, so the upstream time that elapsed inside it is
+    subtracted when reporting. When disabled, both are no-ops.
+
+    Each stage records the current RSS when it ends and its change since
+    the stage started (rss_kb, rss_delta_kb); streaming stages run
+    interleaved, so the growth of a chain shows in each of its stages.
+    The process peak RSS is reported once for the whole run.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _new_stage(self, name, upstream=None):
+        stats = StageStats(name, upstream)
+        self.stages[name] = stats
+        return stats
+
+    @contextmanager
+    def stage(self, name, upstream=None):
+        """
+        Measures a block; the caller may set rows_in/rows_out on the
+        yielded StageStats
+        """
+        if not self.enabled:
+            yield StageStats(name)
+            return
+
+        stats = self._new_stage(name, upstream)
+        upstream_stats = self.stages.get(upstream)
+        if upstream_stats is not None:
+            nested = (upstream_stats.wall, upstream_stats.cpu)
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        stats.rss_before_kb = current_rss_kb()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.process_time() - cpu
+            if upstream_stats is not None:
+                stats.nested_wall += upstream_stats.wall - nested[0]
+                stats.nested_cpu += upstream_stats.cpu - nested[1]
+            stats.rss_after_kb = current_rss_kb()
+            if self.trace_memory:
+                stats.traced_peak_bytes = tracemalloc.get_traced_memory()[1] - traced_before
+
+    def wrap(self, name, items, upstream=None):
+        """
+        Wraps a streaming stage, counting the rows it yields
+        """
+        if not self.enabled:
+            return items
+        return self._wrapped(
+            self._new_stage(name, upstream), self.stages.get(upstream), iter(items)
+        )
+
+    def _wrapped(self, stats, upstream, items):
+        stats.rows_out = 0
+        stats.rss_before_kb = current_rss_kb()
+
+        while True:
+            if upstream is not None:
+                nested_wall, nested_cpu = upstream.wall, upstream.cpu
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            batch = list(islice(items, BATCH_SIZE))
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.process_time() - cpu
+            if upstream is not None:
+                stats.nested_wall += upstream.wall - nested_wall
+                stats.nested_cpu += upstream.cpu - nested_cpu
+
+            if not batch:
+                break
+
+            stats.rows_out += len(batch)
+            yield from batch
+
+        stats.rss_after_kb = current_rss_kb()
+
+    def profile(self, **parameters):
+        """
+        Returns the run profile as a JSON-serializable dict
+        """
+        stages = []
+        for stats in self.stages.values():
+            upstream = self.stages.get(stats.upstream)
+            if upstream is not None and stats.rows_in is None:
+                stats.rows_in = upstream.rows_out
+            wall = stats.wall - stats.nested_wall
+            cpu = stats.cpu - stats.nested_cpu
+            stages.append(stats.as_dict(max(wall, 0.0), max(cpu, 0.0)))
+
+        return {
+            "started_at": self.started_at,
+            "total_wall_s": round(time.perf_counter() - self.started, 6),
+            "process_peak_rss_kb": peak_rss_kb(),
+            "parameters": parameters,
+            "stages": stages
+        }
+
+    def write(self, filename, **parameters):
+        """
+        Writes the run profile as JSON
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(self.profile(**parameters), file, indent=2)
+
+        if self.trace_memory:
+            tracemalloc.stop()
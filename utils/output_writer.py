@@ -0,0 +1,124 @@
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from operator import itemgetter
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst output
+    zstandard = None
+
+# Large buffers so output reaches the OS in a few big writes
+WRITE_BUFFER = 1 << 20
+# Formatted lines are handed to writelines() in batches of this many rows
+WRITE_BATCH = 4096
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def compression_for(filename):
+    """
+    Returns the compression implied by the file suffix (None for plain text)
+    """
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(filename)[1])
+
+
+def _check_compression(compression):
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(f"Unknown compression '{compression}' (use gzip or zstd)")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd output requires the 'zstandard' package")
+
+
+def _compressed(raw, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+    return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+
+
+@contextmanager
+def open_output(filename, compression=None, append=False, encoding="utf-8", newline=None):
+    """
+    Opens a text output file with a large write buffer
+
+    The content goes to `<filename>.tmp` and is renamed over `filename` only
+    once it has been written completely, so readers never see a half-written
+    file; on error the temp file is removed. append=True writes in place.
+
+    compression: None, "gzip" or "zstd"; by default it follows the file
+    suffix (.gz, .zst).
+    """
+    compression = compression or compression_for(filename)
+    _check_compression(compression)
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    path = filename if append else filename + ".tmp"
+    raw = open(path, "ab" if append else "wb", buffering=WRITE_BUFFER)
+    stream = _compressed(raw, compression) if compression else raw
+    text = io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+    try:
+        yield text
+        text.close()
+        if stream is not raw:
+            raw.close()
+    except BaseException:
+        text.close()
+        raw.close()
+        if not append:
+            os.remove(path)
+        raise
+
+    if not append:
+        os.replace(path, filename)
+
+
+def compile_line_format(fields, delimiter="|", suffix=False):
+    """
+    Returns format_line(record) -> "v1|v2|...|vn\n"
+
+    The field values are fetched with one itemgetter call and %-formatted
+    into a "%s|%s|..." template, which is much faster than joining str()
+    of each value. With suffix=True it is format_line(record, suffix) and
+    the pre-formatted suffix text (e.g. shared enrichment columns) is
+    appended as the last column.
+    """
+    fields = list(fields)
+    if len(fields) == 1:
+        def get(record, name=fields[0]):
+            return (record[name],)
+    else:
+        get = itemgetter(*fields)
+    template = delimiter.replace("%", "%%").join(["%s"] * len(fields))
+
+    if suffix:
+        template += delimiter.replace("%", "%%")
+
+        def format_line(record, suffix):
+            return template % get(record) + suffix + "\n"
+    else:
+        template += "\n"
+
+        def format_line(record):
+            return template % get(record)
+
+    return format_line
+
+
+def write_lines(file, lines, batch_size=WRITE_BATCH):
+    """
+    Writes an iterable of lines with batched writelines calls
+    """
+    batch = []
+    append = batch.append
+    for line in lines:
+        append(line)
+        if len(batch) >= batch_size:
+            file.writelines(batch)
+            batch.clear()
+    if batch:
+        file.writelines(batch)
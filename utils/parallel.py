@@ -0,0 +1,205 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.file_handler import iter_sales_data_range, iter_transactions
+from utils.data_handler import iter_valid_transactions
+from utils.schema_parser import RecordParser
+from utils.api_handler import (
+    ENRICHED_HEADER_LINE,
+    EnrichmentIndex,
+    iter_enriched_data,
+    iter_save_enriched_data
+)
+from utils.data_processor import (
+    aggregate_transactions,
+    default_accumulators,
+    merge_aggregates
+)
+from utils.output_writer import open_output
+
+
+def split_file(filename, chunks):
+    """
+    Splits a sales file into byte ranges that start and end on line boundaries
+
+    The header line is excluded from the first range.
+
+    Returns: list of (start, end) byte offsets
+    """
+    size = os.path.getsize(filename)
+
+    with open(filename, "rb") as file:
+        file.readline()  # skip header
+        data_start = file.tell()
+
+        bounds = [data_start]
+        step = (size - data_start) // max(chunks, 1)
+
+        for k in range(1, chunks):
+            file.seek(data_start + k * step)
+            file.readline()  # move to the start of the next full line
+            bounds.append(min(file.tell(), size))
+
+    bounds.append(size)
+    bounds = sorted(set(bounds))
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _scan_chunk(task):
+    filename, start, end = task
+    read = 0
+    parsed = 0
+    regions = set()
+    min_seen = None
+    max_seen = None
+
+    def counted(lines):
+        nonlocal read
+        for line in lines:
+            read += 1
+            yield line
+
+    parser = RecordParser()
+    lines = counted(iter_sales_data_range(filename, start, end))
+
+    for t in iter_transactions(lines, parser):
+        parsed += 1
+        if t.get("Region"):
+            regions.add(t["Region"])
+        if t.get("Quantity") and t.get("UnitPrice"):
+            amount = t["Quantity"] * t["UnitPrice"]
+            if min_seen is None or amount < min_seen:
+                min_seen = amount
+            if max_seen is None or amount > max_seen:
+                max_seen = amount
+
+    return read, parsed, regions, min_seen, max_seen, parser.rejections
+
+
+def _aggregate_chunk(task):
+    filename, start, end, filters, product_mapping, part_file, approximate, percentiles = task
+    stats = {}
+
+    transactions = iter_valid_transactions(
+        iter_transactions(iter_sales_data_range(filename, start, end)),
+        stats=stats,
+        **filters
+    )
+    index = None
+
+    if product_mapping is not None:
+        index = EnrichmentIndex(product_mapping)
+        transactions = iter_enriched_data(transactions, index)
+        if part_file:
+            transactions = iter_save_enriched_data(
+                transactions, part_file, header=False, verbose=False
+            )
+
+    aggregates = aggregate_transactions(
+        transactions, default_accumulators(approximate, percentiles)
+    )
+    if index is not None:
+        aggregates["enrichment"] = index
+
+    return aggregates, stats
+
+
+def _map_chunks(func, tasks, workers):
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, tasks))
+
+
+def parallel_scan(filename, workers=None):
+    """
+    Counts lines/records and collects filter options using a process pool
+
+    Returns: dict with read, parsed, rejections, regions, min_amount,
+    max_amount
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(filename, s, e) for s, e in split_file(filename, workers)]
+
+    result = {
+        "read": 0, "parsed": 0, "rejections": {}, "regions": set(),
+        "min_amount": None, "max_amount": None
+    }
+
+    for read, parsed, regions, lo, hi, rejections in _map_chunks(_scan_chunk, tasks, workers):
+        result["read"] += read
+        result["parsed"] += parsed
+        for reason, count in rejections.items():
+            result["rejections"][reason] = result["rejections"].get(reason, 0) + count
+        result["regions"] |= regions
+        if lo is not None and (result["min_amount"] is None or lo < result["min_amount"]):
+            result["min_amount"] = lo
+        if hi is not None and (result["max_amount"] is None or hi > result["max_amount"]):
+            result["max_amount"] = hi
+
+    return result
+
+
+def parallel_aggregate(filename, workers=None, region=None, min_amount=None,
+                       max_amount=None, product_mapping=None, enriched_file=None,
+                       approximate=False, percentiles=False):
+    """
+    Parses, validates, (optionally) enriches and aggregates a sales file in
+    parallel byte-range chunks, then merges the partial aggregates in file
+    order.
+
+    When product_mapping and enriched_file are given, each worker writes its
+    enriched rows to a part file and the parts are concatenated in order.
+    approximate=True uses HyperLogLog distinct counts and percentiles=True
+    adds the order value sketches (see default_accumulators); sketches
+    merge like the exact sets.
+
+    Returns: (aggregates, stats) shaped like the serial streaming pipeline
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_file(filename, workers)
+    filters = {
+        "region": region,
+        "min_amount": min_amount,
+        "max_amount": max_amount
+    }
+
+    part_files = [
+        f"{enriched_file}.part{i}" if enriched_file and product_mapping is not None else None
+        for i in range(len(ranges))
+    ]
+    tasks = [
+        (filename, start, end, filters, product_mapping, part, approximate, percentiles)
+        for (start, end), part in zip(ranges, part_files)
+    ]
+
+    results = _map_chunks(_aggregate_chunk, tasks, workers)
+
+    aggregates = {acc.name: acc for acc in default_accumulators(approximate, percentiles)}
+    if product_mapping is not None:
+        aggregates["enrichment"] = EnrichmentIndex(product_mapping)
+
+    stats = {}
+    for partial, partial_stats in results:
+        merge_aggregates(aggregates, partial)
+        for key, value in partial_stats.items():
+            stats[key] = stats.get(key, 0) + value
+
+    if enriched_file and product_mapping is not None:
+        _concat_parts(part_files, enriched_file)
+
+    return aggregates, stats
+
+
+def _concat_parts(part_files, filename):
+    with open_output(filename) as out:
+        out.write(ENRICHED_HEADER_LINE)
+        for part in part_files:
+            with open(part, "r", encoding="utf-8") as file:
+                shutil.copyfileobj(file, out)
+            os.remove(part)
+
+    print(f"Enriched data saved to {filename}")
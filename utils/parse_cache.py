@@ -0,0 +1,403 @@
+import array
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+from utils.data_handler import FilterOptions
+from utils.file_handler import iter_sales_data
+from utils.schema_parser import INTERNED_FIELDS, RecordParser, SALES_SCHEMA, row_class
+
+# Sidecar layout: magic, header length (uint32 LE), JSON header, then the
+# string dictionary and one block per column, each 8-byte aligned. Offsets
+# in the header are relative to the end of the header.
+CACHE_SUFFIX = ".parsed"
+CACHE_MAGIC = b"SALESPC1"
+CACHE_VERSION = 3
+HASH_BLOCK = 1 << 20
+# Spare header bytes, so a changed source mtime can be written in place
+HEADER_SLACK = 32
+# Rows buffered per column before they are written to disk while parsing
+FLUSH_ROWS = 1 << 16
+
+# Fixed-width columns; interned string columns are stored as uint32 codes
+# into the shared dictionary
+TYPECODES = {"str": "I", "name": "I", "int": "q", "float": "d"}
+# Other string columns (unique IDs) are stored as their UTF-8 bytes plus a
+# uint64 end offset per row, and decoded as rows are read
+TEXT = "text"
+OFFSET_TYPECODE = "Q"
+
+
+def _storage(name, field_type):
+    if TYPECODES[field_type] == "I" and name not in INTERNED_FIELDS:
+        return TEXT
+    return TYPECODES[field_type]
+
+
+def _iter_text(data, ends):
+    start = 0
+    for end in ends:
+        yield str(data[start:end], "utf-8")
+        start = end
+
+
+def cache_file_for(filename):
+    return filename + CACHE_SUFFIX
+
+
+def _file_hash(filename):
+    digest = hashlib.sha1()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class ParsedTransactions:
+    """
+    Parsed transactions backed by the columns of a memory-mapped sidecar
+
+    Iterating yields the same dicts RecordParser produces. `read`, `parsed`
+    and `rejections` carry the counters of the original parse, and
+    `filter_options` the regions and amount range it saw.
+    """
+
+    def __init__(self, schema, columns, strings, parsed, read, rejections, source=None,
+                 filter_options=None):
+        self.schema = schema
+        self.columns = columns
+        self.strings = strings
+        self.parsed = parsed
+        self.read = read
+        self.rejections = rejections
+        self.source = source
+        self.filter_options = filter_options or FilterOptions()
+
+    def __len__(self):
+        return self.parsed
+
+    def __iter__(self):
+        Row = row_class(self.schema)
+        values = []
+        for name, field_type in self.schema:
+            column = self.columns[name]
+            storage = _storage(name, field_type)
+            if storage == TEXT:
+                values.append(_iter_text(*column))
+            elif storage == "I":
+                values.append(map(self.strings.__getitem__, column))
+            else:
+                values.append(column)
+
+        yield from map(vars, map(Row, *values))
+
+
+class _ColumnWriter:
+    """
+    Buffers one column and appends it to a temporary file every FLUSH_ROWS
+    values; text columns write their bytes and end offsets separately
+    """
+
+    def __init__(self, storage):
+        self.text = storage == TEXT
+        self.values = array.array(OFFSET_TYPECODE if self.text else storage)
+        self.file = tempfile.TemporaryFile()
+        if self.text:
+            self.data = tempfile.TemporaryFile()
+            self.chunks = []
+            self.size = 0
+
+    def append_text(self, value):
+        data = value.encode("utf-8")
+        self.chunks.append(data)
+        self.size += len(data)
+        self.values.append(self.size)
+
+    def flush(self):
+        self.values.tofile(self.file)
+        del self.values[:]
+        if self.text:
+            self.data.write(b"".join(self.chunks))
+            self.chunks = []
+
+    def close(self):
+        self.file.close()
+        if self.text:
+            self.data.close()
+
+
+def source_signature(filename):
+    """
+    Returns the size, mtime and SHA-1 that key a sidecar to its source
+    """
+    return dict(_source_key(filename), sha1=_file_hash(filename))
+
+
+def build_parse_cache(filename, schema=SALES_SCHEMA, cache_file=None, source=None):
+    """
+    Parses `filename` straight into its binary sidecar (temp file + rename)
+
+    Columns are written out in blocks of FLUSH_ROWS rows while parsing, so
+    memory is bounded by the dictionary of interned strings, not by the
+    file. `source` is the source_signature() taken before parsing.
+
+    Returns: True if written, False if a number does not fit its
+    fixed-width column
+    """
+    cache_file = cache_file or cache_file_for(filename)
+    source = source or source_signature(filename)
+    parser = RecordParser(schema)
+    read = 0
+
+    def counted(lines):
+        nonlocal read
+        for line in lines:
+            read += 1
+            yield line
+
+    codes = {}
+    strings = []
+    writers = {name: _ColumnWriter(_storage(name, field_type)) for name, field_type in schema}
+    appenders = []
+    for name, field_type in schema:
+        writer = writers[name]
+        if writer.text:
+            append = writer.append_text
+        elif _storage(name, field_type) == "I":
+            def append(value, append=writer.values.append):
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(strings)
+                    strings.append(value)
+                append(code)
+        else:
+            append = writer.values.append
+        appenders.append((name, append))
+
+    options = FilterOptions()
+    rows = 0
+    try:
+        for tx in parser.iter_parse(counted(iter_sales_data(filename))):
+            for name, append in appenders:
+                append(tx[name])
+            options.add(tx)
+            rows += 1
+            if rows % FLUSH_ROWS == 0:
+                for writer in writers.values():
+                    writer.flush()
+
+        _write_sidecar(
+            cache_file, schema, writers, strings, rows, read, parser.rejections, source, options
+        )
+    except OverflowError as e:
+        print(f"Parse Cache Warning: {filename} can't be stored in columns: {e}")
+        return False
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return True
+
+
+def _write_sidecar(cache_file, schema, writers, strings, rows, read, rejections, source,
+                   options):
+    strings_blob = "\n".join(strings).encode("utf-8")
+    blocks = []
+    layout = []
+    offset = _align(len(strings_blob))
+
+    for name, field_type in schema:
+        writer = writers[name]
+        writer.flush()
+        column = {"name": name, "type": field_type, "count": rows}
+        if writer.text:
+            size = writer.data.tell()
+            column["data_offset"] = offset
+            column["data_bytes"] = size
+            blocks.append((writer.data, size))
+            offset += _align(size)
+        size = writer.file.tell()
+        column["offset"] = offset
+        blocks.append((writer.file, size))
+        offset += _align(size)
+        layout.append(column)
+
+    header = json.dumps({
+        "version": CACHE_VERSION,
+        "byteorder": sys.byteorder,
+        "source": source,
+        "read": read,
+        "rejections": rejections,
+        "filter_options": options.as_dict(),
+        "strings": {"count": len(strings), "bytes": len(strings_blob)},
+        "columns": layout
+    }).encode("utf-8") + b" " * HEADER_SLACK
+
+    prefix = CACHE_MAGIC + struct.pack("<I", len(header)) + header
+    tmp_file = cache_file + ".tmp"
+
+    with open(tmp_file, "wb") as file:
+        file.write(prefix + b"\0" * (_align(len(prefix)) - len(prefix)))
+        file.write(strings_blob + b"\0" * (_align(len(strings_blob)) - len(strings_blob)))
+        for block, size in blocks:
+            block.seek(0)
+            shutil.copyfileobj(block, file)
+            file.write(b"\0" * (_align(size) - size))
+
+    os.replace(tmp_file, cache_file)
+
+
+def load_parse_cache(filename, schema=SALES_SCHEMA, cache_file=None):
+    """
+    Memory-maps the sidecar of `filename` if it matches the source file
+
+    The cache is used when the source size and mtime are unchanged; if only
+    the mtime differs the file hash decides, and on a match the new mtime
+    is stored so the next run doesn't hash again. An unreadable, truncated
+    or incomplete sidecar is ignored (and rebuilt by cached_transactions).
+
+    Returns: ParsedTransactions, or None if missing or stale
+    """
+    cache_file = cache_file or cache_file_for(filename)
+
+    try:
+        with open(cache_file, "rb") as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    try:
+        if mm[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            return None
+        start = len(CACHE_MAGIC) + 4
+        (header_len,) = struct.unpack("<I", mm[len(CACHE_MAGIC):start])
+        header = json.loads(mm[start:start + header_len])
+
+        if (
+            header.get("version") != CACHE_VERSION or
+            header["byteorder"] != sys.byteorder or
+            [(c["name"], c["type"]) for c in header["columns"]] != [tuple(f) for f in schema]
+        ):
+            return None
+
+        source = header["source"]
+        current = _source_key(filename)
+        if current["size"] != source["size"]:
+            return None
+        if current["mtime_ns"] != source["mtime_ns"]:
+            if _file_hash(filename) != source["sha1"]:
+                return None
+            _refresh_source_key(cache_file, header, start, header_len, current)
+
+        return _map_columns(mm, header, _align(start + header_len), schema, cache_file)
+    except (struct.error, ValueError, KeyError, TypeError) as e:
+        print(f"Parse Cache Warning: ignoring unreadable {cache_file}: {e!r}")
+        return None
+
+
+def _refresh_source_key(cache_file, header, start, header_len, current):
+    # Rewrites the header in place with the new size/mtime; it is padded
+    # with spaces to its old length, which JSON ignores
+    header = dict(header, source=dict(header["source"], **current))
+    data = json.dumps(header).encode("utf-8")
+    if len(data) > header_len:
+        return
+    try:
+        with open(cache_file, "r+b") as file:
+            file.seek(start)
+            file.write(data.ljust(header_len))
+    except OSError:
+        pass
+
+
+def _map_columns(mm, header, base, schema, cache_file):
+    view = memoryview(mm)
+
+    # Only the interned values are decoded up front
+    strings_end = base + header["strings"]["bytes"]
+    strings = str(view[base:strings_end], "utf-8").split("\n")
+    if header["strings"]["count"] == 0:
+        strings = []
+
+    columns = {}
+    rows = 0
+    for column in header["columns"]:
+        storage = _storage(column["name"], column["type"])
+        typecode = OFFSET_TYPECODE if storage == TEXT else storage
+        begin = base + column["offset"]
+        size = column["count"] * array.array(typecode).itemsize
+        if begin + size > len(view):
+            raise ValueError(f"column {column['name']} runs past the end of the file")
+        values = view[begin:begin + size].cast(typecode)
+        if storage == TEXT:
+            data = base + column["data_offset"]
+            values = view[data:data + column["data_bytes"]], values
+        columns[column["name"]] = values
+        rows = column["count"]
+
+    return ParsedTransactions(
+        schema, columns, strings, rows, header["read"], header["rejections"],
+        source=cache_file, filter_options=FilterOptions(**header["filter_options"])
+    )
+
+
+def cached_transactions(filename, schema=SALES_SCHEMA, cache_file=None, persist=True):
+    """
+    Returns the parsed transactions of `filename` from its binary sidecar,
+    parsing the file into the sidecar first unless it is current
+
+    persist=False parses into a temporary sidecar that is removed once
+    mapped, so the rows can be replayed without parsing again on this run
+    only.
+
+    Returns None if the file is missing or can't be cached.
+    """
+    if not os.path.exists(filename):
+        return None
+
+    if not persist:
+        return _spooled_transactions(filename, schema)
+
+    parsed = load_parse_cache(filename, schema, cache_file)
+    if parsed is not None:
+        return parsed
+
+    source = source_signature(filename)
+    try:
+        if not build_parse_cache(filename, schema, cache_file, source):
+            return None
+    except OSError as e:
+        print(f"Parse Cache Warning: could not write cache for {filename}: {e}")
+        return None
+
+    # None if the file changed while it was parsed
+    return load_parse_cache(filename, schema, cache_file)
+
+
+def _spooled_transactions(filename, schema):
+    fd, cache_file = tempfile.mkstemp(suffix=CACHE_SUFFIX)
+    os.close(fd)
+    try:
+        if not build_parse_cache(filename, schema, cache_file):
+            return None
+        # The mapping stays readable after the file is removed
+        return load_parse_cache(filename, schema, cache_file)
+    finally:
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
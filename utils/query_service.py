@@ -0,0 +1,402 @@
+import json
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils.file_handler import iter_sales_data, iter_transactions, load_transactions
+from utils.data_handler import FilterIndex, iter_valid_transactions
+from utils.api_handler import EnrichmentIndex
+from utils.data_processor import (
+    CustomerAccumulator,
+    DailyAccumulator,
+    ProductAccumulator,
+    RegionAccumulator,
+    RevenueAccumulator,
+    aggregate_transactions,
+    daily_sales_trend,
+    date_rollups,
+    region_wise_sales,
+    top_customers,
+    top_selling_products,
+)
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8766
+# Responses kept per service; aggregates of filtered data are cached
+# separately (a quarter as many), since every view of a filter shares them
+CACHE_SIZE = 1024
+# Seconds between checks of the source file's size/mtime
+POLL_INTERVAL = 0.5
+
+# Query parameters and their types
+FILTER_PARAMS = {
+    "region": str,
+    "min_amount": float,
+    "max_amount": float,
+    "start": str,
+    "end": str
+}
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss counters
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _file_key(filename):
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class SalesSnapshot:
+    """
+    Validated transactions of one version of the source file, with the
+    filter index, enrichment and unfiltered aggregates built once
+    """
+
+    def __init__(self, filename, product_mapping, version):
+        self.version = version
+        self.file_key = _file_key(filename)
+
+        parsed = load_transactions(filename)
+        if parsed is None:
+            parsed = iter_transactions(iter_sales_data(filename))
+
+        self.stats = {}
+        self.index = FilterIndex(iter_valid_transactions(parsed, stats=self.stats))
+        self.product_mapping = product_mapping
+        self.aggregates = self.aggregate(self.index.transactions)
+
+    def aggregate(self, transactions):
+        # Only what the views read (no order value sketches). The enrichment
+        # index acts as an accumulator (as in batch mode), so match counts
+        # come without building enriched views.
+        return aggregate_transactions(transactions, [
+            RevenueAccumulator(),
+            RegionAccumulator(),
+            ProductAccumulator(),
+            CustomerAccumulator(),
+            DailyAccumulator(),
+            EnrichmentIndex(self.product_mapping)
+        ])
+
+    def select(self, region=None, min_amount=None, max_amount=None, start=None, end=None):
+        """
+        Returns the transactions matching the filters; dates are
+        YYYY-MM-DD and inclusive
+        """
+        rows, _ = self.index.query(region, min_amount, max_amount)
+        if start is not None:
+            rows = [tx for tx in rows if tx["Date"] >= start]
+        if end is not None:
+            rows = [tx for tx in rows if tx["Date"] <= end]
+        return rows
+
+
+def _summary(aggregates, stats=None):
+    revenue = aggregates["revenue"]
+    enrichment = aggregates["enrichment"]
+    rollups = date_rollups(None, aggregates=aggregates)
+
+    summary = {
+        "total_revenue": round(revenue.total, 2),
+        "transactions": revenue.count,
+        "avg_order_value": round(revenue.total / revenue.count, 2) if revenue.count else 0,
+        "first_date": rollups.first,
+        "last_date": rollups.last,
+        "enriched": enrichment.matched,
+        "enrichment_rate": round(enrichment.matched / enrichment.total * 100, 2) if enrichment.total else 0
+    }
+    if stats is not None:
+        summary["invalid"] = stats["invalid"]
+    return summary
+
+
+# View name -> function(aggregates, n) returning a JSON-serializable result
+VIEWS = {
+    "summary": lambda aggregates, n: _summary(aggregates),
+    "regions": lambda aggregates, n: region_wise_sales(None, aggregates=aggregates),
+    "products": lambda aggregates, n: [
+        {"product": name, "quantity": qty, "revenue": revenue}
+        for name, qty, revenue in top_selling_products(None, n=n, aggregates=aggregates)
+    ],
+    "customers": lambda aggregates, n: [
+        dict(customer_id=cid, **stats)
+        for cid, stats in top_customers(None, n=n, aggregates=aggregates)
+    ],
+    "daily": lambda aggregates, n: daily_sales_trend(None, aggregates=aggregates)
+}
+
+
+class QueryService:
+    """
+    Answers region / top-product / top-customer / daily-trend queries over
+    a sales file kept in memory
+
+    Results are JSON bytes cached per (data version, view, filters, n) in an
+    LRU cache, and aggregates per filter in a second one. A background
+    thread polls the file's size and mtime; when it changes the data is
+    reloaded off the request path and swapped in, and the caches are
+    cleared. Queries keep being served from the previous version until the
+    new one is ready. Safe to call from many threads; concurrent misses on
+    the same filter wait for one computation instead of each repeating it.
+    """
+
+    def __init__(self, filename, product_mapping, cache_size=CACHE_SIZE,
+                 poll_interval=POLL_INTERVAL):
+        self.filename = filename
+        self.product_mapping = product_mapping
+        self.poll_interval = poll_interval
+        self.responses = LRUCache(cache_size)
+        self.filtered = LRUCache(max(1, cache_size // 4))
+        self.reloads = 0
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self.snapshot = SalesSnapshot(filename, product_mapping, version=0)
+        self._stop = threading.Event()
+        self._watcher = None
+
+    # ------------------------------------------------------------------
+    # Source file watching
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._watcher = threading.Thread(target=self._watch, name="sales-file-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last good version
+                print(f"Warning: reloading '{self.filename}' failed: {e}")
+
+    def refresh(self):
+        """
+        Reloads the data if the source file changed; returns True if it did
+        """
+        try:
+            file_key = _file_key(self.filename)
+        except FileNotFoundError:
+            return False
+        if file_key == self.snapshot.file_key:
+            return False
+
+        snapshot = SalesSnapshot(self.filename, self.product_mapping, self.snapshot.version + 1)
+        self.snapshot = snapshot
+        self.responses.clear()
+        self.filtered.clear()
+        self.reloads += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _aggregates(self, snapshot, filters):
+        if not any(value is not None for value in filters.values()):
+            return snapshot.aggregates
+
+        key = (snapshot.version,) + tuple(filters.values())
+        aggregates = self.filtered.get(key)
+        if aggregates is not None:
+            return aggregates
+
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            computing = pending is None
+            if computing:
+                pending = self._pending[key] = Future()
+        if not computing:
+            return pending.result()
+
+        try:
+            aggregates = snapshot.aggregate(snapshot.select(**filters))
+            self.filtered.put(key, aggregates)
+            pending.set_result(aggregates)
+            return aggregates
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._pending_lock:
+                del self._pending[key]
+
+    def query(self, view, filters=None, n=5):
+        """
+        Returns: (JSON bytes, cache hit)
+
+        Raises KeyError for an unknown view.
+        """
+        render = VIEWS[view]
+        filters = dict.fromkeys(FILTER_PARAMS) | (filters or {})
+        snapshot = self.snapshot
+
+        key = (snapshot.version, view, n) + tuple(filters.values())
+        body = self.responses.get(key)
+        if body is not None:
+            return body, True
+
+        aggregates = self._aggregates(snapshot, filters)
+        body = json.dumps({
+            "view": view,
+            "filters": {name: value for name, value in filters.items() if value is not None},
+            "version": snapshot.version,
+            "result": render(aggregates, n)
+        }).encode("utf-8")
+        self.responses.put(key, body)
+        return body, False
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "source": self.filename,
+            "version": snapshot.version,
+            "reloads": self.reloads,
+            "data": _summary(snapshot.aggregates, snapshot.stats),
+            "response_cache": {
+                "size": len(self.responses),
+                "hits": self.responses.hits,
+                "misses": self.responses.misses
+            },
+            "aggregate_cache": {
+                "size": len(self.filtered),
+                "hits": self.filtered.hits,
+                "misses": self.filtered.misses
+            }
+        }
+
+
+def parse_query(query_string):
+    """
+    Returns: (filters dict, n) from a URL query string
+
+    Raises ValueError for malformed or unknown parameters.
+    """
+    filters = {}
+    n = 5
+    for name, values in parse_qs(query_string, strict_parsing=False).items():
+        value = values[-1]
+        if name == "n":
+            n = int(value)
+            if n < 1:
+                raise ValueError("n must be positive")
+        elif name in FILTER_PARAMS:
+            filters[name] = FILTER_PARAMS[name](value)
+        else:
+            raise ValueError(f"Unknown parameter '{name}'")
+    return filters, n
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /<view>?region=&min_amount=&max_amount=&start=&end=&n=, where view
+    is one of VIEWS; GET /stats for cache and reload counters
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive connections
+    # Headers and body are written separately; without TCP_NODELAY the
+    # body waits for the client's delayed ACK (~40 ms per response)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        view = url.path.strip("/")
+        service = self.server.service
+
+        if view != "stats" and view not in VIEWS:
+            self._send_error(404, f"Unknown view '{view}' (use {', '.join(VIEWS)} or stats)")
+            return
+
+        try:
+            filters, n = parse_query(url.query) if view != "stats" else ({}, None)
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+
+        try:
+            if view == "stats":
+                body, hit = json.dumps(service.stats()).encode("utf-8"), None
+            else:
+                body, hit = service.query(view, filters, n)
+        except Exception as e:
+            # A failure past the request checks is the service's, not the
+            # client's: log it and keep serving
+            print(f"Error: GET {self.path} failed: {e!r}")
+            traceback.print_exc()
+            self._send_error(500, "Internal server error")
+        else:
+            self._send(200, body, hit)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def _send(self, status, body, hit=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if hit is not None:
+            self.send_header("X-Cache", "hit" if hit else "miss")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would dominate the cost of cached answers
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops bursts of new connections into a 1 s
+    # SYN retry
+    request_queue_size = 128
+
+
+def make_server(service, host=SERVICE_HOST, port=SERVICE_PORT):
+    """
+    Returns a threaded HTTP server for `service` (call serve_forever())
+    """
+    server = QueryServer((host, port), QueryHandler)
+    server.service = service
+    return server
@@ -1,134 +1,204 @@
 from datetime import datetime
-from collections import defaultdict
 
 from utils.data_processor import (
+    EnrichmentAccumulator,
+    aggregate_transactions,
     calculate_total_revenue,
     region_wise_sales,
     top_selling_products,
-    customer_analysis,
+    top_customers,
     daily_sales_trend,
+    weekly_sales_trend,
+    monthly_sales_trend,
+    date_rollups,
     find_peak_sales_day,
-    low_performing_products
+    low_performing_products,
+    order_value_percentiles
 )
+from utils.output_writer import open_output
 
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt",
+                          aggregates=None, verbose=True):
     """
     Generates a comprehensive formatted text report
-    """
 
-    # Ensure output directory exists
-    import os
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    When `aggregates` (from aggregate_transactions) is given, the report is
+    built from it alone and the transaction lists are not scanned.
+    """
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    total_revenue = calculate_total_revenue(transactions)
-    total_transactions = len(transactions)
+    # Single pass over the data; every section below is a view over it
+    if aggregates is None:
+        aggregates = aggregate_transactions(transactions)
+
+    enrichment = aggregates.get("enrichment")
+    if enrichment is None:
+        enrichment = EnrichmentAccumulator()
+        for t in enriched_transactions:
+            enrichment.add(t, None)
+
+    total_revenue = calculate_total_revenue(transactions, aggregates=aggregates)
+    total_transactions = aggregates["revenue"].count
     avg_order_value = total_revenue / total_transactions if total_transactions else 0
 
-    dates = sorted(t["Date"] for t in transactions)
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
-
-    region_stats = region_wise_sales(transactions)
-    top_products = top_selling_products(transactions, n=5)
-    customers = customer_analysis(transactions)
-    daily_trend = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
-    low_products = low_performing_products(transactions)
-
-    enriched_success = [t for t in enriched_transactions if t.get("API_Match")]
-    enriched_failed = [t for t in enriched_transactions if not t.get("API_Match")]
-
-    with open(output_file, "w", encoding="utf-8") as f:
-
-        # ==================================================
-        # 1. HEADER
-        # ==================================================
-        f.write("=" * 50 + "\n")
-        f.write("          SALES ANALYTICS REPORT\n")
-        f.write(f"        Generated: {now}\n")
-        f.write(f"        Records Processed: {total_transactions}\n")
-        f.write("=" * 50 + "\n\n")
-
-        # ==================================================
-        # 2. OVERALL SUMMARY
-        # ==================================================
-        f.write("OVERALL SUMMARY\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"Total Revenue:        ₹{total_revenue:,.2f}\n")
-        f.write(f"Total Transactions:   {total_transactions}\n")
-        f.write(f"Average Order Value:  ₹{avg_order_value:,.2f}\n")
-        f.write(f"Date Range:           {date_range}\n\n")
-
-        # ==================================================
-        # 3. REGION-WISE PERFORMANCE
-        # ==================================================
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"{'Region':<10}{'Sales':<15}{'% of Total':<15}{'Transactions'}\n")
-        for region, stats in region_stats.items():
-            f.write(
-                f"{region:<10}₹{stats['total_sales']:,.2f}   "
-                f"{stats['percentage']:>6.2f}%        {stats['transaction_count']}\n"
-            )
-        f.write("\n")
-
-        # ==================================================
-        # 4. TOP 5 PRODUCTS
-        # ==================================================
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"{'Rank':<6}{'Product':<25}{'Qty Sold':<12}{'Revenue'}\n")
-        for idx, (name, qty, rev) in enumerate(top_products, start=1):
-            f.write(f"{idx:<6}{name:<25}{qty:<12}₹{rev:,.2f}\n")
-        f.write("\n")
-
-        # ==================================================
-        # 5. TOP 5 CUSTOMERS
-        # ==================================================
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"{'Rank':<6}{'Customer ID':<15}{'Total Spent':<15}{'Orders'}\n")
-        for idx, (cid, stats) in enumerate(list(customers.items())[:5], start=1):
-            f.write(
-                f"{idx:<6}{cid:<15}₹{stats['total_spent']:,.2f}   {stats['purchase_count']}\n"
-            )
-        f.write("\n")
-
-        # ==================================================
-        # 6. DAILY SALES TREND
-        # ==================================================
-        f.write("DAILY SALES TREND\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"{'Date':<12}{'Revenue':<15}{'Txns':<10}{'Customers'}\n")
-        for date, stats in daily_trend.items():
-            f.write(
-                f"{date:<12}₹{stats['revenue']:,.2f}   "
+    rollups = date_rollups(transactions, aggregates=aggregates)
+    dates = aggregates["daily"].daily
+    if rollups.first:
+        date_range = f"{rollups.first} to {rollups.last}"
+    else:
+        date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
+
+    region_stats = region_wise_sales(transactions, aggregates=aggregates)
+    top_products = top_selling_products(transactions, n=5, aggregates=aggregates)
+    customers = top_customers(transactions, n=5, aggregates=aggregates)
+    daily_trend = daily_sales_trend(transactions, aggregates=aggregates)
+    weekly_trend = weekly_sales_trend(transactions, aggregates=aggregates)
+    monthly_trend = monthly_sales_trend(transactions, aggregates=aggregates)
+    peak_day = find_peak_sales_day(transactions, aggregates=aggregates)
+    low_products = low_performing_products(transactions, aggregates=aggregates)
+    # Only kept when asked for (default_accumulators(percentiles=True))
+    percentiles = None
+    if "order_values" in aggregates:
+        percentiles = order_value_percentiles(transactions, aggregates=aggregates)
+
+    # The report is assembled in memory and written in one go, replacing
+    # the previous report only once complete
+    lines = []
+    write = lines.append
+
+    # ==================================================
+    # 1. HEADER
+    # ==================================================
+    write("=" * 50 + "\n")
+    write("          SALES ANALYTICS REPORT\n")
+    write(f"        Generated: {now}\n")
+    write(f"        Records Processed: {total_transactions}\n")
+    write("=" * 50 + "\n\n")
+
+    # ==================================================
+    # 2. OVERALL SUMMARY
+    # ==================================================
+    write("OVERALL SUMMARY\n")
+    write("-" * 50 + "\n")
+    write(f"Total Revenue:        ₹{total_revenue:,.2f}\n")
+    write(f"Total Transactions:   {total_transactions}\n")
+    write(f"Average Order Value:  ₹{avg_order_value:,.2f}\n")
+    write(f"Date Range:           {date_range}\n\n")
+
+    # ==================================================
+    # 3. REGION-WISE PERFORMANCE
+    # ==================================================
+    write("REGION-WISE PERFORMANCE\n")
+    write("-" * 50 + "\n")
+    write(f"{'Region':<10}{'Sales':<15}{'% of Total':<15}{'Transactions'}\n")
+    for region, stats in region_stats.items():
+        write(
+            f"{region:<10}₹{stats['total_sales']:,.2f}   "
+            f"{stats['percentage']:>6.2f}%        {stats['transaction_count']}\n"
+        )
+    write("\n")
+
+    # ==================================================
+    # 4. TOP 5 PRODUCTS
+    # ==================================================
+    write("TOP 5 PRODUCTS\n")
+    write("-" * 50 + "\n")
+    write(f"{'Rank':<6}{'Product':<25}{'Qty Sold':<12}{'Revenue'}\n")
+    for idx, (name, qty, rev) in enumerate(top_products, start=1):
+        write(f"{idx:<6}{name:<25}{qty:<12}₹{rev:,.2f}\n")
+    write("\n")
+
+    # ==================================================
+    # 5. TOP 5 CUSTOMERS
+    # ==================================================
+    write("TOP 5 CUSTOMERS\n")
+    write("-" * 50 + "\n")
+    write(f"{'Rank':<6}{'Customer ID':<15}{'Total Spent':<15}{'Orders'}\n")
+    for idx, (cid, stats) in enumerate(customers, start=1):
+        write(
+            f"{idx:<6}{cid:<15}₹{stats['total_spent']:,.2f}   {stats['purchase_count']}\n"
+        )
+    write("\n")
+
+    # ==================================================
+    # 6. DAILY SALES TREND
+    # ==================================================
+    write("DAILY SALES TREND\n")
+    write("-" * 50 + "\n")
+    write(f"{'Date':<12}{'Revenue':<15}{'Txns':<10}{'Customers'}\n")
+    for date, stats in daily_trend.items():
+        write(
+            f"{date:<12}₹{stats['revenue']:,.2f}   "
+            f"{stats['transaction_count']:<10}{stats['unique_customers']}\n"
+        )
+    if getattr(aggregates["daily"], "approximate", False):
+        write("(Customer counts are HyperLogLog estimates, about ±2%)\n")
+    write("\n")
+
+    # ==================================================
+    # 7. WEEKLY AND MONTHLY SALES TREND
+    # ==================================================
+    for title, label, trend in (
+        ("WEEKLY SALES TREND", "Week", weekly_trend),
+        ("MONTHLY SALES TREND", "Month", monthly_trend)
+    ):
+        write(f"{title}\n")
+        write("-" * 50 + "\n")
+        write(f"{label:<10}{'Start':<12}{'Days':<6}{'Revenue':<20}{'Txns':<10}{'Customers'}\n")
+        for key, stats in trend.items():
+            revenue = f"₹{stats['revenue']:,.2f}"
+            write(
+                f"{key:<10}{stats['start']:<12}{stats['days']:<6}{revenue:<20}"
                 f"{stats['transaction_count']:<10}{stats['unique_customers']}\n"
             )
-        f.write("\n")
-
-        # ==================================================
-        # 7. PRODUCT PERFORMANCE ANALYSIS
-        # ==================================================
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("-" * 50 + "\n")
-        f.write(f"Best Sales Day: {peak_day[0]} | Revenue: ₹{peak_day[1]:,.2f} | Orders: {peak_day[2]}\n\n")
-        f.write("Low Performing Products:\n")
-        for name, qty, rev in low_products:
-            f.write(f"- {name} (Qty: {qty}, Revenue: ₹{rev:,.2f})\n")
-        f.write("\n")
-
-        # ==================================================
-        # 8. API ENRICHMENT SUMMARY
-        # ==================================================
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("-" * 50 + "\n")
-        success_rate = (len(enriched_success) / len(enriched_transactions) * 100) if enriched_transactions else 0
-        f.write(f"Total Records Enriched: {len(enriched_success)}\n")
-        f.write(f"Enrichment Success Rate: {success_rate:.2f}%\n")
-        f.write("Failed Product IDs:\n")
-        for t in enriched_failed:
-            f.write(f"- {t['ProductID']}\n")
-
-    print(f"Report generated successfully: {output_file}")
+        write("\n")
+    if rollups.unparsed:
+        write(f"({len(rollups.unparsed)} dates not in YYYY-MM-DD form are left out of the weekly/monthly trend)\n\n")
+
+    # ==================================================
+    # 8. ORDER VALUE PERCENTILES
+    # ==================================================
+    if percentiles is not None:
+        write("ORDER VALUE PERCENTILES\n")
+        write("-" * 50 + "\n")
+        write(f"{'':<12}{'p50':<15}{'p95':<15}{'p99'}\n")
+        for group in ("regions", "daily"):
+            for key, values in percentiles[group].items():
+                p50, p95, p99 = (f"₹{v:,.2f}" for v in values.values())
+                write(f"{key:<12}{p50:<15}{p95:<15}{p99}\n")
+            write("\n")
+
+    # ==================================================
+    # 9. PRODUCT PERFORMANCE ANALYSIS
+    # ==================================================
+    write("PRODUCT PERFORMANCE ANALYSIS\n")
+    write("-" * 50 + "\n")
+    if peak_day:
+        write(f"Best Sales Day: {peak_day[0]} | Revenue: ₹{peak_day[1]:,.2f} | Orders: {peak_day[2]}\n\n")
+    else:
+        write("Best Sales Day: N/A\n\n")
+    write("Low Performing Products:\n")
+    for name, qty, rev in low_products:
+        write(f"- {name} (Qty: {qty}, Revenue: ₹{rev:,.2f})\n")
+    write("\n")
+
+    # ==================================================
+    # 10. API ENRICHMENT SUMMARY
+    # ==================================================
+    write("API ENRICHMENT SUMMARY\n")
+    write("-" * 50 + "\n")
+    success_rate = (enrichment.matched / enrichment.total * 100) if enrichment.total else 0
+    write(f"Total Records Enriched: {enrichment.matched}\n")
+    write(f"Enrichment Success Rate: {success_rate:.2f}%\n")
+    write("Failed Product IDs:\n")
+    lines.extend(
+        f"- {product_id} ({count} rows)\n"
+        for product_id, count in enrichment.failed_counts.items()
+    )
+
+    with open_output(output_file) as f:
+        f.writelines(lines)
+
+    if verbose:
+        print(f"Report generated successfully: {output_file}")
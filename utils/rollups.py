@@ -0,0 +1,133 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from functools import lru_cache
+from itertools import accumulate
+
+
+@lru_cache(maxsize=4096)
+def date_ordinal(text):
+    """
+    Parses a YYYY-MM-DD date string into its proleptic Gregorian ordinal
+    (None if it isn't a valid date); each distinct string is parsed once
+    """
+    try:
+        return date.fromisoformat(text.strip()).toordinal()
+    except (ValueError, AttributeError):
+        return None
+
+
+def _to_ordinal(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, date):
+        return value.toordinal()
+
+    ordinal = date_ordinal(value)
+    if ordinal is None:
+        raise ValueError(f"Invalid date '{value}' (expected YYYY-MM-DD)")
+    return ordinal
+
+
+def week_label(ordinal):
+    year, week, _ = date.fromordinal(ordinal).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def month_label(ordinal):
+    day = date.fromordinal(ordinal)
+    return f"{day.year}-{day.month:02d}"
+
+
+class DateRollups:
+    """
+    Day/week/month rollups over a per-date aggregate
+    (DailyAccumulator.daily), keyed by date ordinals
+
+    Days are kept sorted with running revenue and transaction totals, so
+    range totals are two bisects and a subtraction; weeks (ISO, starting
+    Monday) and months are summed from the days. Dates that don't parse are
+    left out and listed in `unparsed`.
+
+    Range bounds are inclusive and may be date strings, datetime.date
+    objects or ordinals; None means unbounded.
+    """
+
+    def __init__(self, daily):
+        parsed = []
+        self.unparsed = []
+
+        for text, data in daily.items():
+            ordinal = date_ordinal(text)
+            if ordinal is None:
+                self.unparsed.append(text)
+            else:
+                parsed.append((ordinal, text, data))
+        parsed.sort(key=lambda item: item[0])
+
+        self.ordinals = [ordinal for ordinal, _, _ in parsed]
+        self.dates = [text for _, text, _ in parsed]
+        self.revenue = [data["revenue"] for _, _, data in parsed]
+        self.counts = [data["transaction_count"] for _, _, data in parsed]
+        self._revenue_totals = list(accumulate(self.revenue, initial=0.0))
+        self._count_totals = list(accumulate(self.counts, initial=0))
+
+        self.weekly = self._roll_up(parsed, week_label)
+        self.monthly = self._roll_up(parsed, month_label)
+
+    @staticmethod
+    def _roll_up(parsed, label):
+        # Days are in order, so periods come out in order too
+        periods = {}
+        for ordinal, _, data in parsed:
+            key = label(ordinal)
+            period = periods.get(key)
+            if period is None:
+                period = periods[key] = {
+                    "start": ordinal,
+                    "revenue": 0.0,
+                    "transaction_count": 0,
+                    "days": 0,
+                    "customers": type(data["customers"])()
+                }
+            period["revenue"] += data["revenue"]
+            period["transaction_count"] += data["transaction_count"]
+            period["days"] += 1
+            period["customers"] |= data["customers"]
+        return periods
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    @property
+    def first(self):
+        return self.dates[0] if self.dates else None
+
+    @property
+    def last(self):
+        return self.dates[-1] if self.dates else None
+
+    def _span(self, start, end):
+        start, end = _to_ordinal(start), _to_ordinal(end)
+        lo = 0 if start is None else bisect_left(self.ordinals, start)
+        hi = len(self.ordinals) if end is None else bisect_right(self.ordinals, end)
+        return lo, max(lo, hi)
+
+    def revenue_between(self, start=None, end=None):
+        lo, hi = self._span(start, end)
+        return self._revenue_totals[hi] - self._revenue_totals[lo]
+
+    def transactions_between(self, start=None, end=None):
+        lo, hi = self._span(start, end)
+        return self._count_totals[hi] - self._count_totals[lo]
+
+    def peak_day(self, start=None, end=None):
+        """
+        Returns: (date, revenue, transaction count) of the highest-revenue
+        day in the range (earliest on ties), or None if it has no sales
+        """
+        lo, hi = self._span(start, end)
+        if lo == hi:
+            return None
+
+        i = max(range(lo, hi), key=self.revenue.__getitem__)
+        return self.dates[i], self.revenue[i], self.counts[i]
@@ -0,0 +1,253 @@
+from itertools import compress, islice, repeat
+
+
+# Column converters: each takes a sequence of raw field strings and returns
+# the list of converted values, so a whole column of a batch is converted
+# with one map() instead of a function call per field. Thousands separators
+# are only stripped when a plain conversion fails.
+def _to_str(values):
+    return list(map(str.strip, values))
+
+
+def _to_name(values):
+    return list(map(str.strip, map(str.replace, values, repeat(","), repeat(""))))
+
+
+def _strip_name(value):
+    return value.replace(",", "").strip()
+
+
+def _to_number(kind):
+    def convert(values):
+        try:
+            return list(map(kind, values))
+        except ValueError:
+            return list(map(kind, map(str.replace, values, repeat(","), repeat(""))))
+    return convert
+
+
+FIELD_TYPES = {
+    "str": _to_str,
+    "name": _to_name,
+    "int": _to_number(int),
+    "float": _to_number(float)
+}
+
+# Per-value converters of the string types that can be interned
+STRING_TYPES = {
+    "str": str.strip,
+    "name": _strip_name
+}
+
+SALES_SCHEMA = [
+    ("TransactionID", "str"),
+    ("Date", "str"),
+    ("ProductID", "str"),
+    ("ProductName", "name"),
+    ("Quantity", "int"),
+    ("UnitPrice", "float"),
+    ("CustomerID", "str"),
+    ("Region", "str")
+]
+
+# Columns with few distinct values; the parser shares one string object per
+# distinct value instead of allocating a new one for every row
+INTERNED_FIELDS = ("Date", "ProductID", "ProductName", "CustomerID", "Region")
+
+FIELD_COUNT_REASON = "wrong_field_count"
+
+# Lines parsed per batch
+BATCH_SIZE = 1024
+
+
+def rejection_reason(field):
+    return f"invalid_{field.lower()}"
+
+
+class _Strings(dict):
+    """
+    Shared converted values keyed by raw field text: a raw value is
+    converted once, and every raw spelling of the same value maps to one
+    shared string
+    """
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, raw):
+        value = self.convert(raw)
+        value = self.setdefault(value, value)
+        self[raw] = value
+        return value
+
+
+def _to_shared(strings):
+    def convert(values):
+        return list(map(strings.__getitem__, values))
+    return convert
+
+
+class SalesRow:
+    """
+    Row class of SALES_SCHEMA (see row_class); plain attribute stores are
+    the fastest way to fill a key-sharing dict
+    """
+
+    def __init__(self, transaction_id, date, product_id, product_name, quantity,
+                 unit_price, customer_id, region):
+        self.TransactionID = transaction_id
+        self.Date = date
+        self.ProductID = product_id
+        self.ProductName = product_name
+        self.Quantity = quantity
+        self.UnitPrice = unit_price
+        self.CustomerID = customer_id
+        self.Region = region
+
+
+_row_classes = {tuple(name for name, _ in SALES_SCHEMA): SalesRow}
+
+
+def row_class(schema):
+    """
+    Returns the class whose instance __dict__ is a row of `schema`; one
+    class (and so one shared key table) per field list
+
+    Rows are built as the attribute dict of an instance, Row(*values).__dict__.
+    Such dicts share one key table between all rows (PEP 412 key-sharing
+    dicts) and only store their values, so each row takes about half the
+    memory of a dict literal while still being a plain dict.
+    """
+    names = tuple(name for name, _ in schema)
+    cls = _row_classes.get(names)
+
+    if cls is None:
+        class Row:
+            def __init__(self, *values):
+                self.__dict__.update(zip(names, values))
+
+        cls = _row_classes[names] = Row
+
+    return cls
+
+
+class RecordParser:
+    """
+    Line parser driven by a (field name, column type) schema
+
+    Converts pipe-delimited lines into dicts and counts rejected lines per
+    reason ("wrong_field_count", "invalid_<field>"). Lines are parsed in
+    batches of BATCH_SIZE, one column at a time. Rows share their key
+    table (see row_class) and values of the `interned` fields are shared
+    too: each distinct raw value is converted and stored once per parser.
+    """
+
+    def __init__(self, schema=SALES_SCHEMA, delimiter="|", interned=INTERNED_FIELDS,
+                 batch_size=BATCH_SIZE):
+        self.schema = schema
+        self.delimiter = delimiter
+        self.names = [name for name, _ in schema]
+        self.batch_size = batch_size
+        self.rejections = {}
+        self.parsed = 0
+        self.strings = {
+            field_type: _Strings(convert) for field_type, convert in STRING_TYPES.items()
+        }
+        self._converters = [
+            _to_shared(self.strings[field_type]) if name in interned and field_type in STRING_TYPES
+            else FIELD_TYPES[field_type]
+            for name, field_type in schema
+        ]
+        self._row = row_class(schema)
+
+    def reject(self, reason, count=1):
+        self.rejections[reason] = self.rejections.get(reason, 0) + count
+
+    def _convert_each(self, name, convert, values, failed):
+        # Slow path for a column that failed to convert: rows that fail are
+        # marked with the reason of their first failing field
+        result = []
+        for row, value in enumerate(values):
+            try:
+                result.append(convert((value,))[0])
+            except ValueError:
+                result.append(None)
+                failed.setdefault(row, rejection_reason(name))
+        return result
+
+    def _parse_batch(self, lines):
+        # The batch is joined and split once; with every line holding
+        # width - 1 delimiters, column i is every width-th field from i
+        width = len(self.schema)
+        counts = list(map(str.count, lines, repeat(self.delimiter)))
+        if set(counts) != {width - 1}:
+            lines = [line for line, count in zip(lines, counts) if count == width - 1]
+            self.reject(FIELD_COUNT_REASON, len(counts) - len(lines))
+            if not lines:
+                return None
+        fields = self.delimiter.join(lines).split(self.delimiter)
+        rows = len(lines)
+
+        failed = {}
+        columns = []
+        for i, (name, convert) in enumerate(zip(self.names, self._converters)):
+            values = fields[i::width]
+            try:
+                columns.append(convert(values))
+            except ValueError:
+                columns.append(self._convert_each(name, convert, values, failed))
+
+        if failed:
+            for reason in failed.values():
+                self.reject(reason)
+            if len(failed) == rows:
+                return None
+            keep = [row not in failed for row in range(rows)]
+            columns = [list(compress(values, keep)) for values in columns]
+
+        self.parsed += len(columns[0])
+        return columns
+
+    def iter_columns(self, lines):
+        """
+        Parses lines in batches, yielding each batch as a list of columns
+        (value lists in schema order); rejects are skipped and counted
+        """
+        lines = iter(lines)
+        while True:
+            batch = list(islice(lines, self.batch_size))
+            if not batch:
+                return
+            columns = self._parse_batch(batch)
+            if columns is not None:
+                yield columns
+
+    def iter_parse(self, lines):
+        """
+        Parses lines into dictionaries, skipping and counting rejects
+        """
+        Row = self._row
+        for columns in self.iter_columns(lines):
+            yield from map(vars, map(Row, *columns))
+
+    def parse(self, lines):
+        """
+        Parses lines into a list of dictionaries, skipping and counting
+        rejects
+        """
+        Row = self._row
+        rows = []
+        for columns in self.iter_columns(lines):
+            rows.extend(map(vars, map(Row, *columns)))
+        return rows
+
+    def summary(self):
+        """
+        Returns: dict with parsed, rejected and per-reason rejection counts
+        """
+        return {
+            "parsed": self.parsed,
+            "rejected": sum(self.rejections.values()),
+            "rejections": dict(self.rejections)
+        }
@@ -0,0 +1,199 @@
+import math
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from hashlib import blake2b
+
+# 2**12 registers: about 1.6% standard error in 4 KB per sketch
+HLL_PRECISION = 12
+# Order value quantiles are returned within 1% of the true value
+QUANTILE_ACCURACY = 0.01
+QUANTILE_MAX_BINS = 2048
+
+
+@lru_cache(maxsize=1 << 16)
+def hash64(value):
+    # Stable across processes (unlike hash()), so sketches built in worker
+    # processes or saved in checkpoints can be merged
+    return int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with a fixed memory bound
+
+    Small sets are kept exactly, as the sorted 8-byte hashes seen so far;
+    past m / 64 values it switches to 2**precision one-byte registers, with
+    a standard error of 1.04 / sqrt(2**precision). Supports len(), add()
+    and |= (merge with another sketch or add an iterable of values).
+    """
+    __slots__ = ("precision", "registers", "hashes")
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = None
+        self.hashes = array("Q")
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def add(self, value):
+        h = hash64(value)
+        hashes = self.hashes
+        if hashes is None:
+            self._add_hash(h)
+            return
+
+        i = bisect_left(hashes, h)
+        if i == len(hashes) or hashes[i] != h:
+            hashes.insert(i, h)
+            if len(hashes) > (1 << self.precision) >> 6:
+                self._densify()
+
+    def _add_hash(self, h):
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def _densify(self):
+        self.registers = bytearray(1 << self.precision)
+        for h in self.hashes:
+            self._add_hash(h)
+        self.hashes = None
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Can't merge HyperLogLog sketches of different precision")
+
+        if other.registers is None:
+            if self.registers is None:
+                self.hashes = array("Q", sorted(set(self.hashes).union(other.hashes)))
+                if len(self.hashes) > (1 << self.precision) >> 6:
+                    self._densify()
+            else:
+                for h in other.hashes:
+                    self._add_hash(h)
+        else:
+            if self.registers is None:
+                self._densify()
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def __ior__(self, other):
+        if isinstance(other, HyperLogLog):
+            self.merge(other)
+        else:
+            for value in other:
+                self.add(value)
+        return self
+
+    def count(self):
+        """
+        Returns the estimated number of distinct values
+        """
+        if self.registers is None:
+            return float(len(self.hashes))
+
+        m = len(self.registers)
+        registers = self.registers
+        total = sum(registers.count(r) * 2.0 ** -r for r in range(max(registers) + 1))
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / total
+
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return round(self.count())
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error bound (DDSketch)
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value. At most `max_bins`
+    buckets are kept; past that the lowest buckets are folded together,
+    which only affects the smallest quantiles. Values <= 0 are counted as
+    0; NaN and infinite values are skipped.
+    """
+    __slots__ = ("relative_accuracy", "max_bins", "bins", "zero_count", "count", "log_gamma")
+
+    def __init__(self, relative_accuracy=QUANTILE_ACCURACY, max_bins=QUANTILE_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(gamma)
+
+    def add(self, value):
+        if 0 < value < math.inf:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            bins = self.bins
+            bins[key] = bins.get(key, 0) + 1
+            if len(bins) > self.max_bins:
+                self._collapse()
+        elif value <= 0:
+            self.zero_count += 1
+        else:
+            return
+        self.count += 1
+
+    def add_bins(self, bins, zero_count=0):
+        """
+        Adds precounted buckets ({key: count}, keys as computed by add())
+        and values <= 0
+        """
+        if self.bins:
+            for key, count in bins.items():
+                self.bins[key] = self.bins.get(key, 0) + count
+        else:
+            self.bins = dict(bins)
+        self.zero_count += zero_count
+        self.count += sum(bins.values()) + zero_count
+
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = keys[:len(keys) - self.max_bins + 1]
+        folded = sum(self.bins.pop(key) for key in excess)
+        self.bins[excess[-1]] = folded
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can't merge quantile sketches of different accuracy")
+
+        bins = self.bins
+        for key, count in other.bins.items():
+            bins[key] = bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q):
+        """
+        Returns the approximate q-quantile (0 <= q <= 1), or None if empty
+        """
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key]
+                return 2 * math.exp(key * self.log_gamma) / (1 + math.exp(self.log_gamma))
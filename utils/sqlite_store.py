@@ -0,0 +1,259 @@
+import os
+import sqlite3
+
+from utils.data_processor import (
+    CustomerAccumulator,
+    DailyAccumulator,
+    EnrichmentAccumulator,
+    ProductAccumulator,
+    RegionAccumulator,
+    RevenueAccumulator,
+)
+from utils.exporters import ENRICHED_COLUMNS, ROW_GROUP_SIZE, enriched_row
+
+TABLE = "transactions"
+# Index name -> columns. The second columns make the indexes covering for
+# the distinct customers per date, products per customer and match counts
+# per product queries, so those are read from the index alone.
+INDEXES = {
+    "Region": ("Region",),
+    "Date": ("Date", "CustomerID"),
+    "ProductID": ("ProductID", "API_Match"),
+    "CustomerID": ("CustomerID", "ProductName")
+}
+
+_SQL_TYPES = {"string": "TEXT", "int": "INTEGER", "float": "REAL", "bool": "INTEGER"}
+_AMOUNT = "Quantity * UnitPrice"
+
+
+class SalesStore:
+    """
+    SQLite database of enriched transactions (one `transactions` table
+    with the ENRICHED_COLUMNS, indexed on Region, Date, ProductID and
+    CustomerID)
+
+    load() replaces the table in a single transaction, so readers see
+    either the previous data or the complete new load. The query methods
+    return the same shapes as the data_processor functions of the same
+    name and take optional region / date range (inclusive) filters, which
+    are answered from the indexes.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Transactions are managed explicitly (BEGIN ... COMMIT)
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def iter_load(self, enriched_transactions, batch_size=ROW_GROUP_SIZE):
+        """
+        Replaces the stored transactions with `enriched_transactions` as they
+        stream through (yielded unchanged), inserting them in batches
+
+        Indexes are built once all rows are in; the load is committed only
+        when the input is exhausted and rolled back otherwise.
+        """
+        columns = ", ".join(f"{name} {_SQL_TYPES[kind]}" for name, kind in ENRICHED_COLUMNS)
+        insert = f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(ENRICHED_COLUMNS))})"
+        db = self.db
+
+        db.execute("BEGIN")
+        try:
+            db.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            db.execute(f"CREATE TABLE {TABLE} ({columns})")
+
+            batch = []
+            for tx in enriched_transactions:
+                batch.append(tx)
+                if len(batch) >= batch_size:
+                    db.executemany(insert, map(enriched_row, batch))
+                    batch = []
+                yield tx
+
+            if batch:
+                db.executemany(insert, map(enriched_row, batch))
+
+            for name, columns in INDEXES.items():
+                db.execute(f"CREATE INDEX idx_{TABLE}_{name} ON {TABLE} ({', '.join(columns)})")
+            db.execute("ANALYZE")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def load(self, enriched_transactions, batch_size=ROW_GROUP_SIZE):
+        """
+        Returns: number of rows loaded
+        """
+        rows = 0
+        for _ in self.iter_load(enriched_transactions, batch_size):
+            rows += 1
+        return rows
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _where(self, region=None, start=None, end=None):
+        conditions = []
+        params = []
+        for condition, value in (("Region = ?", region), ("Date >= ?", start), ("Date <= ?", end)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def _query(self, sql, region=None, start=None, end=None):
+        # "{where}" in `sql` is replaced by the filter clause
+        where, params = self._where(region, start, end)
+        return self.db.execute(sql.format(where=where), params)
+
+    def count(self, region=None, start=None, end=None):
+        return self._query(f"SELECT COUNT(*) FROM {TABLE}{{where}}", region, start, end).fetchone()[0]
+
+    def region_wise_sales(self, region=None, start=None, end=None):
+        rows = self._query(
+            f"SELECT Region, SUM({_AMOUNT}) AS sales, COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY Region ORDER BY sales DESC, MIN(rowid)",
+            region, start, end
+        ).fetchall()
+        grand_total = sum(sales for _, sales, _ in rows)
+
+        return {
+            name: {
+                "total_sales": round(sales, 2),
+                "transaction_count": count,
+                "percentage": round((sales / grand_total) * 100, 2)
+            }
+            for name, sales, count in rows
+        }
+
+    def top_selling_products(self, n=5, region=None, start=None, end=None):
+        rows = self._query(
+            f"SELECT ProductName, SUM(Quantity) AS qty, SUM({_AMOUNT}) FROM {TABLE}{{where}} "
+            f"GROUP BY ProductName ORDER BY qty DESC, MIN(rowid) LIMIT {int(n)}",
+            region, start, end
+        )
+        return [(name, qty, round(revenue, 2)) for name, qty, revenue in rows]
+
+    def customer_analysis(self, region=None, start=None, end=None):
+        customers = self._query(
+            f"SELECT CustomerID, SUM({_AMOUNT}) AS spent, COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY CustomerID ORDER BY spent DESC, MIN(rowid)",
+            region, start, end
+        ).fetchall()
+        products = {cid: [] for cid, _, _ in customers}
+        for cid, name in self._query(
+            f"SELECT DISTINCT CustomerID, ProductName FROM {TABLE}{{where}} "
+            "ORDER BY CustomerID, ProductName",
+            region, start, end
+        ):
+            products[cid].append(name)
+
+        return {
+            cid: {
+                "total_spent": round(spent, 2),
+                "purchase_count": count,
+                "avg_order_value": round(spent / count, 2),
+                "products_bought": products[cid],
+                "unique_products": len(products[cid])
+            }
+            for cid, spent, count in customers
+        }
+
+    def daily_sales_trend(self, region=None, start=None, end=None):
+        rows = self._query(
+            f"SELECT Date, SUM({_AMOUNT}), COUNT(*), COUNT(DISTINCT CustomerID) "
+            f"FROM {TABLE}{{where}} GROUP BY Date ORDER BY Date",
+            region, start, end
+        )
+        return {
+            day: {
+                "revenue": round(revenue, 2),
+                "transaction_count": count,
+                "unique_customers": customers
+            }
+            for day, revenue, count, customers in rows
+        }
+
+    def aggregates(self, region=None, start=None, end=None):
+        """
+        Rebuilds the report accumulators (see generate_sales_report) from
+        GROUP BY queries, in first-seen order like a streaming pass
+
+        Order value quantiles aren't stored, so that report section is
+        left out.
+        """
+        def query(sql):
+            return self._query(sql, region, start, end)
+
+        revenue = RevenueAccumulator()
+        revenue.total, revenue.count = query(
+            f"SELECT COALESCE(SUM({_AMOUNT}), 0.0), COUNT(*) FROM {TABLE}{{where}}"
+        ).fetchone()
+
+        region_acc = RegionAccumulator()
+        for name, sales, count in query(
+            f"SELECT Region, SUM({_AMOUNT}), COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY Region ORDER BY MIN(rowid)"
+        ):
+            region_acc.regions[name] = {"total_sales": sales, "transaction_count": count}
+
+        product = ProductAccumulator()
+        for name, qty, sales in query(
+            f"SELECT ProductName, SUM(Quantity), SUM({_AMOUNT}) FROM {TABLE}{{where}} "
+            "GROUP BY ProductName ORDER BY MIN(rowid)"
+        ):
+            product.products[name] = {"qty": qty, "revenue": sales}
+
+        customer = CustomerAccumulator()
+        for cid, spent, count in query(
+            f"SELECT CustomerID, SUM({_AMOUNT}), COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY CustomerID ORDER BY MIN(rowid)"
+        ):
+            customer.customers[cid] = {"total_spent": spent, "purchase_count": count, "products": set()}
+        for cid, name in query(f"SELECT DISTINCT CustomerID, ProductName FROM {TABLE}{{where}}"):
+            customer.customers[cid]["products"].add(name)
+
+        daily = DailyAccumulator()
+        for day, sales, count in query(
+            f"SELECT Date, SUM({_AMOUNT}), COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY Date ORDER BY MIN(rowid)"
+        ):
+            daily.daily[day] = {"revenue": sales, "transaction_count": count, "customers": set()}
+        for day, cid in query(f"SELECT DISTINCT Date, CustomerID FROM {TABLE}{{where}}"):
+            daily.daily[day]["customers"].add(cid)
+
+        enrichment = EnrichmentAccumulator()
+        for product_id, matched, count in query(
+            f"SELECT ProductID, API_Match, COUNT(*) FROM {TABLE}{{where}} "
+            "GROUP BY ProductID, API_Match ORDER BY MIN(rowid)"
+        ):
+            enrichment.total += count
+            if matched:
+                enrichment.matched += count
+            else:
+                enrichment.failed_counts[product_id] = count
+
+        return {
+            acc.name: acc
+            for acc in (revenue, region_acc, product, customer, daily, enrichment)
+        }
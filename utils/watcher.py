@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+from utils.incremental import (
+    CHECKPOINT_FILE,
+    apply_increment,
+    enriched_file_size,
+    load_checkpoint,
+    save_checkpoint,
+    truncate_enriched_file,
+)
+from utils.report_generator import generate_sales_report
+
+# Seconds between stat() calls while idle
+POLL_INTERVAL = 0.25
+# A change is processed once the file has been quiet this long...
+DEBOUNCE = 0.1
+# ...or this long after it was first seen, if writes keep coming
+MAX_DELAY = 0.5
+
+
+def _file_key(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class SalesWatcher:
+    """
+    Keeps the incremental aggregate state and the catalog mapping in memory
+    and regenerates the report whenever the sales file changes
+
+    The file is polled with stat(); a change is debounced (see DEBOUNCE and
+    MAX_DELAY), then only the appended lines are processed (see
+    utils/incremental.py; a truncated or rewritten file is reprocessed
+    from the start) and the report is rewritten. The checkpoint is saved
+    after each update, so --incremental runs and restarts resume from it.
+    """
+
+    def __init__(self, filename, product_mapping, report_file,
+                 checkpoint_file=CHECKPOINT_FILE, enriched_file=None, approximate=False,
+                 percentiles=False, interval=POLL_INTERVAL, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        self.filename = filename
+        self.product_mapping = product_mapping
+        self.report_file = report_file
+        self.checkpoint_file = checkpoint_file
+        self.enriched_file = enriched_file
+        self.approximate = approximate
+        self.percentiles = percentiles
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.state = load_checkpoint(checkpoint_file)
+        self.updates = 0
+        self.reported_at = None
+        self._file_key = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def update(self):
+        """
+        Processes pending lines and rewrites the report
+
+        Returns: number of new lines read
+        """
+        self._file_key = _file_key(self.filename)
+        self.state, new_lines = apply_increment(
+            self.state,
+            self.filename,
+            self.product_mapping,
+            enriched_file=self.enriched_file,
+            approximate=self.approximate,
+            percentiles=self.percentiles
+        )
+        generate_sales_report(
+            None, None, output_file=self.report_file, aggregates=self.state["aggregates"],
+            verbose=False
+        )
+        self.reported_at = time.monotonic()
+        # After the report, so it doesn't add to the update latency
+        save_checkpoint(self.state, self.checkpoint_file)
+        self.updates += 1
+        return new_lines
+
+    def _changed(self):
+        key = _file_key(self.filename)
+        return key is not None and key != self._file_key
+
+    def _settle(self):
+        # Waits for the writer to pause, for at most max_delay
+        deadline = time.monotonic() + self.max_delay
+        key = _file_key(self.filename)
+        while time.monotonic() < deadline and not self._stop.wait(self.debounce):
+            current = _file_key(self.filename)
+            if current == key:
+                return
+            key = current
+
+    def _try_update(self, since):
+        size = enriched_file_size(self.enriched_file)
+        try:
+            new_lines = self.update()
+        except Exception as e:
+            # Keep watching; the next change of the file retries. The
+            # in-memory state may be partly updated, so go back to the
+            # last saved checkpoint, and to the enriched rows it covers
+            print(f"Warning: updating from '{self.filename}' failed: {e}")
+            self.state = load_checkpoint(self.checkpoint_file)
+            truncate_enriched_file(self.enriched_file, size)
+            return
+        self._report(new_lines, self.reported_at - since)
+
+    def run(self):
+        """
+        Processes the file, then watches it until stop() (or Ctrl+C)
+
+        A failed update (e.g. the file is missing or was removed mid-read)
+        is reported and retried once the file changes again.
+        """
+        self._try_update(time.monotonic())
+
+        while not self._stop.wait(self.interval):
+            if not self._changed():
+                continue
+
+            detected = time.monotonic()
+            self._settle()
+            if self._stop.is_set():
+                break
+            self._try_update(detected)
+
+    def _report(self, new_lines, latency):
+        stats = self.state["stats"]
+        print(
+            f"✓ {time.strftime('%H:%M:%S')} +{new_lines} lines | "
+            f"valid {stats['final_count']} | invalid {stats['invalid']} | "
+            f"duplicates {stats['duplicates']} | report updated in {latency * 1000:.0f} ms"
+        )